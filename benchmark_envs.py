@@ -0,0 +1,430 @@
+import argparse
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+
+import davinci_code_env
+import davinci_code_env_v1
+import davinci_code_env_v2
+import game_array
+
+ENV_IDS = ("DavinciCode-v0", "DavinciCode-v1", "DavinciCode-v2")
+# random samples the action space, masked samples the valid actions of the action mask
+POLICIES = ("random", "masked")
+# The measurements compared with a baseline, and whether higher is better
+METRICS = {"steps_per_s": True, "resets_per_s": True, "memory_per_env": False}
+ENGINE_METRICS = {
+    "moves_per_s": True,
+    "snapshot_restores_per_s": True,
+    "forks_per_s": True,
+    "memory_per_game": False,
+}
+
+
+def get_action_mask(observation, info: dict) -> np.ndarray | None:
+    """
+    The action mask of an environment, in info for v2 and in the observation for v1, None for v0
+    """
+    if "action_mask" in info:
+        return info["action_mask"]
+    if isinstance(observation, dict) and "action_mask" in observation:
+        return observation["action_mask"]
+    return None
+
+
+def masked_random_action(env: gym.Env, action_mask: np.ndarray, np_random: np.random.Generator):
+    """
+    A uniformly random valid action of the action mask, in the format of the action space
+    """
+    valid_actions = np.flatnonzero(action_mask)
+    if len(valid_actions) == 0:  # the episode is over
+        return env.action_space.sample()
+    action = np_random.choice(valid_actions)
+    if isinstance(env.action_space, spaces.Discrete):
+        return int(action)
+    return np.array(np.unravel_index(action, action_mask.shape), dtype=env.action_space.dtype)
+
+
+def result_key(result: dict) -> tuple:
+    return (
+        result["env_id"],
+        result["engine"],
+        result["num_players"],
+        result["max_tile_num"],
+        result["initial_tiles"],
+        result["policy"],
+    )
+
+
+def engine_result_key(result: dict) -> tuple:
+    return (
+        result["engine"],
+        result["num_players"],
+        result["max_tile_num"],
+        result["initial_tiles"],
+    )
+
+
+def play_random_game(game_host, np_random: np.random.Generator) -> int:
+    """
+    Play a game through the GameHost API with random guesses, right half of the time, and return
+    the number of guesses made
+    """
+    all_players = game_host.all_players
+    table_tile_set = game_host.table_tile_set
+    current_player_index = 0
+    all_players[0].draw_tile(table_tile_set)
+    num_moves = 0
+    while not game_host.is_game_over():
+        target_index = int(np_random.integers(len(all_players)))
+        target_tile_list = all_players[target_index].get_tile_list()
+        tile_index = int(np_random.integers(len(target_tile_list)))
+        tile_number = int(np_random.integers(1, table_tile_set.max_tile_number + 1))
+        if np_random.random() < 0.5:
+            tile_number = target_tile_list[tile_index].number
+        error, correct_guess = all_players[current_player_index].try_guess(
+            all_players, current_player_index, target_index, tile_index, tile_number
+        )
+        num_moves += 1
+        if error is None and not correct_guess:
+            current_player_index = game_host.get_next_player_index(current_player_index)
+            if len(table_tile_set.tile_set) > 0:
+                all_players[current_player_index].draw_tile(table_tile_set)
+    return num_moves
+
+
+def benchmark_engine(
+    engine: str,
+    num_players: int,
+    max_tile_num: int,
+    initial_tiles: int,
+    num_games: int = 200,
+    num_snapshots: int = 2000,
+    seed: int = 0,
+) -> dict:
+    """
+    Measure a game engine without an environment: the guesses per second of random games, the
+    snapshot and restore pairs and the forks per second, and the bytes allocated per dealt game
+
+    Returns:
+        dict: The configuration and its measurements, or the reason why it was skipped
+    """
+    result = {
+        "engine": engine,
+        "num_players": num_players,
+        "max_tile_num": max_tile_num,
+        "initial_tiles": initial_tiles,
+    }
+    if num_players * initial_tiles >= 2 * max_tile_num:  # a tile is drawn after the deal
+        return {**result, "skipped": "not enough tiles to deal"}
+    host_class = game_array.ENGINES[engine]
+    np_random = np.random.default_rng(seed)
+
+    num_moves = 0
+    start = time.perf_counter()
+    for game_index in range(num_games):
+        game_host = host_class(
+            num_players, initial_tiles, max_tile_num, np.random.default_rng(seed + game_index)
+        )
+        game_host.init_game()
+        num_moves += play_random_game(game_host, np_random)
+    moves_per_s = num_moves / (time.perf_counter() - start)
+
+    game_host = host_class(num_players, initial_tiles, max_tile_num, np.random.default_rng(seed))
+    game_host.init_game()
+    start = time.perf_counter()
+    for _ in range(num_snapshots):
+        game_host.restore(game_host.snapshot())
+    snapshot_restores_per_s = num_snapshots / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(num_snapshots):
+        game_host.fork()
+    forks_per_s = num_snapshots / (time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        game_hosts = [
+            host_class(
+                num_players, initial_tiles, max_tile_num, np.random.default_rng(seed + index)
+            )
+            for index in range(8)
+        ]
+        for game_host in game_hosts:
+            game_host.init_game()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        **result,
+        "num_moves": num_moves,
+        "moves_per_s": moves_per_s,
+        "snapshot_restores_per_s": snapshot_restores_per_s,
+        "forks_per_s": forks_per_s,
+        "memory_per_game": (end - start) // len(game_hosts),
+    }
+
+
+def measure_memory(env_id: str, env_kwargs: dict, num_envs: int, seed: int) -> int:
+    """
+    The bytes allocated by one reset environment, averaged over num_envs environments
+    """
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        envs = [gym.make(env_id, **env_kwargs) for _ in range(num_envs)]
+        for env_index, env in enumerate(envs):
+            env.reset(seed=seed + env_index)
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (end - start) // num_envs
+
+
+def benchmark_config(
+    env_id: str,
+    engine: str,
+    num_players: int,
+    max_tile_num: int,
+    initial_tiles: int,
+    policy: str,
+    num_steps: int = 2000,
+    num_resets: int = 100,
+    seed: int = 0,
+) -> dict:
+    """
+    Measure one configuration of an environment under one policy
+
+    Returns:
+        dict: The configuration and its resets and steps per second, the step latency mean and
+            percentiles in microseconds, the bytes of one observation and the bytes allocated per
+            environment, or the reason why the configuration was skipped
+    """
+    result = {
+        "env_id": env_id,
+        "engine": engine,
+        "num_players": num_players,
+        "max_tile_num": max_tile_num,
+        "initial_tiles": initial_tiles,
+        "policy": policy,
+    }
+    if num_players * initial_tiles >= 2 * max_tile_num:  # a tile is drawn after the deal
+        return {**result, "skipped": "not enough tiles to deal"}
+    env_kwargs = {
+        "num_players": num_players,
+        "max_tile_num": max_tile_num,
+        "initial_tiles": initial_tiles,
+        "engine": engine,
+    }
+    env = gym.make(env_id, **env_kwargs)
+    env.action_space.seed(seed)
+    np_random = np.random.default_rng(seed)
+    observation, info = env.reset(seed=seed)
+    if policy == "masked" and get_action_mask(observation, info) is None:
+        return {**result, "skipped": "no action mask"}
+
+    start = time.perf_counter()
+    for reset_index in range(num_resets):
+        env.reset(seed=seed + reset_index)
+    resets_per_s = num_resets / (time.perf_counter() - start)
+
+    # only env.step is timed, not the policy nor the resets of finished episodes
+    latencies = np.empty(num_steps, dtype=np.int64)
+    observation, info = env.reset(seed=seed)
+    num_episodes = 0
+    for step_index in range(num_steps):
+        if policy == "masked":
+            action = masked_random_action(env, get_action_mask(observation, info), np_random)
+        else:
+            action = env.action_space.sample()
+        start = time.perf_counter_ns()
+        observation, _, terminated, truncated, info = env.step(action)
+        latencies[step_index] = time.perf_counter_ns() - start
+        if terminated or truncated:
+            observation, info = env.reset()
+            num_episodes += 1
+    env.close()
+
+    latencies_us = latencies / 1e3
+    percentiles = np.percentile(latencies_us, [50, 90, 99])
+    observation_bytes = sum(
+        np.asarray(value).nbytes
+        for value in (observation.values() if isinstance(observation, dict) else [observation])
+    )
+    return {
+        **result,
+        "num_steps": num_steps,
+        "num_episodes": num_episodes,
+        "resets_per_s": resets_per_s,
+        "steps_per_s": num_steps / (latencies.sum() / 1e9),
+        "latency_us": {
+            "mean": float(latencies_us.mean()),
+            "p50": float(percentiles[0]),
+            "p90": float(percentiles[1]),
+            "p99": float(percentiles[2]),
+        },
+        "observation_bytes": observation_bytes,
+        "memory_per_env": measure_memory(env_id, env_kwargs, 8, seed),
+    }
+
+
+def run_benchmarks(
+    env_ids=ENV_IDS,
+    engines=("object",),
+    num_players_list=(2, 3, 4, 5, 6),
+    max_tile_nums=(8, 12, 16),
+    initial_tiles_list=(3, 4),
+    policies=POLICIES,
+    num_steps: int = 2000,
+    num_resets: int = 100,
+    seed: int = 0,
+    num_games: int = 200,
+) -> dict:
+    """
+    Measure every combination of the configurations, and every game engine on its own
+
+    Returns:
+        dict: The report, the environment of the run under "meta", the result of every
+            configuration under "results" and of every engine configuration under "engine_results"
+    """
+    results = [
+        benchmark_config(*config, num_steps=num_steps, num_resets=num_resets, seed=seed)
+        for config in itertools.product(
+            env_ids, engines, num_players_list, max_tile_nums, initial_tiles_list, policies
+        )
+    ]
+    engine_results = [
+        benchmark_engine(*config, num_games=num_games, num_snapshots=num_steps, seed=seed)
+        for config in itertools.product(
+            engines, num_players_list, max_tile_nums, initial_tiles_list
+        )
+    ]
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "gymnasium": gym.__version__,
+        "platform": platform.platform(),
+        "num_steps": num_steps,
+        "num_resets": num_resets,
+        "num_games": num_games,
+        "seed": seed,
+    }
+    return {"meta": meta, "results": results, "engine_results": engine_results}
+
+
+def compare_results(report: dict, baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """
+    Find the regressions of a report against a baseline report: the configurations of both whose
+    throughput fell, or whose memory grew, by more than tolerance
+
+    Returns:
+        list[str]: A description of every regression
+    """
+    regressions = []
+    for results_name, get_key, metrics in [
+        ("results", result_key, METRICS),
+        ("engine_results", engine_result_key, ENGINE_METRICS),
+    ]:
+        regressions += _compare_results(
+            report.get(results_name, []),
+            baseline.get(results_name, []),
+            get_key,
+            metrics,
+            tolerance,
+        )
+    return regressions
+
+
+def _compare_results(
+    results: list, baseline_results: list, get_key, metrics: dict, tolerance: float
+) -> list[str]:
+    baseline_results = {
+        get_key(result): result for result in baseline_results if "skipped" not in result
+    }
+    regressions = []
+    for result in results:
+        baseline_result = baseline_results.get(get_key(result))
+        if "skipped" in result or baseline_result is None:
+            continue
+        for metric, higher_is_better in metrics.items():
+            value, baseline_value = result[metric], baseline_result[metric]
+            if higher_is_better:
+                regressed = value < baseline_value * (1 - tolerance)
+            else:
+                regressed = value > baseline_value * (1 + tolerance)
+            if regressed:
+                regressions.append(
+                    f"{'/'.join(map(str, get_key(result)))}: {metric} {value:.4g}, "
+                    f"baseline {baseline_value:.4g}"
+                )
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the DavinciCode environments")
+    parser.add_argument("--envs", nargs="+", default=list(ENV_IDS))
+    parser.add_argument("--engines", nargs="+", default=["object"])
+    parser.add_argument("--players", nargs="+", type=int, default=[2, 3, 4, 5, 6])
+    parser.add_argument("--max-tile-nums", nargs="+", type=int, default=[8, 12, 16])
+    parser.add_argument("--initial-tiles", nargs="+", type=int, default=[3, 4])
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--resets", type=int, default=100)
+    parser.add_argument("--games", type=int, default=200, help="random games per engine")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="a report to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.envs,
+        args.engines,
+        args.players,
+        args.max_tile_nums,
+        args.initial_tiles,
+        args.policies,
+        args.steps,
+        args.resets,
+        args.seed,
+        args.games,
+    )
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    for result in report["results"]:
+        name = "/".join(map(str, result_key(result)))
+        if "skipped" in result:
+            print(f"{name}: skipped, {result['skipped']}")
+        else:
+            print(
+                f"{name}: {result['steps_per_s']:.0f} steps/s, "
+                f"p99 {result['latency_us']['p99']:.1f} us, {result['resets_per_s']:.0f} resets/s"
+            )
+    for result in report["engine_results"]:
+        name = "/".join(map(str, engine_result_key(result)))
+        if "skipped" in result:
+            print(f"{name}: skipped, {result['skipped']}")
+        else:
+            print(
+                f"{name}: {result['moves_per_s']:.0f} moves/s, "
+                f"{result['snapshot_restores_per_s']:.0f} snapshot restores/s, "
+                f"{result['forks_per_s']:.0f} forks/s, {result['memory_per_game']} bytes/game"
+            )
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_results(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+import hashlib
+
+
+def iter_bits(mask: int):
+    """
+    Yield the indices of the set bits of mask in ascending order
+    """
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def hash64(values) -> int:
+    """
+    A stable 64-bit hash of a sequence of integers, independent of the process and the platform
+    """
+    data = ",".join(map(str, values)).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class Bitboard:
+    """
+    This class is an immutable bitboard encoding of a game state
+
+    Every tile is identified by its tile id, tile_id = (number - 1) * 2 + color, so iterating the bits
+    of a hand in ascending order gives the tiles sorted the way the game sorts them
+
+    Attributes:
+        max_tile_number (int): The maximum number a tile can have
+        hands (tuple[int]): For each player, the mask of tile ids in the hand (temp tile excluded)
+        public (int): The mask of tile ids that are public
+        temp_tiles (tuple[int]): For each player, the tile id just drawn, -1 if there is none
+        history (tuple[int]): For each source player, the mask of failed guesses, where the bit
+            tile_id * max_tile_number + number - 1 is set if the player guessed number on the tile
+
+    Methods:
+        hidden: Get the mask of private tiles in the hand of a player
+        hidden_count: Get the number of private tiles in the hand of a player
+        is_lose: Test if a player loses the game
+        is_game_over: Test if the winner appears
+        public_hash: Get a stable 64-bit hash of the public information state
+        state_hash: Get a stable 64-bit hash of the full game state
+    """
+
+    __slots__ = ("max_tile_number", "hands", "public", "temp_tiles", "history", "_hashes")
+
+    def __init__(
+        self,
+        max_tile_number: int,
+        hands: tuple[int, ...],
+        public: int,
+        temp_tiles: tuple[int, ...],
+        history: tuple[int, ...],
+    ) -> None:
+        self.max_tile_number = max_tile_number
+        self.hands = tuple(hands)
+        self.public = public
+        self.temp_tiles = tuple(temp_tiles)
+        self.history = tuple(history)
+        self._hashes = {}
+
+    @property
+    def num_players(self) -> int:
+        return len(self.hands)
+
+    @property
+    def table(self) -> int:
+        """
+        The mask of tile ids on the table
+        """
+        table = (1 << 2 * self.max_tile_number) - 1
+        for hand in self.hands:
+            table &= ~hand
+        for temp_tile_id in self.temp_tiles:
+            if temp_tile_id >= 0:
+                table &= ~(1 << temp_tile_id)
+        return table
+
+    def hidden(self, player_index: int) -> int:
+        return self.hands[player_index] & ~self.public
+
+    def hidden_count(self, player_index: int) -> int:
+        return self.hidden(player_index).bit_count()
+
+    def is_lose(self, player_index: int) -> bool:
+        return self.hidden(player_index) == 0
+
+    def is_game_over(self) -> bool:
+        return sum(1 for hand in self.hands if hand & ~self.public) <= 1
+
+    def guesses(self, source_player_index: int, tile_id: int) -> int:
+        """
+        The failed guesses of a source player on a tile, as a mask where bit number - 1 is set
+        """
+        number_mask = (1 << self.max_tile_number) - 1
+        return self.history[source_player_index] >> tile_id * self.max_tile_number & number_mask
+
+    def public_hash(self, observer: int = None) -> int:
+        """
+        A stable 64-bit hash of everything visible to all players: the colour of every tile in every
+        hand and its position, the numbers of public tiles, the colours of the drawn tiles and the
+        failed guesses. If observer is given, the private tiles of that player are included as well,
+        which gives a key of the information state of the observer
+
+        Whose turn it is is not part of the bitboard, so it is not hashed either. A drawn tile shows
+        it, but not once the table is empty. Caches that depend on the turn key on the hash together
+        with the player taking the turn, as EndgameSolver does, while the posterior of an observer
+        does not depend on the turn at all
+        """
+        if observer not in self._hashes:
+            values = [self.max_tile_number]
+            for player_index, hand in enumerate(self.hands):
+                values.extend((-1, hand.bit_count()))  # player separator and hand size
+                for tile_id in iter_bits(hand):
+                    if self.public >> tile_id & 1 or player_index == observer:
+                        values.append(tile_id + 2)
+                    else:
+                        values.append(tile_id % 2)  # only the colour is visible
+                    for source_player_index in range(self.num_players):
+                        values.append(self.guesses(source_player_index, tile_id))
+                temp_tile_id = self.temp_tiles[player_index]
+                if temp_tile_id < 0:
+                    values.append(-2)
+                elif player_index == observer:
+                    values.append(temp_tile_id + 2)
+                else:
+                    values.append(temp_tile_id % 2)
+            self._hashes[observer] = hash64(values)
+        return self._hashes[observer]
+
+    def state_hash(self) -> int:
+        """
+        A stable 64-bit hash of the full game state, including the numbers of private tiles
+        """
+        if "state" not in self._hashes:
+            self._hashes["state"] = hash64(
+                (self.max_tile_number, *self.hands, self.public, *self.temp_tiles, *self.history)
+            )
+        return self._hashes["state"]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Bitboard) and (
+            self.max_tile_number,
+            self.hands,
+            self.public,
+            self.temp_tiles,
+            self.history,
+        ) == (other.max_tile_number, other.hands, other.public, other.temp_tiles, other.history)
+
+    def __hash__(self) -> int:
+        return self.state_hash()
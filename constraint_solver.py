@@ -0,0 +1,206 @@
+from bitboard import Bitboard, iter_bits
+
+
+def id_mask_to_number_mask(id_mask: int) -> int:
+    """
+    Convert a mask of tile ids of one colour into a mask of numbers, where bit number - 1 is set
+    """
+    number_mask = 0
+    for tile_id in iter_bits(id_mask):
+        number_mask |= 1 << (tile_id >> 1)
+    return number_mask
+
+
+class CandidateSolver:
+    """
+    This class keeps, for one observer, the tile ids every hidden tile can still be
+
+    The candidates only use what the observer can see: the colour and the position of every tile,
+    the observer's own tiles, the public tiles and the failed guesses. They are narrowed by constraint
+    propagation to a fixpoint: the tile ids of a hand are strictly increasing, every tile id appears
+    once, and a failed guess rules its number out. Each update only propagates from what changed
+    since the previous bitboard.
+
+    Candidates are masks of tile ids, tile_id = (number - 1) * 2 + color, holding only ids of the
+    colour of the tile; id_mask_to_number_mask turns them into masks of numbers.
+
+    Attributes:
+        observer (int): The index of the player whose information is used
+        board (Bitboard): The last bitboard given to update, None before the first one
+
+    Methods:
+        update: Bring the candidates up to date with a new bitboard of the same game
+        candidate_ids: Get the candidate tile ids of every tile in the hand of a player
+        temp_candidate_ids: Get the candidate tile ids of the tile just drawn by a player
+        candidate_numbers: Get the candidate numbers of every tile in the hand of a player
+        is_possible: Test if a tile in the hand of a player can have a number
+    """
+
+    def __init__(self, observer: int, board: Bitboard = None) -> None:
+        self.observer = observer
+        self.board = None
+        self._masks = {}  # Candidate tile ids of every tile hidden from the observer
+        self._owners = {}  # The player holding each hidden tile, None while it is a temp tile
+        self._known = 0  # Tile ids the observer can see
+        self._singles = 0  # Tile ids claimed by a hidden tile with a single candidate
+        if board is not None:
+            self.update(board)
+
+    def _reset(self, board: Bitboard) -> None:
+        self.board = Bitboard(
+            board.max_tile_number,
+            (0,) * board.num_players,
+            0,
+            (-1,) * board.num_players,
+            (0,) * board.num_players,
+        )
+        self._masks.clear()
+        self._owners.clear()
+        self._known = 0
+        self._singles = 0
+        self._color_masks = tuple(
+            sum(1 << tile_id for tile_id in range(color, 2 * board.max_tile_number, 2))
+            for color in range(2)
+        )
+
+    def update(self, board: Bitboard) -> None:
+        previous = self.board
+        if (
+            previous is None
+            or previous.max_tile_number != board.max_tile_number
+            or previous.num_players != board.num_players
+            or previous.public & ~board.public
+            or any(hand & ~new_hand for hand, new_hand in zip(previous.hands, board.hands))
+            or any(mask & ~new_mask for mask, new_mask in zip(previous.history, board.history))
+        ):
+            self._reset(board)  # not a continuation of the same game
+            previous = self.board
+        self.board = board
+
+        dirty = set()  # players whose hand order has to be propagated again
+        singles = []  # tile ids to rule out of every other hidden tile
+
+        # tiles becoming visible to the observer
+        temp_tile_id = board.temp_tiles[self.observer]
+        known = board.public | board.hands[self.observer]
+        if temp_tile_id >= 0:
+            known |= 1 << temp_tile_id
+        for tile_id in iter_bits(known & ~self._known):
+            singles.append(tile_id)
+            if tile_id in self._masks:
+                del self._masks[tile_id]
+                owner = self._owners.pop(tile_id)
+                if owner is not None:
+                    dirty.add(owner)
+        self._known = known
+
+        # tiles drawn or placed by the other players
+        for player_index, hand in enumerate(board.hands):
+            if player_index == self.observer:
+                continue
+            if hand != previous.hands[player_index]:
+                dirty.add(player_index)
+            for tile_id in iter_bits(hand & ~known):
+                self._add_hidden_tile(tile_id, player_index)
+            temp_tile_id = board.temp_tiles[player_index]
+            if temp_tile_id >= 0:
+                self._add_hidden_tile(temp_tile_id, None)
+
+        # failed guesses
+        max_tile_number = board.max_tile_number
+        for history, previous_history in zip(board.history, previous.history):
+            for guess_bit in iter_bits(history & ~previous_history):
+                tile_id, number = divmod(guess_bit, max_tile_number)
+                if tile_id in self._masks:
+                    guessed_tile_id = number * 2 + tile_id % 2
+                    if self._remove(tile_id, 1 << guessed_tile_id, dirty):
+                        singles.append(self._masks[tile_id].bit_length() - 1)
+
+        self._propagate(dirty, singles)
+
+    def _add_hidden_tile(self, tile_id: int, owner: int | None) -> None:
+        if tile_id not in self._masks:
+            self._masks[tile_id] = self._color_masks[tile_id % 2] & ~(self._known | self._singles)
+        self._owners[tile_id] = owner
+
+    def _remove(self, tile_id: int, id_mask: int, dirty: set) -> bool:
+        """
+        Remove candidates of a hidden tile, returning True if a single candidate is left
+        """
+        mask = self._masks[tile_id]
+        if mask & id_mask == 0:
+            return False
+        mask &= ~id_mask
+        self._masks[tile_id] = mask
+        if self._owners[tile_id] is not None:
+            dirty.add(self._owners[tile_id])
+        return mask != 0 and mask & (mask - 1) == 0
+
+    def _propagate(self, dirty: set, singles: list) -> None:
+        while dirty or singles:
+            while singles:
+                single_id = singles.pop()
+                single_bit = 1 << single_id
+                if self._singles & single_bit or (
+                    single_id in self._masks and self._masks[single_id] != single_bit
+                ):
+                    continue  # already ruled out, or not claimed by the tile with that id
+                self._singles |= single_bit
+                for tile_id in self._masks:
+                    if self._masks[tile_id] != single_bit and self._remove(
+                        tile_id, single_bit, dirty
+                    ):
+                        singles.append(self._masks[tile_id].bit_length() - 1)
+            if dirty:
+                singles.extend(self._propagate_order(dirty.pop()))
+
+    def _propagate_order(self, player_index: int) -> list[int]:
+        """
+        Narrow the hidden tiles of a hand so that the tile ids increase along the hand, returning
+        the tile ids newly claimed by a single candidate
+        """
+        singles = []
+        hand = list(iter_bits(self.board.hands[player_index]))
+        masks = [self._masks.get(tile_id, 1 << tile_id) for tile_id in hand]
+        lower = 0  # mask of the tile ids at or below the lowest candidate of the previous tile
+        for position, mask in enumerate(masks):
+            masks[position] = mask = mask & ~lower
+            lower = ((mask & -mask) << 1) - 1
+        upper = -1  # mask of the tile ids below the highest candidate of the next tile
+        for position in reversed(range(len(masks))):
+            masks[position] = mask = masks[position] & upper
+            upper = (1 << mask.bit_length() - 1) - 1 if mask else 0
+        for tile_id, mask in zip(hand, masks):
+            if tile_id in self._masks and mask != self._masks[tile_id]:
+                self._masks[tile_id] = mask
+                if mask != 0 and mask & (mask - 1) == 0:
+                    singles.append(mask.bit_length() - 1)
+        return singles
+
+    def candidate_ids(self, player_index: int) -> tuple[int, ...]:
+        """
+        The candidate tile ids of the tiles in the hand of a player, in the order of get_tile_list,
+        where a tile visible to the observer has its own tile id as the single candidate
+        """
+        return tuple(
+            self._masks.get(tile_id, 1 << tile_id)
+            for tile_id in iter_bits(self.board.hands[player_index])
+        )
+
+    def temp_candidate_ids(self, player_index: int) -> int:
+        temp_tile_id = self.board.temp_tiles[player_index]
+        if temp_tile_id < 0:
+            return 0
+        return self._masks.get(temp_tile_id, 1 << temp_tile_id)
+
+    def candidate_numbers(self, player_index: int) -> tuple[int, ...]:
+        """
+        The candidate numbers of the tiles in the hand of a player as masks, where bit number - 1 is
+        set if the tile can have the number
+        """
+        return tuple(
+            id_mask_to_number_mask(id_mask) for id_mask in self.candidate_ids(player_index)
+        )
+
+    def is_possible(self, player_index: int, tile_index: int, number: int) -> bool:
+        return bool(self.candidate_numbers(player_index)[tile_index] >> number - 1 & 1)
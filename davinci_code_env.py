@@ -5,6 +5,8 @@ from gymnasium import spaces
 from gymnasium.envs.registration import register
 
 import game
+import game_array
+from env_stats import StepStats
 
 
 class DavinciCodeEnv(gym.Env):
@@ -67,6 +69,8 @@ class DavinciCodeEnv(gym.Env):
         max_tile_num=11,
         initial_tiles=4,
         render_mode=None,
+        engine="object",
+        collect_stats=False,
     ):
         self._num_players = num_players  # The number of players
         self._current_player_index = initial_player  # The index of the current player
@@ -96,18 +100,35 @@ class DavinciCodeEnv(gym.Env):
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self._render_mode = render_mode
 
+        assert engine in game_array.ENGINES, "Invalid engine"
+        self._engine = engine  # The game engine implementation, object or array backed
+        # The tile features of every tile id while it is private, copied into the observations
+        # of the array engine
+        tile_ids = np.arange(2 * max_tile_num)
+        self._private_tile_features = np.stack(
+            [np.ones_like(tile_ids), tile_ids % 2 + 1, tile_ids // 2 + 1], axis=1
+        ).astype(np.uint8)
+
+        # The time spent in every phase of the resets and steps, None unless collected
+        self.step_stats = StepStats() if collect_stats else None
+
     def _get_obs(self) -> np.ndarray:
         player_obs = np.zeros_like(self._observation_space_nvec, np.uint8)
-        for player_index in range(self._num_players):
-            for tile_index, tile in enumerate(
-                sorted(
-                    list(self._game_host.all_players[player_index].tile_set),
-                    key=lambda x: x.number * 2 + x.color.value,
-                )
-            ):
-                player_obs[player_index, tile_index, 0] = tile.direction.value + 1
-                player_obs[player_index, tile_index, 1] = tile.color.value + 1
-                player_obs[player_index, tile_index, 2] = tile.number
+        if self._engine == "array":
+            # The same tile features, written with array operations on the array engine
+            state = self._game_host.state
+            tile_ids, player_indices, tile_indices = state.hand_arrays(range(self._num_players))
+            tile_features = self._private_tile_features[tile_ids]
+            tile_features[:, 0] += state.direction.view(np.uint8)[tile_ids]
+            player_obs[player_indices, tile_indices] = tile_features
+        else:
+            for player_index in range(self._num_players):
+                for tile_index, tile in enumerate(
+                    self._game_host.all_players[player_index].get_tile_list()
+                ):
+                    player_obs[player_index, tile_index, 0] = tile.direction.value + 1
+                    player_obs[player_index, tile_index, 1] = tile.color.value + 1
+                    player_obs[player_index, tile_index, 2] = tile.number
 
         player_obs = np.roll(
             player_obs, self._current_player_index - 1, axis=0
@@ -144,7 +165,8 @@ class DavinciCodeEnv(gym.Env):
         except IndexError:
             # return penalty
             return 0
-        distance = np.abs(true_number_on_tile - number_on_tile)
+        # an int so a uint8 action does not wrap around
+        distance = np.abs(true_number_on_tile - int(number_on_tile))
         guess_reward = np.float32(
             1 - (np.float32(distance) * 0.2)
         )  # Countinuous reward for guessing around the correct number
@@ -153,17 +175,23 @@ class DavinciCodeEnv(gym.Env):
         return guess_reward + penalty
 
     def _get_info(self, correct_guess: bool = False, invalid_action: bool = False) -> dict:
-        return {
+        info = {
             "current_player_index": self._current_player_index,
             "correct_guess": correct_guess,
             "invalid_action": invalid_action,
         }
+        if self.step_stats is not None:
+            info["step_stats"] = dict(self.step_stats.step_times)
+        return info
 
     def reset(self, seed=None, options=None, new_player_index=None):
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
         # We need the following line to seed self.np_random
         super().reset(seed=seed)
 
-        self._game_host = game.GameHost(
+        self._game_host = game_array.ENGINES[self._engine](
             self._num_players, self._initial_tiles, self._max_tile_num, super().np_random
         )
         self._game_host.init_game()
@@ -175,8 +203,12 @@ class DavinciCodeEnv(gym.Env):
         self._game_host.all_players[self._current_player_index].draw_tile(
             self._game_host.table_tile_set
         )
+        if stats is not None:
+            stats.lap("reset")
 
         observation = self._get_obs()
+        if stats is not None:
+            stats.lap("observation")
         info = self._get_info()
 
         if self._render_mode == "human":
@@ -209,17 +241,26 @@ class DavinciCodeEnv(gym.Env):
 
             return invalid_action, invalid_action_penalty
 
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
+        # clipping the action into range is charged to the guess, so that the invalid action phase
+        # is a single lap
         action = np.copy(action)
         invalid_action, invalid_action_penalty = _normalize_action(action)
 
         target_player_index, tile_index, number_on_tile = action
-        guess_result = False
-        try:
-            guess_result = self._game_host.all_players[self._current_player_index].make_guess(
-                self._game_host.all_players, target_player_index, tile_index, number_on_tile
-            )
-        except ValueError as e:
-            match e.args[0]:
+        error, guess_result = self._game_host.all_players[self._current_player_index].try_guess(
+            self._game_host.all_players,
+            self._current_player_index,
+            target_player_index,
+            tile_index,
+            number_on_tile,
+        )
+        if stats is not None:
+            stats.lap("guess")
+        if error is not None:
+            match error:
                 case game.PlayerTileSet.InvalidActionErrorEnum.TARGET_INDEX_OUT_OF_RANGE:
                     invalid_action_penalty = -1.0
                 case game.PlayerTileSet.InvalidActionErrorEnum.TARGET_ALREADY_LOST:
@@ -230,11 +271,14 @@ class DavinciCodeEnv(gym.Env):
                     invalid_action_penalty = -1.0
                 case game.PlayerTileSet.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC:
                     invalid_action_penalty = -0.2
+                case game.PlayerTileSet.InvalidActionErrorEnum.GUESS_ALREADY_MADE:
+                    invalid_action_penalty = -0.2
                 case _:
-                    raise e
+                    raise ValueError(error)
             invalid_action = True
-            guess_result = False
             # print(f"Invalid action: {e.args[0]}, penalty: {invalid_action_penalty}")
+        if stats is not None:
+            stats.lap("invalid_action", int(invalid_action))
 
         terminated = (
             self._game_host.is_game_over()
@@ -247,6 +291,8 @@ class DavinciCodeEnv(gym.Env):
             invalid_action_penalty,
             guess_result,
         )
+        if stats is not None:
+            stats.lap("reward")
         if not terminated and guess_result == False:
             self._current_player_index = self._game_host.get_next_player_index(
                 self._current_player_index
@@ -257,7 +303,11 @@ class DavinciCodeEnv(gym.Env):
                 )
             except ValueError:
                 pass
+        if stats is not None:
+            stats.lap("turn")
         observation = self._get_obs()
+        if stats is not None:
+            stats.lap("observation")
         info = self._get_info(guess_result, invalid_action)
 
         if self._render_mode == "human":
@@ -274,10 +324,7 @@ class DavinciCodeEnv(gym.Env):
         for player_index in np.roll(np.arange(self._num_players), -self._current_player_index):
             print(f"\nPlayer {player_index+1}'s tiles:")
             for tile_index, tile in enumerate(
-                sorted(
-                    list(self._game_host.all_players[player_index].tile_set),
-                    key=lambda x: x.number * 2 + x.color.value,
-                )
+                self._game_host.all_players[player_index].get_tile_list()
             ):
                 print(f"Tile {tile_index+1}: {tile.direction.name} {tile.color.name} {tile.number}")
         print("----------------")
@@ -1,10 +1,12 @@
 import numpy as np
-from copy import deepcopy
+from bisect import insort
 import gymnasium as gym
 from gymnasium import spaces
 from gymnasium.envs.registration import register
 
 import game
+import game_array
+from env_stats import StepStats
 
 
 def get_original_index(transformed_index: int, current_player_index: int, num_players: int) -> int:
@@ -32,6 +34,8 @@ class DavinciCodeEnv(gym.Env):
         max_tile_num=12,
         initial_tiles=4,
         render_mode=None,
+        engine="object",
+        collect_stats=False,
     ):
         self._num_players = num_players  # The number of players
         self._current_player_index = initial_player  # The index of the current player
@@ -75,25 +79,43 @@ class DavinciCodeEnv(gym.Env):
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self._render_mode = render_mode
 
+        assert engine in game_array.ENGINES, "Invalid engine"
+        self._engine = engine  # The game engine implementation, object or array backed
+
         self._last_action_mask = None
 
+        # The time spent in every phase of the resets and steps, None unless collected
+        self.step_stats = StepStats() if collect_stats else None
+
     def _get_obs(self) -> dict:
+        if self._engine == "array":
+            player_obs = self._get_array_tile_obs()
+        else:
+            player_obs = self._get_tile_obs()
+
+        if self.step_stats is not None:
+            self.step_stats.lap("observation")
+
+        # Generate the action mask
+        action_mask = self._generate_action_mask()
+        self._last_action_mask = action_mask
+        if self.step_stats is not None:
+            self.step_stats.lap("action_mask")
+
+        return {"observation": player_obs, "action_mask": action_mask}
+
+    def _get_tile_obs(self) -> np.ndarray:
         player_obs = np.zeros((2 * self._max_tile_num, 4), dtype=np.uint8)
         tile_count = 0
 
         # Record the tiles in each player's hand
         for player_pos, player_index in enumerate(np.roll(np.arange(self._num_players), -self._current_player_index)):
-            tile_set = deepcopy(self.game_host.all_players[player_index].tile_set)
+            tile_list = list(self.game_host.all_players[player_index].get_tile_list())
             if player_index == self._current_player_index and self.game_host.all_players[player_index].temp_tile is not None:
                 # Record the tile in the current player's hand
-                tile_set.add(self.game_host.all_players[player_index].temp_tile)
+                insort(tile_list, self.game_host.all_players[player_index].temp_tile, key=game.tile_sort_key)
             
-            for tile_index, tile in enumerate(
-                sorted(
-                    list(tile_set),
-                    key=lambda x: x.number * 2 + x.color.value,
-                )
-            ):
+            for tile_index, tile in enumerate(tile_list):
                 player_obs[tile_count, 0] = tile.color.value + 1  # Color: 1 for black, 2 for white
                 player_obs[tile_count, 1] = (
                     tile.number
@@ -113,14 +135,30 @@ class DavinciCodeEnv(gym.Env):
             player_obs[tile_count, 2] = 0  # Player ID: 0 for deck
             player_obs[tile_count, 3] = 0  # Order in hand: 0 for deck
             tile_count += 1
+        return player_obs
 
-        # Generate the action mask
-        action_mask = self._generate_action_mask()
-        self._last_action_mask = action_mask
-
-        return {"observation": player_obs, "action_mask": action_mask}
+    def _get_array_tile_obs(self) -> np.ndarray:
+        # The observation of _get_tile_obs, built with array operations on the array engine
+        state = self.game_host.state
+        player_obs = np.zeros((2 * self._max_tile_num, 4), dtype=np.uint8)
+        player_order = [
+            (self._current_player_index + player_pos) % self._num_players
+            for player_pos in range(self._num_players)
+        ]
+        tile_ids, player_pos, tile_index = state.hand_arrays(
+            player_order, self._current_player_index
+        )
+        tile_count = len(tile_ids)
+        player_obs[:tile_count, 0] = tile_ids % 2 + 1  # Color: 1 for black, 2 for white
+        is_known = (player_pos == 0) | (state.direction[tile_ids] == game_array.PUBLIC)
+        player_obs[:tile_count, 1] = np.where(is_known, tile_ids // 2 + 1, 0)
+        player_obs[:tile_count, 2] = player_pos + 1
+        player_obs[:tile_count, 3] = tile_index + 1
+        return player_obs  # the rows of the deck stay 0
 
     def _generate_action_mask(self) -> np.ndarray:
+        if self._engine == "array":
+            return self._generate_array_action_mask()
         action_mask = np.zeros(
             (self._num_players - 1, 2 * self._max_tile_num, self._max_tile_num), dtype=np.uint8
         )
@@ -143,6 +181,30 @@ class DavinciCodeEnv(gym.Env):
                         action_mask[target_player_index, tile_index, guess - 1] = 0
         return action_mask
 
+    def _generate_array_action_mask(self) -> np.ndarray:
+        # The action mask of _generate_action_mask, built with array operations on the array engine
+        state = self.game_host.state
+        action_mask = np.zeros(
+            (self._num_players - 1, 2 * self._max_tile_num, self._max_tile_num), dtype=np.uint8
+        )
+        target_indices = [
+            get_original_index(
+                target_player_index + 2, self._current_player_index, self._num_players
+            )
+            for target_player_index in range(self._num_players - 1)
+        ]
+        tile_ids, target_pos, tile_index = state.hand_arrays(target_indices)
+        is_alive = np.array(
+            [not self.game_host.all_players[index].is_lose() for index in target_indices]
+        )
+        is_open = is_alive[target_pos] & (state.direction[tile_ids] == game_array.PRIVATE)
+        action_mask[target_pos[is_open], tile_index[is_open]] = 1
+        # Like the loop over history_guesses, which yields the players who made failed guesses on
+        # a tile, clear the number before the index of each of these players
+        guessed, source_indices = state.history[tile_ids].nonzero()
+        action_mask[target_pos[guessed], tile_index[guessed], source_indices - 1] = 0
+        return action_mask
+
     def _is_valid_action(self, target_player_index: int, tile_index: int, tile_number: int) -> bool:
         try:
             original_index = get_original_index(
@@ -162,17 +224,23 @@ class DavinciCodeEnv(gym.Env):
             return False
 
     def _get_info(self, correct_guess: bool = False, invalid_action: bool = False) -> dict:
-        return {
+        info = {
             "current_player_index": self._current_player_index,
             "correct_guess": correct_guess,
             "invalid_action": invalid_action,
         }
+        if self.step_stats is not None:
+            info["step_stats"] = dict(self.step_stats.step_times)
+        return info
 
     def reset(self, seed=None, options=None):
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
         # We need the following line to seed self.np_random
         super().reset(seed=seed)
 
-        self.game_host = game.GameHost(
+        self.game_host = game_array.ENGINES[self._engine](
             self._num_players, self._initial_tiles, self._max_tile_num, super().np_random
         )
         self.game_host.init_game()
@@ -184,6 +252,8 @@ class DavinciCodeEnv(gym.Env):
             self.game_host.table_tile_set,
             direct_draw=True,
         )
+        if stats is not None:
+            stats.lap("reset")
 
         observation = self._get_obs()
         info = self._get_info()
@@ -194,6 +264,9 @@ class DavinciCodeEnv(gym.Env):
         return observation, info
 
     def step(self, action):
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
         target_player_index, tile_index, number_on_tile = action
         guess_result = False
         invalid_action = False
@@ -202,19 +275,23 @@ class DavinciCodeEnv(gym.Env):
             target_player_index + 2, self._current_player_index, self._num_players
         )
 
-        try:
-            guess_result = self.game_host.all_players[self._current_player_index].make_guess(
-                self.game_host.all_players, original_index, tile_index, number_on_tile + 1
-            )
-        except ValueError as e:
-            # print("error", e.args[0])
-            pass
+        error, guess_result = self.game_host.all_players[self._current_player_index].try_guess(
+            self.game_host.all_players,
+            self._current_player_index,
+            original_index,
+            tile_index,
+            number_on_tile + 1,
+        )
+        if stats is not None:
+            stats.lap("guess")
 
         terminated = self.game_host.is_game_over()
         truncated = False
         if self._last_action_mask is not None and self._last_action_mask[target_player_index, tile_index, number_on_tile] == 0:
             invalid_action = True
             truncated = True
+        if stats is not None:
+            stats.lap("invalid_action", int(invalid_action))
 
         # Calculate reward
         if terminated:
@@ -230,13 +307,16 @@ class DavinciCodeEnv(gym.Env):
             # else:
             #     reward = -1  # Penalty for guessing incorrectly
             true_number_on_tile = (
-                self.game_host.all_players[target_player_index].get_tile_list()[tile_index].number
+                self.game_host.all_players[original_index].get_tile_list()[tile_index].number
             )
-            distance = np.abs(true_number_on_tile - number_on_tile)
+            # the action number is 0-based, and an int so a uint8 action does not wrap around
+            distance = np.abs(true_number_on_tile - (int(number_on_tile) + 1))
             reward = np.float32(
                 5 - (np.float32(distance) * 1.0)
             )  # Countinuous reward for guessing around the correct number
             reward = np.clip(reward, -5.0, 5.0)
+        if stats is not None:
+            stats.lap("reward")
 
         if not terminated and guess_result == False:
             self._current_player_index = self.game_host.get_next_player_index(
@@ -248,6 +328,8 @@ class DavinciCodeEnv(gym.Env):
                 )
             except ValueError:
                 pass
+        if stats is not None:
+            stats.lap("turn")
             
         observation = self._get_obs()
         info = self._get_info(guess_result, invalid_action)
@@ -266,10 +348,7 @@ class DavinciCodeEnv(gym.Env):
         for player_index in np.roll(np.arange(self._num_players), -self._current_player_index):
             print(f"\nPlayer {player_index+1}'s tiles:")
             for tile_index, tile in enumerate(
-                sorted(
-                    list(self.game_host.all_players[player_index].tile_set),
-                    key=lambda x: x.number * 2 + x.color.value,
-                )
+                self.game_host.all_players[player_index].get_tile_list()
             ):
                 print(f"Tile {tile_index+1}: {tile.direction.name} {tile.color.name} {tile.number}")
         print("----------------")
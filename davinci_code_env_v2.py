@@ -3,8 +3,118 @@ from copy import deepcopy
 import gymnasium as gym
 from gymnasium import spaces
 from gymnasium.envs.registration import register
+from gymnasium.utils import seeding
+from gymnasium.vector import AutoresetMode
+from gymnasium.vector.utils import batch_space
 
 import game
+import game_array
+import game_vector
+from bitboard import iter_bits
+from env_stats import StepStats
+
+# The encodings of the observations: one float64 or one uint8 per bit, or the bits packed into
+# uint8 with np.packbits
+OBSERVATION_MODES = ("float64", "uint8", "packed")
+# The layouts of the observations: one flat vector, or a dict of views into it
+OBSERVATION_LAYOUTS = ("flat", "dict")
+# The action spaces: one Discrete action per (target, tile, number), or the MultiDiscrete
+# (target, tile, number) factored into its components
+ACTION_MODES = ("flat", "factored")
+
+
+def unpack_observations(observations: np.ndarray, observation_len: int, dtype=np.float32):
+    """
+    Unpack packed observations, one per row of a batch or a single one, into dtype for the model
+
+    Args:
+        observations (np.ndarray): (..., ceil(observation_len / 8)) packed observations, uint8
+        observation_len (int): The number of bits of one observation, observation_space.n of the
+            environment with observation_mode="float64"
+        dtype: The dtype of the unpacked observations
+
+    Returns:
+        np.ndarray: (..., observation_len) the observations, 0 or 1
+    """
+    return np.unpackbits(observations, axis=-1, count=observation_len).astype(dtype, copy=False)
+
+
+def flatten_actions(actions, num_players: int, max_tile_num: int) -> np.ndarray:
+    """
+    Convert factored actions into the flat actions of the Discrete action space
+
+    Args:
+        actions: (..., 3) the factored actions (target, tile, number), one or a batch
+        num_players (int): The number of players
+        max_tile_num (int): The maximum number on the tiles
+
+    Returns:
+        np.ndarray: (...) the flat actions; an action with a component out of range becomes
+            (num_players - 1) * 2 * max_tile_num * max_tile_num, which targets the current player
+            and so is invalid
+    """
+    actions = np.asarray(actions, dtype=np.int64)
+    sizes = np.array([num_players - 1, 2 * max_tile_num, max_tile_num])
+    in_range = ((actions >= 0) & (actions < sizes)).all(axis=-1)
+    flat_actions = (actions[..., 0] * sizes[1] + actions[..., 1]) * sizes[2] + actions[..., 2]
+    return np.where(in_range, flat_actions, np.prod(sizes))
+
+
+def _mask_shapes(num_players: int, max_tile_num: int, action_mode: str) -> dict:
+    # the masks at the end of the observation: the action mask of the flat actions, or the masks
+    # of the targets and of their tiles with a guessable number of the factored actions
+    if action_mode == "factored":
+        return {
+            "target_mask": (num_players - 1,),
+            "tile_mask": (num_players - 1, 2 * max_tile_num),
+        }
+    return {"action_mask": ((num_players - 1) * 2 * max_tile_num * max_tile_num,)}
+
+
+def _split_masks(masks: np.ndarray, mask_shapes: dict) -> dict:
+    # the masks of flat observations, one or a batch, as views into them
+    fields = {}
+    start = 0
+    for name, shape in mask_shapes.items():
+        end = start + int(np.prod(shape))
+        fields[name] = masks[..., start:end].reshape(*masks.shape[:-1], *shape)
+        start = end
+    return fields
+
+
+def _observation_fields(
+    observation: np.ndarray,
+    main_obs_shape: tuple[int, ...],
+    action_mask_start: int,
+    mask_shapes: dict,
+) -> dict:
+    # the parts of flat observations, one or a batch, as views into them
+    main_obs_end = int(np.prod(main_obs_shape))
+    return {
+        "tiles": observation[..., :main_obs_end].reshape(*observation.shape[:-1], *main_obs_shape),
+        "drawn_tile": observation[..., main_obs_end:action_mask_start],
+        **_split_masks(observation[..., action_mask_start:], mask_shapes),
+    }
+
+
+def _env_value(value: np.ndarray | dict, env_index: int) -> np.ndarray | dict:
+    # the value of one sub-environment in a batched value, an array or a dict of them
+    if isinstance(value, dict):
+        return {key: sub_value[env_index] for key, sub_value in value.items()}
+    return value[env_index]
+
+
+def _info_action_mask(masks: dict, action_mask: np.ndarray) -> np.ndarray | dict:
+    # the action mask of the infos: the one of the observation for the flat actions, or the target
+    # and tile masks of the observation with a copy of the numbers guessable on every tile for the
+    # factored actions
+    if "action_mask" in masks:
+        return masks["action_mask"]
+    return {
+        "target": masks["target_mask"],
+        "tile": masks["tile_mask"],
+        "number": action_mask.copy(),
+    }
 
 
 class DavinciCodeEnv(gym.Env):
@@ -17,6 +127,11 @@ class DavinciCodeEnv(gym.Env):
         max_tile_num=12,
         initial_tiles=4,
         render_mode=None,
+        engine="object",
+        observation_mode="float64",
+        observation_layout="flat",
+        collect_stats=False,
+        action_mode="flat",
     ):
         self._num_players = num_players  # The number of players
         self._current_player_index = initial_player  # The index of the current player
@@ -32,109 +147,236 @@ class DavinciCodeEnv(gym.Env):
             (self._num_players - 1) * (2 * self._max_tile_num) * self._max_tile_num
         )
 
-        self.observation_space = spaces.MultiBinary(
-            n=self._num_players * (2 * self._max_tile_num) * self._tile_obs_len  # main obs
+        assert action_mode in ACTION_MODES, "Invalid action_mode"
+        self._action_mode = action_mode
+        # the factored actions keep the masks of the targets and tiles in the observation, which
+        # grow with the players plus the tiles instead of their product with the numbers
+        self._mask_shapes = _mask_shapes(self._num_players, self._max_tile_num, action_mode)
+        self._obs_len = (
+            self._num_players * (2 * self._max_tile_num) * self._tile_obs_len  # main obs
             + self._tile_obs_len  # temp tile obs
-            + self._action_space_len  # action mask
+            + sum(int(np.prod(shape)) for shape in self._mask_shapes.values())  # action masks
         )
-        self.action_space = spaces.Discrete(self._action_space_len)
+        assert observation_mode in OBSERVATION_MODES, "Invalid observation_mode"
+        assert observation_layout in OBSERVATION_LAYOUTS, "Invalid observation_layout"
+        assert observation_layout == "flat" or observation_mode != "packed", "Packed is only flat"
+        self._observation_mode = observation_mode
+        self._observation_layout = observation_layout
+        if observation_mode == "packed":
+            self.observation_space = spaces.Box(0, 255, ((self._obs_len + 7) // 8,), np.uint8)
+        elif observation_layout == "dict":
+            self.observation_space = spaces.Dict(
+                {
+                    "tiles": spaces.MultiBinary(
+                        [self._num_players, 2 * self._max_tile_num, self._tile_obs_len]
+                    ),
+                    "drawn_tile": spaces.MultiBinary(self._tile_obs_len),
+                    **{
+                        name: spaces.MultiBinary(list(shape))
+                        for name, shape in self._mask_shapes.items()
+                    },
+                }
+            )
+        else:
+            self.observation_space = spaces.MultiBinary(n=self._obs_len)
+        if action_mode == "factored":
+            self.action_space = spaces.MultiDiscrete(
+                [self._num_players - 1, 2 * self._max_tile_num, self._max_tile_num]
+            )
+        else:
+            self.action_space = spaces.Discrete(self._action_space_len)
 
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self._render_mode = render_mode
 
+        assert engine in game_array.ENGINES, "Invalid engine"
+        self._engine = engine  # The game engine implementation, object or array backed
+
         self._last_action_mask = None
+        # The random number generator sampling the replacements of invalid actions, derived from
+        # np_random as DavinciCodeVectorEnv derives the one of each sub-environment
+        self._action_rng = None
+        # The time spent in every phase of the resets and steps, None unless collected
+        self.step_stats = StepStats() if collect_stats else None
+
+        # The observation is written into one preallocated buffer, from rows kept up to date with
+        # the events of the game host in seat order and rotated by index when it is built
+        obs_dtype = np.float64 if observation_mode == "float64" else np.uint8
+        self._obs = np.zeros(self._obs_len, dtype=obs_dtype)
+        main_obs_end = self._num_players * (2 * self._max_tile_num) * self._tile_obs_len
+        self._main_obs = self._obs[:main_obs_end].reshape(
+            self._num_players, 2 * self._max_tile_num, self._tile_obs_len
+        )
+        self._temp_tile_obs = self._obs[main_obs_end : main_obs_end + self._tile_obs_len]
+        self._action_mask_start = main_obs_end + self._tile_obs_len
+        action_mask_shape = (self._num_players - 1, 2 * self._max_tile_num, self._max_tile_num)
+        if action_mode == "factored":
+            # the whole action mask is kept out of the observation, which holds its reductions
+            self._action_mask_obs = np.zeros(action_mask_shape, dtype=obs_dtype)
+            masks = _split_masks(self._obs[self._action_mask_start :], self._mask_shapes)
+            self._target_mask_obs = masks["target_mask"]
+            self._tile_mask_obs = masks["tile_mask"]
+        else:
+            self._action_mask_obs = self._obs[self._action_mask_start :].reshape(action_mask_shape)
+        # the rows of every tile id, seen by its owner and by the other players while private
+        tile_ids = np.arange(2 * self._max_tile_num)
+        self._visible_rows = np.zeros((2 * self._max_tile_num, self._tile_obs_len), obs_dtype)
+        self._visible_rows[:, 0] = 1  # tile exists
+        self._visible_rows[tile_ids, 1 + tile_ids % 2] = 1  # dark or light tile
+        self._hidden_rows = self._visible_rows.copy()
+        self._visible_rows[tile_ids, tile_ids // 2 + 4] = 1  # number on the tile
+        self._hidden_rows[:, 3] = 1  # tile is not visible
+        # the tiles of every player in seat order, as seen by the player and by the others
+        self._owner_obs = np.zeros_like(self._main_obs)
+        self._others_obs = np.zeros_like(self._main_obs)
+        self._hand_masks = [0] * self._num_players
+        self._temp_tile_ids = [-1] * self._num_players
+        # for every source player, the numbers still available on the tiles of every player in
+        # seat order: the tile is private and the source player has not guessed the number yet
+        self._guessable = np.zeros(
+            (self._num_players, self._num_players, 2 * self._max_tile_num, self._max_tile_num),
+            obs_dtype,
+        )
+        # the seat order of the players in the observation of every current player
+        self._player_orders = (
+            np.arange(self._num_players)[:, None] + np.arange(self._num_players)
+        ) % self._num_players
 
     def _get_action_mask(self) -> np.ndarray:
-        action_mask = np.zeros(
-            (
-                self._num_players,
-                2 * self._max_tile_num,
-                self._max_tile_num,
-            )
+        # the numbers available to the current player, the other players in seat order after it
+        np.take(
+            self._guessable[self._current_player_index],
+            self._player_orders[self._current_player_index, 1:],
+            axis=0,
+            out=self._action_mask_obs,
         )
-        for player_index, player in enumerate(self.game_host.all_players.copy()):
-            player_tile_list = player.get_tile_list()
-            for tile_index, tile in enumerate(player_tile_list):
-                if tile.direction == game.Tile.Directions.PRIVATE:
-                    action_mask[player_index, tile_index, :] = 1
-                    if self._current_player_index in tile.history_guesses.keys():
-                        action_mask[
-                            player_index,
-                            tile_index,
-                            # list(
-                            #     map(
-                            #         lambda x: x - 1,
-                            #         list(tile.history_guesses[self._current_player_index]),
-                            #     )
-                            # ),
-                            # OR
-                            np.array(list(tile.history_guesses[self._current_player_index])) - 1,
-                        ] = 0
-
-        # roll the current player to the front
-        action_mask = np.roll(action_mask, shift=-self._current_player_index, axis=0)
-        # remove the current player
-        action_mask = action_mask[1:]
-
-        return action_mask.flatten()
-
-    def _get_obs(self) -> dict:
-        # Part1: main observation of tiles of each player
-        def get_tile_obs(tile: game.Tile, force_visible: bool) -> np.ndarray:
-            tile_obs = np.zeros((self._tile_obs_len))
-            if tile is not None:
-                tile_obs[0] = 1  # tile exists
-                if tile.color == game.Tile.Colors.BLACK:
-                    tile_obs[1] = 1  # dark tile
-                    tile_obs[2] = 0
-                else:
-                    tile_obs[1] = 0
-                    tile_obs[2] = 1  # light tile
-
-                if tile.direction == game.Tile.Directions.PUBLIC or force_visible:
-                    tile_obs[tile.number + 3] = 1  # number on the tile
-                else:
-                    tile_obs[3] = 1  # tile is not visible
-            return tile_obs
-
-        main_obs_list = []
-        for player_index, player in enumerate(self.game_host.all_players):
-            player_tile_list = player.get_tile_list()
-            player_obs_list = []
-            for tile in player_tile_list:
-                player_obs_list.append(
-                    get_tile_obs(tile, force_visible=player_index == self._current_player_index)
-                )
-            player_obs = np.array(player_obs_list)
-            player_obs = np.pad(
-                player_obs,
-                pad_width=((0, 2 * self._max_tile_num - player_obs.shape[0]), (0, 0)),
-                mode="constant",
-                constant_values=0,
-            )
-            main_obs_list.append(player_obs)
-        main_obs = np.array(main_obs_list)
-        # roll the current player to the front
-        main_obs = np.roll(main_obs, shift=-self._current_player_index, axis=0)
-
-        # Part2: tile just drawn
-        temp_tile_obs = get_tile_obs(
-            self.game_host.all_players[self._current_player_index].temp_tile, True
+        if self._action_mode == "factored":
+            # the tiles with a guessable number, and the targets with such a tile
+            self._action_mask_obs.max(axis=2, out=self._tile_mask_obs)
+            self._tile_mask_obs.max(axis=1, out=self._target_mask_obs)
+        return self._action_mask_obs.reshape(-1)
+
+    def _get_obs(self) -> np.ndarray | dict:
+        stats = self.step_stats
+        # Part1: action mask
+        self._get_action_mask()
+        if stats is not None:
+            stats.lap("action_mask")
+
+        # Part2: main observation of tiles of each player, the current player first
+        current_player_index = self._current_player_index
+        self._main_obs[0] = self._owner_obs[current_player_index]
+        np.take(
+            self._others_obs,
+            self._player_orders[current_player_index, 1:],
+            axis=0,
+            out=self._main_obs[1:],
         )
 
-        # Part3: action mask
-        action_mask = self._get_action_mask()
-        self._last_action_mask = action_mask
-
-        return np.concatenate([main_obs.flatten(), temp_tile_obs, action_mask])
+        # Part3: tile just drawn
+        temp_tile_id = self._temp_tile_ids[current_player_index]
+        if temp_tile_id >= 0:
+            self._temp_tile_obs[:] = self._visible_rows[temp_tile_id]
+        else:
+            self._temp_tile_obs[:] = 0
+
+        observation = self._format_obs()
+        if stats is not None:
+            stats.lap("observation")
+        return observation
+
+    def _format_obs(self) -> np.ndarray | dict:
+        if self._observation_mode == "packed":
+            observation = np.packbits(self._obs)
+            masks = _split_masks(self._obs[self._action_mask_start :].copy(), self._mask_shapes)
+        elif self._observation_layout == "dict":
+            observation = masks = _observation_fields(
+                self._obs.copy(), self._main_obs.shape, self._action_mask_start, self._mask_shapes
+            )
+        else:
+            observation = self._obs.copy()
+            masks = _split_masks(observation[self._action_mask_start :], self._mask_shapes)
+        self._last_action_mask = _info_action_mask(masks, self._action_mask_obs)
+        return observation
+
+    def _on_game_event(self, event: game.GameEvent) -> None:
+        """
+        Update the rows of the tiles changed by an event of the game host
+        """
+        event_type = event.event_type
+        player_index = event.player_index
+        tile_id = event.tile_id
+        if event_type == game.GameEvent.Types.TILE_DRAWN:
+            self._temp_tile_ids[player_index] = tile_id
+        elif event_type == game.GameEvent.Types.TILE_PLACED:
+            if self._temp_tile_ids[player_index] == tile_id:
+                self._temp_tile_ids[player_index] = -1
+            hand_mask = self._hand_masks[player_index]
+            row = (hand_mask & (1 << tile_id) - 1).bit_count()
+            end = hand_mask.bit_count()
+            self._hand_masks[player_index] = hand_mask | 1 << tile_id
+            for tile_obs, tile_row in (
+                (self._owner_obs, self._visible_rows[tile_id]),
+                (
+                    self._others_obs,
+                    (self._visible_rows if event.public else self._hidden_rows)[tile_id],
+                ),
+            ):
+                tile_obs[player_index, row + 1 : end + 1] = tile_obs[player_index, row:end]
+                tile_obs[player_index, row] = tile_row
+            guessable = self._guessable[:, player_index]
+            guessable[:, row + 1 : end + 1] = guessable[:, row:end]
+            guessable[:, row] = not event.public
+        elif event_type == game.GameEvent.Types.TILE_REVEALED:
+            row = (self._hand_masks[player_index] & (1 << tile_id) - 1).bit_count()
+            self._others_obs[player_index, row] = self._visible_rows[tile_id]
+            self._guessable[:, player_index, row] = 0
+        elif event_type == game.GameEvent.Types.GUESS_FAILED:
+            row = (self._hand_masks[player_index] & (1 << tile_id) - 1).bit_count()
+            self._guessable[event.source_player_index, player_index, row, event.number - 1] = 0
+        elif event_type == game.GameEvent.Types.GAME_RESET:
+            self._reset_tile_obs()
+
+    def _reset_tile_obs(self) -> None:
+        board = self.game_host.get_bitboard()
+        self._owner_obs[:] = 0
+        self._others_obs[:] = 0
+        for player_index, hand_mask in enumerate(board.hands):
+            tile_ids = list(iter_bits(hand_mask))
+            public = [board.public >> tile_id & 1 for tile_id in tile_ids]
+            self._owner_obs[player_index, : len(tile_ids)] = self._visible_rows[tile_ids]
+            self._others_obs[player_index, : len(tile_ids)] = np.where(
+                np.array(public, dtype=bool)[:, None],
+                self._visible_rows[tile_ids],
+                self._hidden_rows[tile_ids],
+            )
+        self._hand_masks = list(board.hands)
+        self._temp_tile_ids = list(board.temp_tiles)
+
+        self._guessable[:] = 0
+        numbers = np.arange(self._max_tile_num)
+        for player_index, hand_mask in enumerate(board.hands):
+            tile_ids = list(iter_bits(hand_mask & ~board.public))
+            rows = [(hand_mask & (1 << tile_id) - 1).bit_count() for tile_id in tile_ids]
+            guess_masks = np.array(
+                [
+                    [board.guesses(source_player_index, tile_id) for tile_id in tile_ids]
+                    for source_player_index in range(self._num_players)
+                ],
+                dtype=np.int64,
+            ).reshape(self._num_players, len(tile_ids))
+            self._guessable[:, player_index, rows] = (guess_masks[:, :, None] >> numbers & 1) == 0
 
     def _get_info(self, correct_guess: bool = False, invalid_action: bool = False) -> dict:
-        return {
+        info = {
             "current_player_index": self._current_player_index,
             "correct_guess": correct_guess,
             "invalid_action": invalid_action,
-            "action_mask": self._get_action_mask(),
+            "action_mask": self._last_action_mask,
         }
+        if self.step_stats is not None:
+            info["step_stats"] = dict(self.step_stats.step_times)
+        return info
 
     def _get_reward(self, correct_guess: bool, invalid_action: bool):
         won = (
@@ -152,12 +394,20 @@ class DavinciCodeEnv(gym.Env):
             return 0
 
     def reset(self, seed=None, options=None):
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
         # We need the following line to seed self.np_random
         super().reset(seed=seed)
+        if seed is not None or self._action_rng is None:
+            self._action_rng = np.random.default_rng(
+                self.np_random.bit_generator.seed_seq.spawn(1)[0]
+            )
 
-        self.game_host = game.GameHost(
+        self.game_host = game_array.ENGINES[self._engine](
             self._num_players, self._initial_tiles, self._max_tile_num, super().np_random
         )
+        self.game_host.subscribe(self._on_game_event)
         self.game_host.init_game()
         self._current_player_index = 0
 
@@ -167,6 +417,8 @@ class DavinciCodeEnv(gym.Env):
             self.game_host.table_tile_set,
             direct_draw=True,
         )
+        if stats is not None:
+            stats.lap("reset")
 
         observation = self._get_obs()
         info = self._get_info()
@@ -176,7 +428,7 @@ class DavinciCodeEnv(gym.Env):
 
         return observation, info
 
-    def step(self, action: int):
+    def step(self, action: int | np.ndarray):
         def map_action(action: int):
             # action mapping
             action_copy = deepcopy(action)
@@ -193,38 +445,29 @@ class DavinciCodeEnv(gym.Env):
             ) % self._num_players
             return action_player_index, action_tile_index, action_number_on_tile
 
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
+        if self._action_mode == "factored":
+            action = int(flatten_actions(action, self._num_players, self._max_tile_num))
         action_player_index, action_tile_index, action_number_on_tile = map_action(action)
         # print(f"mapped action: {map_action(action)}")
 
-        correct_guess = False
-        invalid_action = False
-
-        try:
-            correct_guess = self.game_host.all_players[self._current_player_index].make_guess(
-                self.game_host.all_players,
-                self._current_player_index,
-                action_player_index,
-                action_tile_index,
-                action_number_on_tile,
-            )
-        except ValueError as e:
-            if e.args[0] in [
-                game.PlayerTileSet.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC,
-                game.PlayerTileSet.InvalidActionErrorEnum.TARGET_ALREADY_LOST,
-                game.PlayerTileSet.InvalidActionErrorEnum.GUESS_ALREADY_MADE,
-                game.PlayerTileSet.InvalidActionErrorEnum.TILE_INDEX_OUT_OF_RANGE,
-                game.PlayerTileSet.InvalidActionErrorEnum.TILE_NUMBER_OUT_OF_RANGE,
-                game.PlayerTileSet.InvalidActionErrorEnum.TARGET_INDEX_OUT_OF_RANGE,
-            ]:
-                # an invalid guess was made; give a penalty.
-                invalid_action = True
-            else:
-                # there is a logic error.
-                raise
+        error, correct_guess = self.game_host.all_players[self._current_player_index].try_guess(
+            self.game_host.all_players,
+            self._current_player_index,
+            action_player_index,
+            action_tile_index,
+            action_number_on_tile,
+        )
+        # an invalid guess was made; give a penalty.
+        invalid_action = error is not None
+        if stats is not None:
+            stats.lap("guess")
 
         # random sample when invalid action
         if invalid_action:
-            action = self.action_space.sample(self._last_action_mask.astype(np.int8))
+            action = self._action_rng.choice(np.flatnonzero(self._action_mask_obs))
             action_player_index, action_tile_index, action_number_on_tile = map_action(action)
             correct_guess = self.game_host.all_players[self._current_player_index].make_guess(
                 self.game_host.all_players,
@@ -233,6 +476,8 @@ class DavinciCodeEnv(gym.Env):
                 action_tile_index,
                 action_number_on_tile,
             )
+            if stats is not None:
+                stats.lap("invalid_action")
 
         # modify current player
         if not correct_guess:
@@ -245,11 +490,15 @@ class DavinciCodeEnv(gym.Env):
                 )
             except:
                 pass
+        if stats is not None:
+            stats.lap("turn")
 
         terminated = self.game_host.is_game_over()
         truncated = False
 
         reward = self._get_reward(correct_guess, invalid_action)
+        if stats is not None:
+            stats.lap("reward")
         observation = self._get_obs()
         info = self._get_info(correct_guess, invalid_action)
 
@@ -264,17 +513,338 @@ class DavinciCodeEnv(gym.Env):
         for player_index in np.roll(np.arange(self._num_players), -self._current_player_index):
             print(f"\nPlayer {player_index+1}'s tiles:")
             for tile_index, tile in enumerate(
-                sorted(
-                    list(self.game_host.all_players[player_index].tile_set),
-                    key=lambda x: x.number * 2 + x.color.value,
-                )
+                self.game_host.all_players[player_index].get_tile_list()
             ):
                 print(f"Tile {tile_index+1}: {tile.direction.name} {tile.color.name} {tile.number}")
         print("----------------")
 
 
+class DavinciCodeVectorEnv(gym.vector.VectorEnv):
+    """
+    This class steps num_envs DavinciCode-v2 games in one call, on a VectorGameHost, and returns
+    the stacked observations, rewards, terminations, truncations and infos of all of them
+
+    Sub-environment i reset with seed + i plays the same game as DavinciCodeEnv reset with that
+    seed: each one has its own random number generator shuffling its draw piles, and another one
+    derived from it sampling the replacements of its invalid actions. Finished games are reset
+    automatically, on the next step by default like SyncVectorEnv or on the same step. The engine
+    argument of DavinciCodeEnv is accepted and validated so that the same keyword arguments make
+    both, but it is otherwise ignored: the games are always played on the VectorGameHost.
+
+    Attributes:
+        num_envs (int): The number of sub-environments
+        game_host (game_vector.VectorGameHost): The games of the sub-environments
+        single_observation_space (spaces.Space): The observation space of one game
+        single_action_space (spaces.Space): The action space of one game, Discrete or
+            MultiDiscrete with the factored actions
+        observation_space (spaces.Space): The batched observation space
+        action_space (spaces.Space): The batched action space
+        step_stats (StepStats): The time spent in every phase of the batched resets and steps,
+            None unless collect_stats is set
+
+    Methods:
+        reset: Reset all the games
+        step: Play one action in every game, resetting the finished ones
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(
+        self,
+        num_envs: int = 1,
+        num_players: int = 3,
+        initial_player: int = 0,
+        max_tile_num: int = 12,
+        initial_tiles: int = 4,
+        render_mode=None,
+        max_episode_steps: int = None,
+        autoreset_mode: AutoresetMode = AutoresetMode.NEXT_STEP,
+        observation_mode: str = "float64",
+        observation_layout: str = "flat",
+        collect_stats: bool = False,
+        action_mode: str = "flat",
+        engine: str = "object",
+    ):
+        assert render_mode is None, "The vector environment does not render"
+        assert autoreset_mode in (AutoresetMode.NEXT_STEP, AutoresetMode.SAME_STEP)
+        single_env = DavinciCodeEnv(
+            num_players,
+            initial_player,
+            max_tile_num,
+            initial_tiles,
+            observation_mode=observation_mode,
+            observation_layout=observation_layout,
+            action_mode=action_mode,
+            engine=engine,  # only validated, the games are always played on a VectorGameHost
+        )
+        self.num_envs = num_envs
+        self._num_players = num_players
+        self._max_tile_num = max_tile_num
+        self._max_episode_steps = max_episode_steps
+        self.metadata = {**self.metadata, "autoreset_mode": autoreset_mode}
+
+        self.single_observation_space = single_env.observation_space
+        self.single_action_space = single_env.action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self.game_host = game_vector.VectorGameHost(
+            num_envs, num_players, initial_tiles, max_tile_num
+        )
+        self._env_rngs = [None] * num_envs  # shuffle the draw piles of each sub-environment
+        self._action_rngs = [None] * num_envs  # sample the replacements of invalid actions
+        self._elapsed_steps = np.zeros(num_envs, dtype=np.int64)
+        self._autoreset_envs = np.zeros(num_envs, dtype=bool)
+        # The time spent in every phase over the whole batch, every phase counted once per game
+        self.step_stats = StepStats() if collect_stats else None
+
+        # The observations of all the games are written into one preallocated buffer, laid out
+        # as the observation of DavinciCodeEnv
+        self._observation_mode = observation_mode
+        self._observation_layout = observation_layout
+        self._obs = np.zeros((num_envs, single_env._obs_len), dtype=single_env._obs.dtype)
+        tile_obs_len = single_env._tile_obs_len
+        main_obs_end = num_players * (2 * max_tile_num) * tile_obs_len
+        self._main_obs = self._obs[:, :main_obs_end].reshape(
+            num_envs, num_players, 2 * max_tile_num, tile_obs_len
+        )
+        self._temp_tile_obs = self._obs[:, main_obs_end : main_obs_end + tile_obs_len]
+        self._action_mask_start = single_env._action_mask_start
+        self._action_mode = action_mode
+        self._mask_shapes = single_env._mask_shapes
+        action_mask_shape = (num_envs, num_players - 1, 2 * max_tile_num, max_tile_num)
+        if action_mode == "factored":
+            self._action_mask_obs = np.zeros(action_mask_shape, dtype=self._obs.dtype)
+            masks = _split_masks(self._obs[:, self._action_mask_start :], self._mask_shapes)
+            self._target_mask_obs = masks["target_mask"]
+            self._tile_mask_obs = masks["tile_mask"]
+        else:
+            self._action_mask_obs = self._obs[:, self._action_mask_start :].reshape(
+                action_mask_shape
+            )
+        self._visible_rows = single_env._visible_rows
+        self._hidden_rows = single_env._hidden_rows
+        self._numbers = np.arange(1, max_tile_num + 1)
+        self._last_action_masks = None
+
+    def _seed(self, seed) -> None:
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + env_index for env_index in range(self.num_envs)]
+        assert len(seed) == self.num_envs, "Give one seed per sub-environment"
+        for env_index, env_seed in enumerate(seed):
+            if env_seed is not None or self._env_rngs[env_index] is None:
+                env_rng, _ = seeding.np_random(env_seed)
+                self._env_rngs[env_index] = env_rng
+                self._action_rngs[env_index] = np.random.default_rng(
+                    env_rng.bit_generator.seed_seq.spawn(1)[0]
+                )
+
+    def _reset_games(self, mask: np.ndarray) -> None:
+        # the games are dealt from the draw piles of DavinciCodeEnv, and player 0 places a
+        # first tile directly as its reset does
+        env_indices = np.flatnonzero(mask)
+        draw_piles = [
+            self._env_rngs[env_index].permutation(2 * self._max_tile_num)
+            for env_index in env_indices
+        ]
+        self.game_host.init_game(mask, np.array(draw_piles).reshape(len(env_indices), -1))
+        self.game_host.draw_tile(mask)
+        self.game_host.end_turn(mask)
+        self._elapsed_steps[mask] = 0
+        if self.step_stats is not None:
+            self.step_stats.lap("reset", len(env_indices))
+
+    def _get_obs(self) -> np.ndarray | dict:
+        stats = self.step_stats
+        game_host = self.game_host
+        owner = game_host.owner
+        current_player = game_host.current_player.astype(np.int64)
+
+        # the seat and row of every tile in a hand; the row of a tile is its rank among the tiles of
+        # its owner, which are sorted by tile id
+        owned = owner[:, :, None] == np.arange(self._num_players)
+        ranks = np.cumsum(owned, axis=1) - 1
+        env_indices, tile_ids = np.nonzero(owner >= 0)
+        players = owner[env_indices, tile_ids]
+        rows = ranks[env_indices, tile_ids, players]
+        seats = (players - current_player[env_indices]) % self._num_players
+        public = game_host.direction[env_indices, tile_ids] == game_array.PUBLIC
+
+        # Part1: action mask, the numbers the current player has not guessed yet on the private
+        # tiles of the other players
+        guessable = (seats > 0) & ~public
+        guessable_envs = env_indices[guessable]
+        history = game_host.history[
+            guessable_envs, tile_ids[guessable], current_player[guessable_envs]
+        ]
+        self._action_mask_obs[:] = 0
+        self._action_mask_obs[guessable_envs, seats[guessable] - 1, rows[guessable]] = (
+            history[:, None].astype(np.int64) >> self._numbers & 1
+        ) == 0
+        if self._action_mode == "factored":
+            self._action_mask_obs.max(axis=3, out=self._tile_mask_obs)
+            self._tile_mask_obs.max(axis=2, out=self._target_mask_obs)
+        if stats is not None:
+            stats.lap("action_mask", self.num_envs)
+
+        # Part2: main observation of tiles of each player, the current player first
+        self._main_obs[:] = 0
+        self._main_obs[env_indices, seats, rows] = np.where(
+            ((seats == 0) | public)[:, None],
+            self._visible_rows[tile_ids],
+            self._hidden_rows[tile_ids],
+        )
+
+        # Part3: tile just drawn
+        temp_tile_ids = game_host.temp_tile[np.arange(self.num_envs), current_player]
+        self._temp_tile_obs[:] = 0
+        has_temp_tile = temp_tile_ids >= 0
+        self._temp_tile_obs[has_temp_tile] = self._visible_rows[temp_tile_ids[has_temp_tile]]
+
+        observation = self._format_obs()
+        if stats is not None:
+            stats.lap("observation", self.num_envs)
+        return observation
+
+    def _format_obs(self) -> np.ndarray | dict:
+        if self._observation_mode == "packed":
+            observation = np.packbits(self._obs, axis=1)
+            masks = _split_masks(self._obs[:, self._action_mask_start :].copy(), self._mask_shapes)
+        elif self._observation_layout == "dict":
+            observation = masks = _observation_fields(
+                self._obs.copy(),
+                self._main_obs.shape[1:],
+                self._action_mask_start,
+                self._mask_shapes,
+            )
+        else:
+            observation = self._obs.copy()
+            masks = _split_masks(observation[:, self._action_mask_start :], self._mask_shapes)
+        self._last_action_masks = _info_action_mask(masks, self._action_mask_obs)
+        return observation
+
+    def _get_infos(self, correct_guess: np.ndarray, invalid_action: np.ndarray) -> dict:
+        all_envs = np.ones(self.num_envs, dtype=bool)
+        infos = {
+            "current_player_index": self.game_host.current_player.astype(np.int64),
+            "correct_guess": correct_guess,
+            "invalid_action": invalid_action,
+            "action_mask": self._last_action_masks,
+            "_current_player_index": all_envs,
+            "_correct_guess": all_envs.copy(),
+            "_invalid_action": all_envs.copy(),
+            "_action_mask": all_envs.copy(),
+        }
+        if self.step_stats is not None:
+            # the times of the batch shared evenly, so they add up over the games like the times
+            # of single environments
+            infos["step_stats"] = {
+                phase: np.full(self.num_envs, step_time // self.num_envs)
+                for phase, step_time in self.step_stats.step_times.items()
+            }
+            infos["_step_stats"] = all_envs.copy()
+        return infos
+
+    def _map_actions(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        actions = np.asarray(actions, dtype=np.int64)
+        target_index = actions // ((2 * self._max_tile_num) * self._max_tile_num)
+        tile_index = actions % ((2 * self._max_tile_num) * self._max_tile_num) // self._max_tile_num
+        tile_number = actions % self._max_tile_num + 1
+        # restore the target player's index; undo the rolling.
+        target_index = (target_index + self.game_host.current_player + 1) % self._num_players
+        return target_index, tile_index, tile_number
+
+    def reset(self, seed=None, options=None):
+        if self.step_stats is not None:
+            self.step_stats.start()
+        self._seed(seed)
+        self._reset_games(np.ones(self.num_envs, dtype=bool))
+        self._autoreset_envs[:] = False
+        observation = self._get_obs()
+        no_envs = np.zeros(self.num_envs, dtype=bool)
+        return observation, self._get_infos(no_envs, no_envs.copy())
+
+    def step(self, actions):
+        stats = self.step_stats
+        if stats is not None:
+            stats.start()
+        game_host = self.game_host
+        playing = ~self._autoreset_envs & ~game_host.is_game_over()
+        if self._action_mode == "factored":
+            actions = flatten_actions(actions, self._num_players, self._max_tile_num)
+
+        error, correct_guess = game_host.try_guess(*self._map_actions(actions), playing)
+        # an invalid guess was made; give a penalty and play a random valid action instead
+        invalid_action = playing & (error != game_vector.NO_ERROR)
+        if stats is not None:
+            stats.lap("guess", np.count_nonzero(playing))
+        if invalid_action.any():
+            replacements = np.zeros(self.num_envs, dtype=np.int64)
+            for env_index in np.flatnonzero(invalid_action):
+                valid_actions = np.flatnonzero(self._action_mask_obs[env_index])
+                replacements[env_index] = self._action_rngs[env_index].choice(valid_actions)
+            _, replacement_correct = game_host.try_guess(
+                *self._map_actions(replacements), invalid_action
+            )
+            correct_guess = np.where(invalid_action, replacement_correct, correct_guess)
+            if stats is not None:
+                stats.lap("invalid_action", np.count_nonzero(invalid_action))
+
+        # after a wrong guess the turn passes to the next player, who draws a tile
+        passed = playing & ~correct_guess
+        game_host.next_player(passed)
+        game_host.draw_tile(passed)
+        if stats is not None:
+            stats.lap("turn", np.count_nonzero(playing))
+
+        terminated = playing & game_host.is_game_over()
+        self._elapsed_steps[playing] += 1
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self._max_episode_steps is not None:
+            truncated = playing & (self._elapsed_steps >= self._max_episode_steps)
+
+        alive = game_host.hidden_count[np.arange(self.num_envs), game_host.current_player] > 0
+        won = terminated & alive
+        reward = np.select([invalid_action, won, correct_guess], [-0.1, 5.0, 1.0], 0.0)
+        if stats is not None:
+            stats.lap("reward", self.num_envs)
+
+        if self.metadata["autoreset_mode"] == AutoresetMode.NEXT_STEP:
+            if self._autoreset_envs.any():
+                self._reset_games(self._autoreset_envs)
+            observation = self._get_obs()
+            infos = self._get_infos(correct_guess, invalid_action)
+            self._autoreset_envs = terminated | truncated
+        else:
+            done = terminated | truncated
+            observation = self._get_obs()
+            infos = self._get_infos(correct_guess, invalid_action)
+            if done.any():
+                final_obs = np.full(self.num_envs, None, dtype=object)
+                final_info = {}
+                for env_index in np.flatnonzero(done):
+                    final_obs[env_index] = _env_value(observation, env_index)
+                    self._add_info(
+                        final_info,
+                        {key: _env_value(infos[key], env_index) for key in infos if key[0] != "_"},
+                        env_index,
+                    )
+                self._reset_games(done)
+                observation = self._get_obs()
+                infos = self._get_infos(
+                    np.where(done, False, correct_guess), np.where(done, False, invalid_action)
+                )
+                infos.update(
+                    final_obs=final_obs, _final_obs=done, final_info=final_info, _final_info=done
+                )
+        return observation, reward, terminated, truncated, infos
+
+
 register(
     id="DavinciCode-v2",
     entry_point="davinci_code_env_v2:DavinciCodeEnv",
+    vector_entry_point="davinci_code_env_v2:DavinciCodeVectorEnv",
     max_episode_steps=300,
 )
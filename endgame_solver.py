@@ -0,0 +1,165 @@
+import numpy as np
+
+from bitboard import Bitboard, iter_bits
+from mcts_agent import board_candidate_guesses
+from posterior import AssignmentCounter
+from sampler import assignment_bitboards
+
+
+class EndgameResult:
+    """
+    This class holds the solution of an endgame for the player taking the turn
+
+    Attributes:
+        player_index (int): The index of the player taking the turn
+        value (float): The probability that the player wins, over the worlds consistent with what
+            the player has seen, when every player plays the solution
+        best_guess (tuple[int, int, int]): The guess (target_index, tile_index, tile_number) with the
+            highest value
+        guess_values (dict[tuple[int, int, int], float]): The probability that the player wins
+            after every guess
+    """
+
+    def __init__(
+        self,
+        player_index: int,
+        value: float,
+        best_guess: tuple[int, int, int],
+        guess_values: dict[tuple[int, int, int], float],
+    ) -> None:
+        self.player_index = player_index
+        self.value = value
+        self.best_guess = best_guess
+        self.guess_values = guess_values
+
+
+class EndgameSolver:
+    """
+    This class solves the game exactly once few tiles are still hidden
+
+    A decision node is the information state of the player taking the turn: the player chooses the
+    guess of candidate_guesses with the highest probability of winning, averaged over the worlds
+    consistent with what the player has seen, all equally likely as in Posterior. A chance node is
+    the tile drawn from the table after a wrong guess, every tile left being equally likely. The
+    values of the players in complete game states are kept in a transposition table keyed by the
+    state hash of the bitboard and the player taking the turn, and the values of the guesses of an
+    information state in a second one keyed by its public hash.
+
+    Attributes:
+        hidden_tile_threshold (int): The largest number of tiles that are not public, in the hands,
+            drawn or on the table, for which the solver takes over
+        table_size (int): The number of entries of each transposition table before it is cleared
+
+    Methods:
+        is_endgame: Test if a game state is small enough to be solved
+        solve: Get the value and the best guess of the player taking the turn
+        select_action: Get the best guess (target_index, tile_index, tile_number) of a player
+        clear_cache: Empty the transposition tables
+    """
+
+    def __init__(self, hidden_tile_threshold: int = 6, table_size: int = 1 << 20) -> None:
+        self.hidden_tile_threshold = hidden_tile_threshold
+        self.table_size = table_size
+        self._values = {}  # (state hash, player taking the turn) -> value of every player
+        self._guess_values = {}  # (public hash, player taking the turn) -> {guess: value}
+
+    def clear_cache(self) -> None:
+        self._values.clear()
+        self._guess_values.clear()
+
+    def is_endgame(self, board: Bitboard) -> bool:
+        hidden_tile_count = 2 * board.max_tile_number - board.public.bit_count()
+        return hidden_tile_count <= self.hidden_tile_threshold
+
+    def solve(self, board: Bitboard, player_index: int) -> EndgameResult:
+        """
+        Solve the game state board, e.g. game_host.get_bitboard(), where player_index has to guess
+        next. Only what player_index can see of board is used
+        """
+        assert not board.is_game_over(), "The game is over"
+        if len(self._values) > self.table_size or len(self._guess_values) > self.table_size:
+            self.clear_cache()
+        guess_values = self._get_guess_values(board, player_index)
+        best_guess = max(guess_values, key=guess_values.get)
+        return EndgameResult(
+            player_index, float(guess_values[best_guess]), best_guess, guess_values
+        )
+
+    def select_action(self, game_host, player_index: int) -> tuple[int, int, int]:
+        return self.solve(game_host.get_bitboard(), player_index).best_guess
+
+    def _get_guess_values(self, board: Bitboard, player_index: int) -> dict:
+        key = (board.public_hash(player_index), player_index)
+        if key not in self._guess_values:
+            counter = AssignmentCounter(board, player_index)
+            worlds = assignment_bitboards(counter, counter.assignments())
+            guess_values = {}
+            for guess in board_candidate_guesses(board, player_index):
+                guess_values[guess] = sum(
+                    self._get_guess_value(world, player_index, guess)[player_index]
+                    for world in worlds
+                ) / len(worlds)
+            self._guess_values[key] = guess_values
+        return self._guess_values[key]
+
+    def _get_value(self, board: Bitboard, player_index: int) -> np.ndarray:
+        """
+        The probability that every player wins from a complete game state
+        """
+        key = (board.state_hash(), player_index)
+        if key not in self._values:
+            if board.is_game_over():
+                value = np.zeros(board.num_players)
+                value[[bool(board.hidden(index)) for index in range(board.num_players)]] = 1.0
+            else:
+                guess_values = self._get_guess_values(board, player_index)
+                value = self._get_guess_value(
+                    board, player_index, max(guess_values, key=guess_values.get)
+                )
+            self._values[key] = value
+        return self._values[key]
+
+    def _get_guess_value(self, board: Bitboard, player_index: int, guess: tuple) -> np.ndarray:
+        """
+        The probability that every player wins after a guess in a complete game state, following
+        the turn flow of the environments
+        """
+        target_index, tile_index, tile_number = guess
+        max_tile_number = board.max_tile_number
+        tile_id = list(iter_bits(board.hands[target_index]))[tile_index]
+        if tile_id // 2 + 1 == tile_number:
+            next_board = Bitboard(
+                max_tile_number,
+                board.hands,
+                board.public | 1 << tile_id,
+                board.temp_tiles,
+                board.history,
+            )
+            return self._get_value(next_board, player_index)
+
+        hands = list(board.hands)
+        public = board.public
+        temp_tiles = list(board.temp_tiles)
+        history = list(board.history)
+        history[player_index] |= 1 << tile_id * max_tile_number + tile_number - 1
+        temp_tile_id = temp_tiles[player_index]
+        if temp_tile_id >= 0:
+            hands[player_index] |= 1 << temp_tile_id
+            public |= 1 << temp_tile_id
+            temp_tiles[player_index] = -1
+        next_player_index = player_index
+        while True:  # the next player who has not lost
+            next_player_index = (next_player_index + 1) % board.num_players
+            if hands[next_player_index] & ~public:
+                break
+        next_board = Bitboard(max_tile_number, hands, public, temp_tiles, history)
+        table = list(iter_bits(next_board.table))
+        if not table:
+            return self._get_value(next_board, next_player_index)
+        value = np.zeros(board.num_players)
+        for drawn_tile_id in table:
+            temp_tiles[next_player_index] = drawn_tile_id
+            value += self._get_value(
+                Bitboard(max_tile_number, hands, public, temp_tiles, history), next_player_index
+            )
+        return value / len(table)
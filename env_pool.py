@@ -0,0 +1,356 @@
+import multiprocessing
+import traceback
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode
+from gymnasium.vector.utils import batch_space
+
+# The commands sent to the workers, one byte each
+_RESET = b"r"
+_STEP = b"s"
+_CLOSE = b"c"
+# The replies of the workers
+_DONE = b"d"
+_ERROR = b"e"
+
+_ALIGNMENT = 64  # byte alignment of the arrays in the shared buffer
+
+
+class _SharedLayout:
+    """
+    This class lays out named NumPy arrays in one shared byte buffer, so a worker process can view
+    the same arrays from the buffer it inherits
+
+    Attributes:
+        fields (dict[str, tuple[tuple[int, ...], np.dtype, int]]): The shape, dtype and byte offset
+            of every array
+        size (int): The number of bytes of the buffer
+    """
+
+    def __init__(self) -> None:
+        self.fields = {}
+        self.size = 0
+
+    def add(self, name: str, shape: tuple[int, ...], dtype) -> None:
+        dtype = np.dtype(dtype)
+        self.fields[name] = (shape, dtype, self.size)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        self.size += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    def views(self, buffer) -> dict[str, np.ndarray]:
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        return {
+            name: data[offset : offset + int(np.prod(shape, dtype=np.int64)) * dtype.itemsize]
+            .view(dtype)
+            .reshape(shape)
+            for name, (shape, dtype, offset) in self.fields.items()
+        }
+
+
+def _observation_names(observation) -> dict:
+    # the Dict observation of v1 has one array per key, the flat observation of v2 only one
+    if isinstance(observation, dict):
+        return {key: f"observation/{key}" for key in observation}
+    return {None: "observation"}
+
+
+def _info_value(value) -> np.ndarray | None:
+    # the info values kept in the shared buffer: numbers, booleans and arrays
+    if isinstance(value, (bool, int, float, np.number, np.bool_, np.ndarray)):
+        return np.asarray(value)
+    return None
+
+
+def _info_fields(info: dict) -> dict[tuple[str, str | None], np.ndarray]:
+    # the info values kept in the shared buffer by key, and sub key for dicts of them like the
+    # step_stats of the environments
+    fields = {}
+    for key, value in info.items():
+        if isinstance(value, dict):
+            sub_values = {sub_key: _info_value(sub_value) for sub_key, sub_value in value.items()}
+            if all(sub_value is not None for sub_value in sub_values.values()):
+                fields.update(
+                    ((key, sub_key), sub_value) for sub_key, sub_value in sub_values.items()
+                )
+        elif _info_value(value) is not None:
+            fields[key, None] = _info_value(value)
+    return fields
+
+
+def _info_name(key: str, sub_key: str | None) -> str:
+    return f"info/{key}" if sub_key is None else f"info/{key}/{sub_key}"
+
+
+class EnvPool(gym.vector.VectorEnv):
+    """
+    This class steps num_envs copies of a DavinciCode environment in num_workers processes. Every
+    worker owns a contiguous slice of the environments and writes their observations, rewards,
+    terminations, truncations, actions masks and other numeric infos straight into arrays in shared
+    memory, so a batched step only sends one command byte to every worker and waits for one byte
+    back, without pickling anything
+
+    The workers step environments registered with a vector_entry_point, like DavinciCode-v2, with
+    the native batched environment of their slice, and the others one by one. Finished episodes are
+    reset on the next step, and environment i reset with seed + i plays the same game as a single
+    environment reset with that seed. The errors raised in the workers, while building the
+    environments or stepping them, are raised again as a RuntimeError with their traceback.
+
+    Attributes:
+        num_envs (int): The number of environments
+        num_workers (int): The number of worker processes
+        single_observation_space (spaces.Space): The observation space of one environment
+        single_action_space (spaces.Space): The action space of one environment
+        observation_space (spaces.Space): The batched observation space
+        action_space (spaces.Space): The batched action space
+
+    Methods:
+        reset: Reset all the environments
+        step: Play one action in every environment, resetting the finished ones
+        close: Stop the worker processes
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(
+        self,
+        env_id: str,
+        num_envs: int,
+        num_workers: int = None,
+        copy: bool = True,
+        use_vector_entry_point: bool = True,
+        context: str = None,
+        **env_kwargs,
+    ) -> None:
+        spec = gym.spec(env_id)
+        self.num_envs = num_envs
+        self.num_workers = min(num_workers or multiprocessing.cpu_count(), num_envs)
+        self._copy = copy
+        self.closed = False
+
+        # the layout of the shared arrays follows what one environment actually returns
+        probe_env = gym.make(spec, **env_kwargs)
+        self.single_observation_space = probe_env.observation_space
+        self.single_action_space = probe_env.action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        observation, info = probe_env.reset(seed=0)
+        probe_env.close()
+
+        layout = _SharedLayout()
+        self._observation_names = _observation_names(observation)
+        for key, name in self._observation_names.items():
+            value = np.asarray(observation if key is None else observation[key])
+            layout.add(name, (num_envs, *value.shape), value.dtype)
+        info_fields = _info_fields(info)
+        for (key, sub_key), value in info_fields.items():
+            layout.add(_info_name(key, sub_key), (num_envs, *value.shape), value.dtype)
+        self._info_fields = list(info_fields)
+        self._info_keys = list(dict.fromkeys(key for key, _ in info_fields))
+        for key in self._info_keys:
+            layout.add(f"info/_{key}", (num_envs,), bool)
+        layout.add("action", self.action_space.shape, self.action_space.dtype)
+        layout.add("reward", (num_envs,), np.float64)
+        layout.add("terminated", (num_envs,), bool)
+        layout.add("truncated", (num_envs,), bool)
+        layout.add("seed", (num_envs,), np.int64)
+        layout.add("seeded", (num_envs,), bool)
+
+        ctx = multiprocessing.get_context(context)
+        self._buffer = ctx.RawArray("B", layout.size)
+        self._arrays = layout.views(self._buffer)
+
+        use_vector_entry_point = use_vector_entry_point and spec.vector_entry_point is not None
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).astype(int)
+        self._connections = []
+        self._processes = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent_connection, worker_connection = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    spec,
+                    env_kwargs,
+                    int(start),
+                    int(stop),
+                    use_vector_entry_point,
+                    layout,
+                    self._buffer,
+                    self._observation_names,
+                    self._info_fields,
+                    worker_connection,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+        try:
+            self._receive()  # every worker replies once its environments are built
+        except RuntimeError:
+            self.close_extras()
+            raise
+
+    def _run(self, command: bytes) -> None:
+        for connection in self._connections:
+            connection.send_bytes(command)
+        self._receive()
+
+    def _receive(self) -> None:
+        errors = []
+        for connection in self._connections:
+            reply = connection.recv_bytes()
+            if reply[:1] == _ERROR:
+                errors.append(reply[1:].decode())
+        if errors:
+            raise RuntimeError("An environment worker failed:\n" + "\n".join(errors))
+
+    def _get_results(self) -> tuple:
+        def get(name):
+            return self._arrays[name].copy() if self._copy else self._arrays[name]
+
+        if None in self._observation_names:
+            observation = get(self._observation_names[None])
+        else:
+            observation = {key: get(name) for key, name in self._observation_names.items()}
+        infos = {}
+        for key, sub_key in self._info_fields:
+            if sub_key is None:
+                infos[key] = get(_info_name(key, sub_key))
+            else:
+                infos.setdefault(key, {})[sub_key] = get(_info_name(key, sub_key))
+        for key in self._info_keys:
+            infos[f"_{key}"] = get(f"info/_{key}")
+        return observation, infos
+
+    def reset(self, seed=None, options=None):
+        if seed is None:
+            self._arrays["seeded"][:] = False
+        else:
+            if isinstance(seed, int):
+                seed = [seed + env_index for env_index in range(self.num_envs)]
+            assert len(seed) == self.num_envs, "Give one seed per environment"
+            self._arrays["seeded"][:] = [env_seed is not None for env_seed in seed]
+            self._arrays["seed"][:] = [0 if env_seed is None else env_seed for env_seed in seed]
+        self._run(_RESET)
+        return self._get_results()
+
+    def step(self, actions):
+        self._arrays["action"][:] = actions
+        self._run(_STEP)
+        observation, infos = self._get_results()
+        rewards = self._arrays["reward"].copy()
+        terminations = self._arrays["terminated"].copy()
+        truncations = self._arrays["truncated"].copy()
+        return observation, rewards, terminations, truncations, infos
+
+    def close_extras(self, **kwargs) -> None:
+        for connection, process in zip(self._connections, self._processes):
+            if process.is_alive():
+                try:
+                    connection.send_bytes(_CLOSE)
+                except (BrokenPipeError, OSError):
+                    pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            connection.close()
+
+
+def _worker(
+    spec,
+    env_kwargs: dict,
+    start: int,
+    stop: int,
+    use_vector_entry_point: bool,
+    layout: _SharedLayout,
+    buffer,
+    observation_names: dict,
+    info_fields: list[tuple[str, str | None]],
+    connection,
+) -> None:
+    arrays = layout.views(buffer)
+    observations = {key: arrays[name][start:stop] for key, name in observation_names.items()}
+    infos = {field: arrays[_info_name(*field)][start:stop] for field in info_fields}
+    info_masks = {key: arrays[f"info/_{key}"][start:stop] for key, _ in info_fields}
+    actions = arrays["action"][start:stop]
+    rewards = arrays["reward"][start:stop]
+    terminations = arrays["terminated"][start:stop]
+    truncations = arrays["truncated"][start:stop]
+    seeds = arrays["seed"][start:stop]
+    seeded = arrays["seeded"][start:stop]
+    autoreset = np.zeros(stop - start, dtype=bool)
+
+    def write(env_slice, observation, info) -> None:
+        for key, array in observations.items():
+            array[env_slice] = observation if key is None else observation[key]
+        for key, info_mask in info_masks.items():
+            info_mask[env_slice] = info[f"_{key}"] if use_vector_entry_point else key in info
+        for (key, sub_key), array in infos.items():
+            if key in info:
+                array[env_slice] = info[key] if sub_key is None else info[key][sub_key]
+
+    envs = []
+    try:
+        # built in the try so that their errors are sent back like the errors of the steps
+        if use_vector_entry_point:
+            envs = gym.make_vec(
+                spec, num_envs=stop - start, vectorization_mode="vector_entry_point", **env_kwargs
+            )
+        else:
+            for _ in range(start, stop):
+                envs.append(gym.make(spec, **env_kwargs))
+        discrete_actions = not use_vector_entry_point and isinstance(
+            envs[0].action_space, spaces.Discrete
+        )
+        connection.send_bytes(_DONE)
+
+        while True:
+            command = connection.recv_bytes()
+            if command == _CLOSE:
+                break
+            if use_vector_entry_point:
+                if command == _RESET:
+                    env_seeds = [
+                        int(seed) if is_seeded else None for seed, is_seeded in zip(seeds, seeded)
+                    ]
+                    observation, info = envs.reset(seed=env_seeds)
+                else:
+                    observation, rewards[:], terminations[:], truncations[:], info = envs.step(
+                        actions
+                    )
+                write(slice(None), observation, info)
+            elif command == _RESET:
+                for env_index, env in enumerate(envs):
+                    seed = int(seeds[env_index]) if seeded[env_index] else None
+                    write(env_index, *env.reset(seed=seed))
+                autoreset[:] = False
+                rewards[:] = 0
+                terminations[:] = False
+                truncations[:] = False
+            else:
+                for env_index, env in enumerate(envs):
+                    if autoreset[env_index]:  # the finished episodes are reset on the next step
+                        observation, info = env.reset()
+                        reward, terminated, truncated = 0, False, False
+                    else:
+                        action = actions[env_index]
+                        observation, reward, terminated, truncated, info = env.step(
+                            int(action) if discrete_actions else action
+                        )
+                    write(env_index, observation, info)
+                    rewards[env_index] = reward
+                    terminations[env_index] = terminated
+                    truncations[env_index] = truncated
+                    autoreset[env_index] = terminated or truncated
+            connection.send_bytes(_DONE)
+    except Exception:
+        connection.send_bytes(_ERROR + traceback.format_exc().encode())
+    finally:
+        if isinstance(envs, list):  # also when the vector environment failed to build
+            for env in envs:
+                env.close()
+        else:
+            envs.close()
+        connection.close()
@@ -0,0 +1,79 @@
+import time
+
+# The phases of the resets and steps of the environments
+PHASES = ("reset", "guess", "invalid_action", "turn", "reward", "observation", "action_mask")
+
+
+class StepStats:
+    """
+    This class accumulates the time an environment spends in every phase of its resets and steps,
+    and the number of times every phase ran
+
+    The environment calls start at the beginning of a reset or step and lap at the end of every
+    phase, which charges the time since the previous call to that phase. A phase that ran for
+    nothing, like a check of the action that found it valid, can be charged without being counted.
+
+    Attributes:
+        counts (dict[str, int]): The number of times every phase ran
+        times (dict[str, int]): The total time of every phase, in nanoseconds
+        step_times (dict[str, int]): The time of every phase in the last reset or step, in
+            nanoseconds
+
+    Methods:
+        start: Start timing a reset or step
+        lap: Charge the time since the previous call to a phase
+        merge: Sum the statistics of several environments
+        summary: Get the counts, total and mean times of the phases
+        clear: Forget all the statistics
+    """
+
+    def __init__(self) -> None:
+        self.counts = dict.fromkeys(PHASES, 0)
+        self.times = dict.fromkeys(PHASES, 0)
+        self.step_times = dict.fromkeys(PHASES, 0)
+        self._last_time = 0
+
+    def start(self) -> None:
+        step_times = self.step_times
+        for phase in step_times:
+            step_times[phase] = 0
+        self._last_time = time.perf_counter_ns()
+
+    def lap(self, phase: str, count: int = 1) -> None:
+        now = time.perf_counter_ns()
+        elapsed = now - self._last_time
+        self._last_time = now
+        self.times[phase] += elapsed
+        self.counts[phase] += count
+        self.step_times[phase] += elapsed
+
+    @classmethod
+    def merge(cls, *all_stats: "StepStats") -> "StepStats":
+        """
+        The sum of the statistics of several environments, e.g. the sub-environments of a vector
+        environment
+        """
+        merged = cls()
+        for stats in all_stats:
+            for phase in PHASES:
+                merged.counts[phase] += stats.counts[phase]
+                merged.times[phase] += stats.times[phase]
+        return merged
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Returns:
+            dict[str, dict[str, float]]: For every phase, its count, its total time in seconds and
+                its mean time per run in microseconds
+        """
+        return {
+            phase: {
+                "count": self.counts[phase],
+                "total_s": self.times[phase] / 1e9,
+                "mean_us": self.times[phase] / 1e3 / max(self.counts[phase], 1),
+            }
+            for phase in PHASES
+        }
+
+    def clear(self) -> None:
+        self.__init__()
@@ -1,8 +1,26 @@
 from enum import Enum
+from bisect import bisect_left, insort
 import numpy as np
 
+from bitboard import Bitboard, iter_bits
+
 
 class Tile:
+    """
+    This class is a tile of the game
+
+    The colour and the direction are stored as their small int values, and the failed guesses as
+    one bitmask per source player, where bit number is set if the player guessed that number
+
+    Attributes:
+        color (Colors): The colour of the tile
+        number (int): The number on the tile
+        direction (Directions): Whether the number is visible to every player
+        tile_id (int): (number - 1) * 2 + color, unique for each tile and ordered like the tiles
+        guess_masks (list[int]): The bitmask of failed guesses of each source player
+        history_guesses (dict[int, set[int]]): The failed guesses of each source player
+    """
+
     class Colors(Enum):
         BLACK = 0
         WHITE = 1
@@ -11,11 +29,37 @@ class Tile:
         PRIVATE = 0
         PUBLIC = 1
 
+    __slots__ = ("number", "tile_id", "color_value", "direction_value", "guess_masks", "_owner")
+
     def __init__(self, color: Colors, number: int, direction=Directions.PRIVATE) -> None:
-        self.color = color
         self.number = number
-        self.direction = direction
-        self.history_guesses = {}  # Dictionary to store historical guesses
+        self.color_value = color.value
+        self.tile_id = (number - 1) * 2 + color.value
+        self._owner = None  # The PlayerTileSet holding the tile in its tile_set
+        self.direction_value = direction.value
+        self.guess_masks = []
+
+    @property
+    def color(self) -> Colors:
+        return _COLORS[self.color_value]
+
+    @property
+    def direction(self) -> Directions:
+        return _DIRECTIONS[self.direction_value]
+
+    @direction.setter
+    def direction(self, direction: Directions) -> None:
+        self.direction_value = direction.value
+        if self._owner is not None:
+            self._owner._update_tile_direction(self)
+
+    @property
+    def history_guesses(self) -> dict:
+        return {
+            source_player_index: set(iter_bits(guess_mask))
+            for source_player_index, guess_mask in enumerate(self.guess_masks)
+            if guess_mask
+        }
 
     def __str__(self) -> str:
         return f"Color: {self.color.name}, Number: {self.number}, Direction: {self.direction.name}"
@@ -26,51 +70,199 @@ class Tile:
         else:
             return f"Color: {self.color.name}, Number: {self.number}"
 
+    def get_guess_mask(self, source_player_index: int) -> int:
+        if source_player_index < len(self.guess_masks):
+            return self.guess_masks[source_player_index]
+        return 0
+
     def add_history_guess(self, source_player_index: int, number_guessed: int) -> None:
-        if source_player_index not in self.history_guesses.keys():
-            self.history_guesses[source_player_index] = set()
-        self.history_guesses[source_player_index].add(number_guessed)
+        number_guessed = int(number_guessed)
+        if source_player_index >= len(self.guess_masks):
+            self.guess_masks.extend([0] * (source_player_index + 1 - len(self.guess_masks)))
+        self.guess_masks[source_player_index] |= 1 << number_guessed
+        if self._owner is not None:
+            self._owner._update_tile_history(self, source_player_index, number_guessed)
 
     def is_guessed(self, source_player_index: int, number_guessed: int) -> bool:
-        if (
-            source_player_index in self.history_guesses.keys()
-            and number_guessed in self.history_guesses[source_player_index]
-        ):
-            return True
-        return False
+        try:
+            return self.guess_masks[source_player_index] >> int(number_guessed) & 1 == 1
+        except IndexError:
+            return False
+
+
+_COLORS = tuple(Tile.Colors)
+_DIRECTIONS = tuple(Tile.Directions)
+PRIVATE = Tile.Directions.PRIVATE.value
+PUBLIC = Tile.Directions.PUBLIC.value
+
+
+def tile_sort_key(tile: Tile) -> int:
+    return tile.number * 2 + tile.color.value
+
+
+def copy_generator(np_random: np.random.Generator) -> np.random.Generator:
+    """
+    Get an independent random number generator continuing from the state of np_random
+    """
+    bit_generator = type(np_random.bit_generator)(0)
+    bit_generator.state = np_random.bit_generator.state
+    return np.random.Generator(bit_generator)
 
 
 class TableTileSet:
     """
     This class is used to store the tiles that are on the table (not yet drawn by players)
 
+    The tiles are shuffled once into a draw pile when the table is set up, so a draw only pops the
+    top of the pile, which gives the same uniform draws as picking a random tile every time
+
     Attributes:
         max_tile_number (int): The maximum number a tile can have
+        np_random (np.random.Generator): The random number generator shuffling the draw pile
         tile_set (set[Tile]): The set of tiles on the table
 
     Methods:
         init_tile_set: Set the tile_set into two sets, one black and one white, with tile numbers ranging from 0 to MAX_TILE_NUMBER
+        get_tile_list: Get the sorted tuple of tiles
+        get_draw_pile: Get the tile ids of the tiles in drawing order
+        draw_tile: Take the top tile of the draw pile off the table
+        remove_tile: Take a tile off the table
     """
 
-    def __init__(self, max_tile_number: int) -> None:
+    def __init__(self, max_tile_number: int, np_random: np.random.Generator = None) -> None:
         assert max_tile_number and max_tile_number > 0, "Invalid max_tile_number"
         self.max_tile_number = max_tile_number
+        self.np_random = np_random if np_random else np.random.default_rng()
         self.tile_set = set()
-
-    def init_tile_set(self) -> None:
-        for color in Tile.Colors:
-            for number in range(1, self.max_tile_number + 1):
-                tile = Tile(color, number)
-                self.tile_set.add(tile)
-
-    def get_tile_list(self) -> list[set]:
-        return sorted(list(self.tile_set), key=lambda x: x.number * 2 + x.color.value)
+        self._draw_pile = []  # The tiles of tile_set, the next tile to draw last
+        self._tile_list_view = ()  # Cached sorted tuple of tile_set
+
+    def init_tile_set(self, draw_pile: tuple[int, ...] = None) -> None:
+        tiles = [
+            Tile(color, number)
+            for number in range(1, self.max_tile_number + 1)
+            for color in Tile.Colors
+        ]  # in tile id order
+        self._set_tiles(tiles, draw_pile)
+
+    def get_tile_list(self) -> tuple[Tile, ...]:
+        if self._tile_list_view is None:
+            self._tile_list_view = tuple(sorted(self.tile_set, key=tile_sort_key))
+        return self._tile_list_view
+
+    def get_draw_pile(self) -> tuple[int, ...]:
+        return tuple(tile.tile_id for tile in reversed(self._draw_pile))
+
+    def draw_tile(self) -> Tile:
+        if len(self._draw_pile) == 0:
+            raise ValueError("Empty table error")
+        tile = self._draw_pile.pop()
+        self.tile_set.remove(tile)
+        self._tile_list_view = None
+        return tile
+
+    def remove_tile(self, tile: Tile) -> None:
+        self.tile_set.remove(tile)
+        self._draw_pile.remove(tile)
+        self._tile_list_view = None
+
+    def _set_tiles(self, tiles: list[Tile], draw_pile: tuple[int, ...] = None) -> None:
+        """
+        Put the tiles onto the table, stacked in the order of the tile ids in draw_pile if it is
+        given and shuffled with np_random otherwise
+        """
+        self.tile_set = set(tiles)
+        if draw_pile is None:
+            self._draw_pile = [tiles[index] for index in self.np_random.permutation(len(tiles))]
+        else:
+            tiles_by_id = {tile.tile_id: tile for tile in tiles}
+            assert sorted(draw_pile) == sorted(tiles_by_id), "Invalid draw_pile"
+            self._draw_pile = [tiles_by_id[tile_id] for tile_id in draw_pile]
+        self._draw_pile.reverse()
+        self._tile_list_view = None
 
     def __str__(self) -> str:
         table_tile_set_str = "".join([str(tile) + ",\n" for tile in self.tile_set])
         return f"TableTileSet: \n({table_tile_set_str})"
 
 
+class PlayerRing:
+    """
+    This class keeps the players still in the game in a circular doubly linked list in seat order
+
+    Attributes:
+        num_players (int): The number of seats
+        next_index (list[int]): The seat of the next player still in the game, -1 if out
+        prev_index (list[int]): The seat of the previous player still in the game, -1 if out
+
+    Methods:
+        clear: Remove every player
+        add: Put a player back into the ring at their seat
+        remove: Take a player out of the ring
+        get_next: Get the player after a player still in the game
+        copy: Get an independent copy of the ring
+    """
+
+    def __init__(self, num_players: int) -> None:
+        self.num_players = num_players
+        self.next_index = [-1] * num_players
+        self.prev_index = [-1] * num_players
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, player_index: int) -> bool:
+        return self.next_index[player_index] >= 0
+
+    def __iter__(self):
+        return (index for index in range(self.num_players) if self.next_index[index] >= 0)
+
+    def clear(self) -> None:
+        self.next_index = [-1] * self.num_players
+        self.prev_index = [-1] * self.num_players
+        self._count = 0
+
+    def add(self, player_index: int) -> None:
+        if player_index in self:
+            return
+        if self._count == 0:
+            prev_index = next_index = player_index
+        else:
+            prev_index = (player_index - 1) % self.num_players
+            while prev_index not in self:
+                prev_index = (prev_index - 1) % self.num_players
+            next_index = self.next_index[prev_index]
+        self.next_index[prev_index] = player_index
+        self.prev_index[next_index] = player_index
+        self.next_index[player_index] = next_index
+        self.prev_index[player_index] = prev_index
+        self._count += 1
+
+    def remove(self, player_index: int) -> None:
+        if player_index not in self:
+            return
+        next_index = self.next_index[player_index]
+        prev_index = self.prev_index[player_index]
+        self.next_index[prev_index] = next_index
+        self.prev_index[next_index] = prev_index
+        self.next_index[player_index] = self.prev_index[player_index] = -1
+        self._count -= 1
+
+    def get_next(self, player_index: int) -> int:
+        if player_index not in self:
+            raise ValueError(f"{player_index} is not in the ring")
+        return self.next_index[player_index]
+
+    def copy(self) -> "PlayerRing":
+        ring = PlayerRing.__new__(PlayerRing)
+        ring.num_players = self.num_players
+        ring.next_index = self.next_index.copy()
+        ring.prev_index = self.prev_index.copy()
+        ring._count = self._count
+        return ring
+
+
 class PlayerTileSet:
     """
     This class is used to store the tiles that are owned by the player and perform actions to the tiles
@@ -80,15 +272,23 @@ class PlayerTileSet:
         np_random (np.random.Generator): The random number generator
         tile_set (set[Tile]): The set of tiles owned by the player
         temp_tile (Tile): The tile just drawn by the player and not yet placed into the tile set
+        player_index (int): The index of the player in the GameHost, None if not hosted
+        hand_mask (int): The bitmask of tile ids in the tile_set
+        hidden_mask (int): The bitmask of tile ids of the private tiles in the tile_set
+        history_masks (dict[int, int]): For each source player, the bitmask of failed guesses on the
+            tiles in the tile_set, in the layout of Bitboard.history
 
     Methods:
         init_tile_set: Set the tile_set empty
-        get_tile_list: Get the sorted list of tiles
+        get_tile_list: Get the sorted tuple of tiles, cached until the tile_set changes
         draw_tile: Draw a tile and set it the temp_tile if direct_draw = False (by default), draw a tile and put it directly into the tile_set if direct_draw = True
         make_guess: Make a guess on one of the private tiles owned by other player(s)
+        try_guess: Make a guess and return the reason of an invalid guess instead of raising it
         verify_guess: Verify the guess made by other players
+        try_verify_guess: Verify a guess and return the reason of an invalid guess instead of raising it
         end_turn: The player decide to end their's turn actively
         is_lose: Test if the player loses the game
+        get_hidden_tile_count: Get the number of private tiles in the tile_set
     """
 
     class InvalidActionErrorEnum(Enum):
@@ -104,24 +304,85 @@ class PlayerTileSet:
         self.max_tile_number = max_tile_number
         self.np_random = np_random if np_random else np.random.default_rng()
         self.tile_set = set()
+        self._tile_list = []  # The tiles of tile_set, kept sorted by tile_sort_key
+        self._tile_list_view = ()  # Cached read-only copy of _tile_list
         self.temp_tile = None
+        self.player_index = None
+        self._host = None  # The GameHost notified when the number of private tiles changes
+        self.hand_mask = 0
+        self.hidden_mask = 0
+        self.history_masks = {}
 
     def init_tile_set(self) -> None:
+        for tile in self.tile_set:
+            tile._owner = None
         self.tile_set.clear()
+        self._tile_list.clear()
+        self._tile_list_view = ()
+        self.hand_mask = 0
+        self._set_hidden_mask(0)
+        self.history_masks.clear()
+
+    def _set_tiles(self, tile_list: list[Tile], temp_tile: Tile = None) -> None:
+        self.init_tile_set()
+        self.tile_set.update(tile_list)
+        self._tile_list = sorted(tile_list, key=tile_sort_key)
+        self._tile_list_view = None
+        hidden_mask = 0
+        for tile in tile_list:
+            tile._owner = self
+            self.hand_mask |= 1 << tile.tile_id
+            if tile.direction_value == PRIVATE:
+                hidden_mask |= 1 << tile.tile_id
+        self._set_hidden_mask(hidden_mask)
+        self.temp_tile = temp_tile
+
+    def _add_tile(self, tile: Tile) -> None:
+        self.tile_set.add(tile)
+        insort(self._tile_list, tile, key=tile_sort_key)
+        self._tile_list_view = None
+        tile._owner = self
+        self.hand_mask |= 1 << tile.tile_id
+        self._update_tile_direction(tile)
+
+    def _update_tile_direction(self, tile: Tile) -> None:
+        if tile.direction_value == PRIVATE:
+            self._set_hidden_mask(self.hidden_mask | 1 << tile.tile_id)
+        else:
+            self._set_hidden_mask(self.hidden_mask & ~(1 << tile.tile_id))
+
+    def _set_hidden_mask(self, hidden_mask: int) -> None:
+        if hidden_mask != self.hidden_mask:
+            self.hidden_mask = hidden_mask
+            if self._host is not None:
+                self._host._update_hidden_tile_count(self.player_index, hidden_mask.bit_count())
+
+    def _update_tile_history(self, tile: Tile, source_player_index: int, number: int) -> None:
+        guess_bit = 1 << tile.tile_id * self.max_tile_number + number - 1
+        self.history_masks[source_player_index] = (
+            self.history_masks.get(source_player_index, 0) | guess_bit
+        )
 
-    def get_tile_list(self) -> list[Tile]:
-        return sorted(list(self.tile_set), key=lambda x: x.number * 2 + x.color.value)
+    def get_tile_list(self) -> tuple[Tile, ...]:
+        if self._tile_list_view is None:
+            self._tile_list_view = tuple(self._tile_list)
+        return self._tile_list_view
 
     def draw_tile(self, table_tile_set, direct_draw=False) -> None:
-        if len(table_tile_set.tile_set) == 0:
-            raise ValueError("Empty table error")
+        tile = table_tile_set.draw_tile()
+        if direct_draw:
+            self._add_tile(tile)
         else:
-            tile = self.np_random.choice(table_tile_set.get_tile_list())
-            if direct_draw:
-                self.tile_set.add(tile)
-            else:
-                self.temp_tile = tile
-            table_tile_set.tile_set.remove(tile)
+            self.temp_tile = tile
+        if self._host is not None:
+            if self._host._subscribers:
+                self._host._publish(GameEvent.Types.TILE_DRAWN, self.player_index, tile.tile_id)
+                if direct_draw:
+                    self._host._publish(
+                        GameEvent.Types.TILE_PLACED, self.player_index, tile.tile_id
+                    )
+            if self._host.recorder is not None:
+                self._host.recorder.record_draw(self.player_index, direct_draw)
 
     def make_guess(
         self,
@@ -131,47 +392,194 @@ class PlayerTileSet:
         tile_index: int,
         tile_number: int,
     ) -> bool:
+        error, correct_guess = self.try_guess(
+            all_players, source_player_index, target_index, tile_index, tile_number
+        )
+        if error is not None:
+            raise ValueError(error)
+        return correct_guess
+
+    def try_guess(
+        self,
+        all_players: list,
+        source_player_index: int,
+        target_index: int,
+        tile_index: int,
+        tile_number: int,
+    ) -> tuple[InvalidActionErrorEnum | None, bool]:
+        """
+        Same as make_guess, but return the reason of an invalid guess instead of raising it
+
+        Returns:
+            tuple[InvalidActionErrorEnum | None, bool]: The reason why the guess is invalid or None
+                if it is valid, and whether the guess is right
+        """
         if target_index >= len(all_players) or target_index < 0:
-            raise ValueError(self.InvalidActionErrorEnum.TARGET_INDEX_OUT_OF_RANGE)
-        if target_index == all_players.index(self) or all_players[target_index].is_lose():
-            raise ValueError(self.InvalidActionErrorEnum.TARGET_ALREADY_LOST)
+            return self.InvalidActionErrorEnum.TARGET_INDEX_OUT_OF_RANGE, False
+        if target_index == self._get_index(all_players) or all_players[target_index].is_lose():
+            return self.InvalidActionErrorEnum.TARGET_ALREADY_LOST, False
         if tile_number < 1 or tile_number > self.max_tile_number:
-            raise ValueError(self.InvalidActionErrorEnum.TILE_NUMBER_OUT_OF_RANGE)
+            return self.InvalidActionErrorEnum.TILE_NUMBER_OUT_OF_RANGE, False
         guessTarget = all_players[target_index]
         if tile_index < 0 or tile_index >= len(guessTarget.get_tile_list()):
-            raise ValueError(self.InvalidActionErrorEnum.TILE_INDEX_OUT_OF_RANGE)
-        elif guessTarget.get_tile_list()[tile_index].direction == Tile.Directions.PUBLIC:
-            raise ValueError(self.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC)
-        elif guessTarget.verify_guess(source_player_index, tile_index, tile_number):
-            return True  # right guess
-        else:
+            return self.InvalidActionErrorEnum.TILE_INDEX_OUT_OF_RANGE, False
+        error, correct_guess = guessTarget.try_verify_guess(
+            source_player_index, tile_index, tile_number
+        )
+        temp_tile = self.temp_tile
+        if error is None and not correct_guess:
             if self.temp_tile != None:
                 self.temp_tile.direction = Tile.Directions.PUBLIC
-                self.tile_set.add(self.temp_tile)
+                self._add_tile(self.temp_tile)
                 self.temp_tile = None
-            return False  # wrong guess
+        if error is None and self._host is not None:
+            if self._host._subscribers:
+                tile_id = guessTarget.get_tile_list()[tile_index].tile_id
+                self._host._publish_guess(
+                    source_player_index,
+                    target_index,
+                    tile_id,
+                    tile_number,
+                    correct_guess,
+                    -1 if temp_tile is None else temp_tile.tile_id,
+                )
+            if self._host.recorder is not None:
+                self._host.recorder.record_guess(
+                    source_player_index, target_index, tile_index, tile_number, correct_guess
+                )
+        return error, correct_guess
 
     def verify_guess(self, source_player_index: int, tile_index: int, tile_number: int) -> bool:
+        error, correct_guess = self.try_verify_guess(source_player_index, tile_index, tile_number)
+        if error is not None:
+            raise ValueError(error)
+        return correct_guess
+
+    def try_verify_guess(
+        self, source_player_index: int, tile_index: int, tile_number: int
+    ) -> tuple[InvalidActionErrorEnum | None, bool]:
         tile = self.get_tile_list()[tile_index]
-        if tile.direction == Tile.Directions.PUBLIC:
-            raise ValueError(self.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC)
+        if tile.direction_value == PUBLIC:
+            return self.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC, False
         if tile.is_guessed(source_player_index, tile_number):
-            raise ValueError(self.InvalidActionErrorEnum.GUESS_ALREADY_MADE)
+            return self.InvalidActionErrorEnum.GUESS_ALREADY_MADE, False
         if tile.number == tile_number:
             tile.direction = Tile.Directions.PUBLIC
-            return True
+            return None, True
         else:
             tile.add_history_guess(source_player_index, tile_number)  # Add the guess to the history
-            return False
+            return None, False
 
     def end_turn(self) -> None:
+        temp_tile = self.temp_tile
         if self.temp_tile != None:
             self.temp_tile.direction = Tile.Directions.PRIVATE
-            self.tile_set.add(self.temp_tile)
+            self._add_tile(self.temp_tile)
             self.temp_tile = None
+        if self._host is not None:
+            if self._host._subscribers:
+                if temp_tile is not None:
+                    self._host._publish(
+                        GameEvent.Types.TILE_PLACED, self.player_index, temp_tile.tile_id
+                    )
+                self._host._publish_turn_passed(self.player_index)
+            if self._host.recorder is not None:
+                self._host.recorder.record_end_turn(self.player_index)
 
     def is_lose(self) -> bool:
-        return not any(tile.direction == Tile.Directions.PRIVATE for tile in self.tile_set)
+        return self.hidden_mask == 0
+
+    def get_hidden_tile_count(self) -> int:
+        return self.hidden_mask.bit_count()
+
+    def _get_index(self, all_players: list) -> int:
+        if self.player_index is not None and all_players[self.player_index] is self:
+            return self.player_index
+        return all_players.index(self)
+
+
+class GameSnapshot:
+    """
+    This class is an immutable copy of a game state, which can be restored into any game host with
+    the same number of players and max_tile_number
+
+    Attributes:
+        bitboard (Bitboard): The owner, direction and guess history of every tile
+        rng_state (dict): The state of the bit generator of np_random
+        draw_pile (tuple[int]): The tile ids of the table in drawing order, None if unknown, in
+            which case the table is shuffled again on restore
+    """
+
+    __slots__ = ("_bitboard", "rng_state", "_draw_pile")
+
+    def __init__(self, bitboard: Bitboard, rng_state: dict, draw_pile: tuple = None) -> None:
+        self._bitboard = bitboard
+        self.rng_state = rng_state
+        self._draw_pile = draw_pile
+
+    @property
+    def bitboard(self) -> Bitboard:
+        return self._bitboard
+
+    @property
+    def draw_pile(self) -> tuple[int, ...] | None:
+        return self._draw_pile
+
+
+class GameEvent:
+    """
+    This class is an event published by a game host to its subscribers when the game changes
+
+    Attributes:
+        event_type (GameEvent.Types): What happened
+        player_index (int): The player whose tiles changed, or who takes the turn for TURN_PASSED
+        tile_id (int): The tile concerned, -1 if there is none
+        source_player_index (int): The player who guessed for GUESS_FAILED and TILE_REVEALED, or who
+            ended the turn for TURN_PASSED, -1 otherwise
+        number (int): The number guessed for GUESS_FAILED and TILE_REVEALED, 0 otherwise
+        public (bool): Whether the tile is public for TILE_PLACED
+    """
+
+    class Types(Enum):
+        GAME_RESET = 0  # the whole state was replaced, by init_game or restore
+        TILE_DRAWN = 1  # a tile was taken off the table by player_index
+        TILE_PLACED = 2  # a tile was put into the hand of player_index
+        GUESS_FAILED = 3  # a wrong guess was made on a tile of player_index
+        TILE_REVEALED = 4  # a right guess made a tile of player_index public
+        PLAYER_ELIMINATED = 5  # player_index has no private tile left
+        TURN_PASSED = 6  # source_player_index ended the turn and player_index takes it
+
+    __slots__ = (
+        "event_type",
+        "player_index",
+        "tile_id",
+        "source_player_index",
+        "number",
+        "public",
+    )
+
+    def __init__(
+        self,
+        event_type: Types,
+        player_index: int,
+        tile_id: int = -1,
+        source_player_index: int = -1,
+        number: int = 0,
+        public: bool = False,
+    ) -> None:
+        self.event_type = event_type
+        self.player_index = player_index
+        self.tile_id = tile_id
+        self.source_player_index = source_player_index
+        self.number = number
+        self.public = public
+
+    def __repr__(self) -> str:
+        return (
+            f"GameEvent({self.event_type.name}, player_index={self.player_index}, "
+            f"tile_id={self.tile_id}, source_player_index={self.source_player_index}, "
+            f"number={self.number}, public={self.public})"
+        )
 
 
 class GameHost:
@@ -183,10 +591,21 @@ class GameHost:
         np_random (np.random.Generator): The random number generator
         table_tile_set (TableTileSet): A set of tiles on the table
         all_players (list[PlayerTileSet]): A list of player instances
+        hidden_tile_counts (list[int]): The number of private tiles of each player
+        alive_players (PlayerRing): The players who have not lost yet, in seat order
+        recorder (GameRecorder): The recorder of the games, None if they are not recorded
 
     Methods:
-        init_game: Initialize everything about the game
+        init_game: Initialize everything about the game, dealing from draw_pile if it is given
+        subscribe: Call a function with every GameEvent from now on
+        unsubscribe: Stop calling a subscribed function
+        get_next_player_index: Get the next player who has not lost yet
+        get_remaining_players: Get the players who have not lost yet
         is_game_over: Test if the winner appears
+        get_bitboard: Get the bitboard encoding of the game state
+        snapshot: Get an immutable copy of the game state, including the random number generator
+        restore: Set the game state back to a snapshot
+        fork: Get an independent game host starting from the current game state
         show_self_status: Display the status of the player
         show_opponent_status: Display the status of other players
         guesses_making_stage: Allow the player to make guesses
@@ -203,18 +622,95 @@ class GameHost:
         assert initial_tiles and initial_tiles > 0, "Invalid initial_tiles"
         self.initial_tiles = initial_tiles
         self.np_random = np_random if np_random else np.random.default_rng()
-        self.table_tile_set = TableTileSet(max_tile_number)
+        self.table_tile_set = TableTileSet(max_tile_number, self.np_random)
         self.all_players = [
             PlayerTileSet(max_tile_number, self.np_random) for count in range(0, numPlayer)
         ]  # Set number of players here
-
-    def init_game(self) -> None:
-        self.table_tile_set.init_tile_set()
+        self.hidden_tile_counts = [0] * numPlayer
+        self.alive_players = PlayerRing(numPlayer)
+        self.recorder = None
+        self._subscribers = []
+        for player_index, player in enumerate(self.all_players):
+            player.player_index = player_index
+            player._host = self
+
+    def init_game(self, draw_pile: tuple[int, ...] = None) -> None:
+        self.table_tile_set.init_tile_set(draw_pile)
         for player in self.all_players:
             player.init_tile_set()
+        # the deal follows from the draw pile and is published as a single GAME_RESET
+        recorder, self.recorder = self.recorder, None
+        subscribers, self._subscribers = self._subscribers, []
+        if recorder is not None:
+            recorder.start(self)
         for draw_count in range(0, self.initial_tiles):
             for player in self.all_players:
                 player.draw_tile(self.table_tile_set, direct_draw=True)
+        self.recorder = recorder
+        self._subscribers = subscribers
+        if self._subscribers:
+            self._publish(GameEvent.Types.GAME_RESET, -1)
+
+    def subscribe(self, callback) -> None:
+        """
+        Call callback(event) with every GameEvent from now on. Without subscribers, no event is
+        created at all
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        self._subscribers.remove(callback)
+
+    def _publish(self, event_type: GameEvent.Types, player_index: int, *args) -> None:
+        event = GameEvent(event_type, player_index, *args)
+        for callback in self._subscribers:
+            callback(event)
+
+    def _publish_guess(
+        self,
+        source_player_index: int,
+        target_index: int,
+        tile_id: int,
+        tile_number: int,
+        correct_guess: bool,
+        temp_tile_id: int,
+    ) -> None:
+        """
+        Publish the events of a valid guess, temp_tile_id being the tile the guessing player held
+        before the guess, -1 if there was none
+        """
+        if correct_guess:
+            self._publish(
+                GameEvent.Types.TILE_REVEALED,
+                target_index,
+                tile_id,
+                source_player_index,
+                tile_number,
+            )
+            if self.all_players[target_index].is_lose():
+                self._publish(GameEvent.Types.PLAYER_ELIMINATED, target_index)
+        else:
+            self._publish(
+                GameEvent.Types.GUESS_FAILED,
+                target_index,
+                tile_id,
+                source_player_index,
+                tile_number,
+            )
+            if temp_tile_id >= 0:
+                self._publish(
+                    GameEvent.Types.TILE_PLACED, source_player_index, temp_tile_id, -1, 0, True
+                )
+            self._publish_turn_passed(source_player_index)
+
+    def _publish_turn_passed(self, player_index: int) -> None:
+        if not self.is_game_over():
+            self._publish(
+                GameEvent.Types.TURN_PASSED,
+                self.get_next_player_index(player_index),
+                -1,
+                player_index,
+            )
 
     def get_next_player_index(self, current_player: int | PlayerTileSet) -> int:
         if isinstance(current_player, (int, np.integer)):
@@ -222,22 +718,85 @@ class GameHost:
         else:
             current_player_index = self.all_players.index(current_player)
 
-        alive_player_indecies = [
-            player_index
-            for player_index, player in enumerate(self.all_players)
-            if not player.is_lose()
-        ]
-        next_player_index = alive_player_indecies[
-            (alive_player_indecies.index(current_player_index) + 1) % len(alive_player_indecies)
-        ]
-        return next_player_index
+        return self.alive_players.get_next(current_player_index)
 
     def get_remaining_players(self) -> list[PlayerTileSet]:
-        return list(player for player in self.all_players if player.is_lose() == False)
+        return [self.all_players[player_index] for player_index in self.alive_players]
 
     def is_game_over(self) -> bool:
-        remaining_players = self.get_remaining_players()
-        if len(remaining_players) <= 1:
-            return True
+        return len(self.alive_players) <= 1
+
+    def _update_hidden_tile_count(self, player_index: int, hidden_tile_count: int) -> None:
+        self.hidden_tile_counts[player_index] = hidden_tile_count
+        if hidden_tile_count > 0:
+            self.alive_players.add(player_index)
         else:
-            return False
+            self.alive_players.remove(player_index)
+
+    def get_bitboard(self) -> Bitboard:
+        public = 0
+        history = [0] * len(self.all_players)
+        for player in self.all_players:
+            public |= player.hand_mask & ~player.hidden_mask
+            for source_player_index, history_mask in player.history_masks.items():
+                history[source_player_index] |= history_mask
+        return Bitboard(
+            self.table_tile_set.max_tile_number,
+            tuple(player.hand_mask for player in self.all_players),
+            public,
+            tuple(
+                -1 if player.temp_tile is None else player.temp_tile.tile_id
+                for player in self.all_players
+            ),
+            tuple(history),
+        )
+
+    def snapshot(self) -> GameSnapshot:
+        return GameSnapshot(
+            self.get_bitboard(),
+            self.np_random.bit_generator.state,
+            self.table_tile_set.get_draw_pile(),
+        )
+
+    def restore(self, snapshot: GameSnapshot, restore_rng: bool = True) -> None:
+        board = snapshot.bitboard
+        max_tile_number = self.table_tile_set.max_tile_number
+        assert board.max_tile_number == max_tile_number, "Invalid max_tile_number"
+        assert board.num_players == len(self.all_players), "Invalid number of players"
+        if restore_rng:
+            self.np_random.bit_generator.state = snapshot.rng_state
+
+        tiles = [
+            Tile(_COLORS[tile_id % 2], tile_id // 2 + 1) for tile_id in range(2 * max_tile_number)
+        ]
+        for tile_id in iter_bits(board.public):
+            tiles[tile_id].direction_value = PUBLIC
+        self.table_tile_set._set_tiles(
+            [tiles[tile_id] for tile_id in iter_bits(board.table)], snapshot.draw_pile
+        )
+        for player_index, player in enumerate(self.all_players):
+            temp_tile_id = board.temp_tiles[player_index]
+            player._set_tiles(
+                [tiles[tile_id] for tile_id in iter_bits(board.hands[player_index])],
+                tiles[temp_tile_id] if temp_tile_id >= 0 else None,
+            )
+        for source_player_index, history_mask in enumerate(board.history):
+            for guess_bit in iter_bits(history_mask):
+                tile_id, number = divmod(guess_bit, max_tile_number)
+                tiles[tile_id].add_history_guess(source_player_index, number + 1)
+        if self._subscribers:
+            self._publish(GameEvent.Types.GAME_RESET, -1)
+
+    def fork(self, np_random: np.random.Generator = None) -> "GameHost":
+        """
+        Get an independent game host starting from the current game state. Unless np_random is
+        given, the fork continues with a copy of the random number generator of this game
+        """
+        game_host = type(self)(
+            len(self.all_players),
+            self.initial_tiles,
+            self.table_tile_set.max_tile_number,
+            np_random if np_random else copy_generator(self.np_random),
+        )
+        game_host.restore(self.snapshot(), restore_rng=False)
+        return game_host
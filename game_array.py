@@ -0,0 +1,751 @@
+from bisect import bisect
+from collections.abc import Sequence, Set
+from copy import copy
+import numpy as np
+
+import game
+from game import Tile, PlayerTileSet, PlayerRing, GameEvent
+from bitboard import Bitboard, iter_bits
+
+TABLE = -1  # owner value of a tile lying on the table
+TEMP = -2  # owner value of a tile drawn by a player but not yet placed
+
+# The largest max_tile_number, as the tile ids fit in the bits of an int64 and the guessed numbers
+# in the bits of a uint32
+MAX_TILE_NUMBER = 31
+
+PRIVATE = Tile.Directions.PRIVATE.value
+PUBLIC = Tile.Directions.PUBLIC.value
+
+_COLORS = tuple(Tile.Colors)
+_DIRECTIONS = tuple(Tile.Directions)
+
+
+class ArrayGameState:
+    """
+    This class stores the whole state of a game in a few fixed-size NumPy arrays
+
+    Every tile is identified by its tile id, tile_id = (number - 1) * 2 + color, so the ids of a
+    hand in ascending order are already sorted the way the game sorts tiles (number * 2 + color).
+    The sorted tile ids of every owner, and the tuple of their tile views, are kept up to date as
+    the tiles change owner, so reading a hand neither scans the owner array nor builds new tiles.
+    max_tile_number can be at most MAX_TILE_NUMBER
+
+    Attributes:
+        max_tile_number (int): The maximum number a tile can have
+        num_players (int): The number of players
+        color (np.ndarray): The Tile.Colors value of each tile id
+        number (np.ndarray): The number on each tile id
+        owner (np.ndarray): The index of the player holding each tile, TABLE or TEMP
+        direction (np.ndarray): The Tile.Directions value of each tile id
+        history (np.ndarray): Bitmask of failed guesses on each tile, per source player
+        temp_tile (np.ndarray): The tile id just drawn by each player, -1 if there is none
+        hidden_count (np.ndarray): The number of private tiles in the hand of each player
+        draw_pile (np.ndarray): Every tile id, the drawn ones first and then the table in drawing order
+        draw_count (np.ndarray): The number of tiles drawn from draw_pile
+        alive_players (PlayerRing): The players who have not lost yet, in seat order
+        tiles (tuple[ArrayTile, ...]): The view of each tile id
+
+    Methods:
+        reset: Put every tile back onto the table and clear directions and guess history
+        set_draw_pile: Stack the tiles on the table in the given drawing order
+        get_draw_pile: Get the tile ids of the table in drawing order
+        draw: Take the top tile of the draw pile off the table
+        hand: Get the sorted tile ids held by a player, TABLE or TEMP
+        hand_tiles: Get the sorted tiles held by a player, TABLE or TEMP
+        hand_arrays: Get the tiles held by several players as arrays, for array operations
+        set_owner: Move a tile to another player, TABLE or TEMP
+        place: Put a tile into the hand of a player with the given direction
+        set_direction: Change the direction of a tile, keeping hidden_count up to date
+        copy: Get a copy of the state, optionally read-only
+        copy_from: Overwrite the state with another state of the same shape
+        get_bitboard: Get the bitboard encoding of the state
+        set_bitboard: Overwrite the state with a bitboard encoding
+    """
+
+    def __init__(self, num_players: int, max_tile_number: int) -> None:
+        if not (max_tile_number and 0 < max_tile_number <= MAX_TILE_NUMBER):
+            raise ValueError(f"max_tile_number must be between 1 and {MAX_TILE_NUMBER}")
+        self.max_tile_number = max_tile_number
+        self.num_players = num_players
+        tile_ids = np.arange(2 * max_tile_number)
+        self.color = (tile_ids % 2).astype(np.int8)
+        self.number = (tile_ids // 2 + 1).astype(np.int8)
+        self.tile_bits = np.left_shift(1, tile_ids, dtype=np.int64)  # bit of each tile id
+        self.owner = np.full(2 * max_tile_number, TABLE, dtype=np.int8)
+        self.direction = np.zeros(2 * max_tile_number, dtype=np.int8)
+        self.history = np.zeros((2 * max_tile_number, num_players), dtype=np.uint32)
+        self.temp_tile = np.full(num_players, -1, dtype=np.int16)
+        self.hidden_count = np.zeros(num_players, dtype=np.int16)
+        self.draw_pile = tile_ids.astype(np.int16)
+        self.draw_count = np.zeros((), dtype=np.int16)
+        self.alive_players = PlayerRing(num_players)
+        self._tiles = None  # The view of each tile id, built when first asked for
+        self._rebuild_hands()
+
+    @property
+    def tiles(self) -> tuple["ArrayTile", ...]:
+        if self._tiles is None:
+            self._tiles = tuple(ArrayTile(self, tile_id) for tile_id in range(len(self.owner)))
+        return self._tiles
+
+    def _rebuild_hands(self) -> None:
+        # the sorted tile ids of every owner, indexed by the owner so that TABLE and TEMP are the
+        # last two, and the tuples of their tile views, built when first asked for
+        hands = [[] for _ in range(self.num_players + 2)]
+        for tile_id, owner in enumerate(self.owner.tolist()):
+            hands[owner].append(tile_id)
+        self._hands = [tuple(hand) for hand in hands]
+        self._hand_tiles = [None] * len(hands)
+
+    def reset(self) -> None:
+        self.owner.fill(TABLE)
+        self._rebuild_hands()
+        self.direction.fill(PRIVATE)
+        self.history.fill(0)
+        self.temp_tile.fill(-1)
+        self.hidden_count.fill(0)
+        self.draw_count.fill(0)
+        self.alive_players.clear()
+
+    def set_draw_pile(self, draw_pile: np.ndarray) -> None:
+        on_table = self.owner == TABLE
+        assert sorted(draw_pile) == on_table.nonzero()[0].tolist(), "Invalid draw_pile"
+        draw_count = len(self.draw_pile) - len(draw_pile)
+        self.draw_pile[:draw_count] = (~on_table).nonzero()[0]
+        self.draw_pile[draw_count:] = draw_pile
+        self.draw_count.fill(draw_count)
+
+    def get_draw_pile(self) -> tuple[int, ...]:
+        return tuple(self.draw_pile[self.draw_count :].tolist())
+
+    def draw(self) -> int:
+        if self.draw_count.item() == len(self.draw_pile):
+            raise ValueError("Empty table error")
+        # single elements are read with item and written by index, cheaper than NumPy scalars
+        draw_count = self.draw_count.item()
+        self.draw_count[()] = draw_count + 1
+        return self.draw_pile.item(draw_count)
+
+    def hand(self, player_index: int) -> tuple[int, ...]:
+        return self._hands[player_index]
+
+    def hand_tiles(self, player_index: int) -> tuple["ArrayTile", ...]:
+        hand_tiles = self._hand_tiles[player_index]
+        if hand_tiles is None:
+            hand_tiles = tuple(self.tiles[tile_id] for tile_id in self._hands[player_index])
+            self._hand_tiles[player_index] = hand_tiles
+        return hand_tiles
+
+    def hand_arrays(
+        self, player_indices: Sequence[int], temp_player_index: int = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The tiles held by the players of player_indices, hand after hand in sorted order
+
+        Args:
+            player_indices (Sequence[int]): The players, in the order of their hands
+            temp_player_index (int): The player whose drawn tile counts as part of the hand, None
+                for none
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The tile ids, the position of their owner in
+                player_indices and their index in the hand
+        """
+        hands = [self._hands[player_index] for player_index in player_indices]
+        if temp_player_index is not None and self.temp_tile.item(temp_player_index) >= 0:
+            temp_tile_id = self.temp_tile.item(temp_player_index)
+            hand_index = list(player_indices).index(temp_player_index)
+            hand = hands[hand_index]
+            position = bisect(hand, temp_tile_id)
+            hands[hand_index] = hand[:position] + (temp_tile_id,) + hand[position:]
+        # the hands hold a few tiles, so the lists are built in Python and converted once
+        tile_ids, owners, tile_indices = [], [], []
+        for hand_index, hand in enumerate(hands):
+            tile_ids += hand
+            owners += [hand_index] * len(hand)
+            tile_indices += range(len(hand))
+        return (
+            np.array(tile_ids, dtype=np.intp),
+            np.array(owners, dtype=np.intp),
+            np.array(tile_indices, dtype=np.intp),
+        )
+
+    def set_owner(self, tile_id: int, owner: int) -> None:
+        tile_id = int(tile_id)
+        previous_owner = self.owner.item(tile_id)
+        if previous_owner == owner:
+            return
+        self.owner[tile_id] = owner
+        hand = self._hands[previous_owner]
+        position = hand.index(tile_id)
+        self._hands[previous_owner] = hand[:position] + hand[position + 1 :]
+        hand = self._hands[owner]
+        position = bisect(hand, tile_id)
+        self._hands[owner] = hand[:position] + (tile_id,) + hand[position:]
+        self._hand_tiles[previous_owner] = self._hand_tiles[owner] = None
+
+    def place(self, tile_id: int, player_index: int, direction: int) -> None:
+        self.set_owner(tile_id, player_index)
+        self.direction[tile_id] = direction
+        if direction == PRIVATE:
+            self._add_hidden_count(player_index, 1)
+
+    def set_direction(self, tile_id: int, direction: int) -> None:
+        owner = self.owner.item(tile_id)
+        if owner >= 0 and self.direction.item(tile_id) != direction:
+            self._add_hidden_count(owner, 1 if direction == PRIVATE else -1)
+        self.direction[tile_id] = direction
+
+    def _add_hidden_count(self, player_index: int, delta: int) -> None:
+        hidden_count = self.hidden_count.item(player_index) + delta
+        self.hidden_count[player_index] = hidden_count
+        if hidden_count > 0:
+            self.alive_players.add(int(player_index))
+        else:
+            self.alive_players.remove(int(player_index))
+
+    _MUTABLE_ARRAYS = (
+        "owner",
+        "direction",
+        "history",
+        "temp_tile",
+        "hidden_count",
+        "draw_pile",
+        "draw_count",
+    )
+
+    def copy(self, writeable: bool = True) -> "ArrayGameState":
+        state = copy(self)
+        for name in self._MUTABLE_ARRAYS:
+            array = getattr(self, name).copy()
+            array.flags.writeable = writeable
+            setattr(state, name, array)
+        state.alive_players = self.alive_players.copy()
+        state._tiles = None
+        state._hands = self._hands.copy()
+        state._hand_tiles = [None] * len(self._hands)
+        return state
+
+    def copy_from(self, state: "ArrayGameState") -> None:
+        for name in self._MUTABLE_ARRAYS:
+            np.copyto(getattr(self, name), getattr(state, name))
+        self.alive_players = state.alive_players.copy()
+        self._hands = state._hands.copy()
+        self._hand_tiles = [None] * len(self._hands)
+
+    def get_bitboard(self) -> Bitboard:
+        history = []
+        for source_player_index in range(self.num_players):
+            history_mask = 0
+            for tile_id in self.history[:, source_player_index].nonzero()[0]:
+                guess_mask = int(self.history[tile_id, source_player_index]) >> 1
+                history_mask |= guess_mask << int(tile_id) * self.max_tile_number
+            history.append(history_mask)
+        return Bitboard(
+            self.max_tile_number,
+            tuple(
+                int(self.tile_bits[self.owner == player_index].sum())
+                for player_index in range(self.num_players)
+            ),
+            int(self.tile_bits[(self.owner >= 0) & (self.direction == PUBLIC)].sum()),
+            tuple(self.temp_tile.tolist()),
+            tuple(history),
+        )
+
+    def set_bitboard(self, board: Bitboard) -> None:
+        assert board.max_tile_number == self.max_tile_number, "Invalid max_tile_number"
+        assert board.num_players == self.num_players, "Invalid number of players"
+        self.reset()
+        for player_index, hand in enumerate(board.hands):
+            for tile_id in iter_bits(hand):
+                self.place(
+                    tile_id, player_index, PUBLIC if board.public >> tile_id & 1 else PRIVATE
+                )
+        for player_index, temp_tile_id in enumerate(board.temp_tiles):
+            if temp_tile_id >= 0:
+                self.set_owner(temp_tile_id, TEMP)
+                self.temp_tile[player_index] = temp_tile_id
+        for source_player_index, history_mask in enumerate(board.history):
+            for guess_bit in iter_bits(history_mask):
+                tile_id, number = divmod(guess_bit, self.max_tile_number)
+                self.history[tile_id, source_player_index] |= np.uint32(1 << number + 1)
+
+
+class ArrayTile:
+    """
+    This class is a lightweight view of one tile of an ArrayGameState, with the same interface as Tile
+
+    Attributes:
+        state (ArrayGameState): The state the tile lives in
+        tile_id (int): The id of the tile in the state arrays
+    """
+
+    __slots__ = ("state", "tile_id")
+
+    Colors = Tile.Colors
+    Directions = Tile.Directions
+
+    def __init__(self, state: ArrayGameState, tile_id: int) -> None:
+        self.state = state
+        self.tile_id = int(tile_id)
+
+    @property
+    def color(self) -> Tile.Colors:
+        return _COLORS[self.tile_id % 2]
+
+    @property
+    def color_value(self) -> int:
+        return self.tile_id % 2
+
+    @property
+    def number(self) -> int:
+        return self.tile_id // 2 + 1
+
+    @property
+    def direction(self) -> Tile.Directions:
+        return _DIRECTIONS[self.state.direction.item(self.tile_id)]
+
+    @direction.setter
+    def direction(self, direction: Tile.Directions) -> None:
+        self.state.set_direction(self.tile_id, direction.value)
+
+    @property
+    def direction_value(self) -> int:
+        return self.state.direction.item(self.tile_id)
+
+    @property
+    def history_guesses(self) -> dict:
+        history_guesses = {}
+        for source_player_index, guess_mask in enumerate(self.state.history[self.tile_id]):
+            if guess_mask:
+                history_guesses[source_player_index] = set(
+                    number
+                    for number in range(1, self.state.max_tile_number + 1)
+                    if guess_mask >> number & 1
+                )
+        return history_guesses
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ArrayTile)
+            and self.state is other.state
+            and self.tile_id == other.tile_id
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.state), self.tile_id))
+
+    __str__ = Tile.__str__
+    opponent_print = Tile.opponent_print
+
+    def get_guess_mask(self, source_player_index: int) -> int:
+        return self.state.history.item(self.tile_id, source_player_index)
+
+    def add_history_guess(self, source_player_index: int, number_guessed: int) -> None:
+        history = self.state.history
+        guess_mask = history.item(self.tile_id, source_player_index) | 1 << int(number_guessed)
+        history[self.tile_id, source_player_index] = guess_mask
+
+    def is_guessed(self, source_player_index: int, number_guessed: int) -> bool:
+        return bool(
+            self.state.history.item(self.tile_id, source_player_index) >> int(number_guessed) & 1
+        )
+
+
+class ArrayTileSetView(Set):
+    """
+    This class is a read-only set of the tiles of an ArrayGameState with the given owner
+    """
+
+    def __init__(self, state: ArrayGameState, owner: int) -> None:
+        self.state = state
+        self.owner = owner
+
+    def __len__(self) -> int:
+        return len(self.state.hand(self.owner))
+
+    def __iter__(self):
+        return iter(self.state.hand_tiles(self.owner))
+
+    def __contains__(self, tile) -> bool:
+        return (
+            isinstance(tile, ArrayTile)
+            and tile.state is self.state
+            and self.state.owner[tile.tile_id] == self.owner
+        )
+
+
+class ArrayTableTileSet:
+    """
+    This class is the array-backed counterpart of game.TableTileSet
+
+    Attributes:
+        max_tile_number (int): The maximum number a tile can have
+        np_random (np.random.Generator): The random number generator shuffling the draw pile
+        state (ArrayGameState): The state the table lives in
+        tile_set (ArrayTileSetView): The set of tiles on the table
+
+    Methods:
+        init_tile_set: Put every tile onto the table and shuffle the draw pile
+        get_tile_list: Get the sorted tuple of tiles on the table
+        get_draw_pile: Get the tile ids of the tiles in drawing order
+        draw_tile: Take the top tile of the draw pile off the table
+    """
+
+    def __init__(self, state: ArrayGameState, np_random: np.random.Generator = None) -> None:
+        self.max_tile_number = state.max_tile_number
+        self.np_random = np_random if np_random else np.random.default_rng()
+        self.state = state
+
+    @property
+    def tile_set(self) -> ArrayTileSetView:
+        return ArrayTileSetView(self.state, TABLE)
+
+    def init_tile_set(self, draw_pile: tuple[int, ...] = None) -> None:
+        self.state.reset()
+        if draw_pile is None:
+            draw_pile = self.np_random.permutation(2 * self.max_tile_number)
+        self.state.set_draw_pile(np.asarray(draw_pile))
+
+    def get_tile_list(self) -> tuple[ArrayTile, ...]:
+        return self.state.hand_tiles(TABLE)
+
+    def get_draw_pile(self) -> tuple[int, ...]:
+        return self.state.get_draw_pile()
+
+    def draw_tile(self) -> ArrayTile:
+        return self.state.tiles[self.state.draw()]
+
+    def __str__(self) -> str:
+        table_tile_set_str = "".join([str(tile) + ",\n" for tile in self.get_tile_list()])
+        return f"TableTileSet: \n({table_tile_set_str})"
+
+
+class ArrayPlayerTileSet:
+    """
+    This class is the array-backed counterpart of game.PlayerTileSet, with the same methods
+
+    Attributes:
+        max_tile_number (int): The maximum number a tile can have
+        np_random (np.random.Generator): The random number generator
+        state (ArrayGameState): The state the player lives in
+        player_index (int): The index of the player in the state arrays
+        tile_set (ArrayTileSetView): The set of tiles owned by the player
+        temp_tile (ArrayTile): The tile just drawn by the player and not yet placed into the tile set
+    """
+
+    InvalidActionErrorEnum = PlayerTileSet.InvalidActionErrorEnum
+
+    def __init__(
+        self, state: ArrayGameState, player_index: int, np_random: np.random.Generator = None
+    ) -> None:
+        self.max_tile_number = state.max_tile_number
+        self.np_random = np_random if np_random else np.random.default_rng()
+        self.state = state
+        self.player_index = player_index
+        self._host = None  # The ArrayGameHost told about the moves when they are recorded
+
+    @property
+    def tile_set(self) -> ArrayTileSetView:
+        return ArrayTileSetView(self.state, self.player_index)
+
+    @property
+    def temp_tile(self) -> ArrayTile | None:
+        temp_tile_id = self.state.temp_tile.item(self.player_index)
+        return self.state.tiles[temp_tile_id] if temp_tile_id >= 0 else None
+
+    def init_tile_set(self) -> None:
+        for tile_id in self.state.hand(self.player_index):
+            self.state.set_owner(tile_id, TABLE)
+        self.state.hidden_count[self.player_index] = 0
+        self.state.alive_players.remove(self.player_index)
+
+    def get_tile_list(self) -> tuple[ArrayTile, ...]:
+        hand_tiles = self.state._hand_tiles[self.player_index]
+        return hand_tiles if hand_tiles is not None else self.state.hand_tiles(self.player_index)
+
+    def draw_tile(self, table_tile_set: ArrayTableTileSet, direct_draw=False) -> None:
+        tile_id = table_tile_set.state.draw()
+        if direct_draw:
+            self.state.place(tile_id, self.player_index, PRIVATE)
+        else:
+            self.state.set_owner(tile_id, TEMP)
+            self.state.temp_tile[self.player_index] = tile_id
+        if self._host is not None:
+            if self._host._subscribers:
+                self._host._publish(GameEvent.Types.TILE_DRAWN, self.player_index, int(tile_id))
+                if direct_draw:
+                    self._host._publish(
+                        GameEvent.Types.TILE_PLACED, self.player_index, int(tile_id)
+                    )
+            if self._host.recorder is not None:
+                self._host.recorder.record_draw(self.player_index, direct_draw)
+
+    def make_guess(
+        self,
+        all_players: list,
+        source_player_index: int,
+        target_index: int,
+        tile_index: int,
+        tile_number: int,
+    ) -> bool:
+        error, correct_guess = self.try_guess(
+            all_players, source_player_index, target_index, tile_index, tile_number
+        )
+        if error is not None:
+            raise ValueError(error)
+        return correct_guess
+
+    def try_guess(
+        self,
+        all_players: list,
+        source_player_index: int,
+        target_index: int,
+        tile_index: int,
+        tile_number: int,
+    ) -> tuple[PlayerTileSet.InvalidActionErrorEnum | None, bool]:
+        if target_index >= len(all_players) or target_index < 0:
+            return self.InvalidActionErrorEnum.TARGET_INDEX_OUT_OF_RANGE, False
+        if target_index == self.player_index or all_players[target_index].is_lose():
+            return self.InvalidActionErrorEnum.TARGET_ALREADY_LOST, False
+        if tile_number < 1 or tile_number > self.max_tile_number:
+            return self.InvalidActionErrorEnum.TILE_NUMBER_OUT_OF_RANGE, False
+        guess_target = all_players[target_index]
+        target_hand = self.state.hand(guess_target.player_index)
+        if tile_index < 0 or tile_index >= len(target_hand):
+            return self.InvalidActionErrorEnum.TILE_INDEX_OUT_OF_RANGE, False
+        error, correct_guess = guess_target._try_verify_tile(
+            source_player_index, target_hand[tile_index], tile_number
+        )
+        temp_tile_id = self.state.temp_tile.item(self.player_index)
+        if error is None and not correct_guess:
+            self._place_temp_tile(PUBLIC)
+        if error is None and self._host is not None:
+            if self._host._subscribers:
+                self._host._publish_guess(
+                    source_player_index,
+                    target_index,
+                    int(target_hand[tile_index]),
+                    tile_number,
+                    correct_guess,
+                    temp_tile_id,
+                )
+            if self._host.recorder is not None:
+                self._host.recorder.record_guess(
+                    source_player_index, target_index, tile_index, tile_number, correct_guess
+                )
+        return error, correct_guess
+
+    def verify_guess(self, source_player_index: int, tile_index: int, tile_number: int) -> bool:
+        error, correct_guess = self.try_verify_guess(source_player_index, tile_index, tile_number)
+        if error is not None:
+            raise ValueError(error)
+        return correct_guess
+
+    def try_verify_guess(
+        self, source_player_index: int, tile_index: int, tile_number: int
+    ) -> tuple[PlayerTileSet.InvalidActionErrorEnum | None, bool]:
+        tile_id = self.state.hand(self.player_index)[tile_index]
+        return self._try_verify_tile(source_player_index, tile_id, tile_number)
+
+    def _try_verify_tile(
+        self, source_player_index: int, tile_id: int, tile_number: int
+    ) -> tuple[PlayerTileSet.InvalidActionErrorEnum | None, bool]:
+        state = self.state
+        tile_number = int(tile_number)  # the guess bit of a NumPy integer would overflow
+        if state.direction.item(tile_id) == PUBLIC:
+            return self.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC, False
+        guess_mask = state.history.item(tile_id, source_player_index)
+        if guess_mask >> tile_number & 1:
+            return self.InvalidActionErrorEnum.GUESS_ALREADY_MADE, False
+        if tile_id // 2 + 1 == tile_number:
+            state.set_direction(tile_id, PUBLIC)
+            return None, True
+        else:
+            # Add the guess to the history
+            state.history[tile_id, source_player_index] = guess_mask | 1 << tile_number
+            return None, False
+
+    def end_turn(self) -> None:
+        temp_tile_id = self.state.temp_tile.item(self.player_index)
+        self._place_temp_tile(PRIVATE)
+        if self._host is not None:
+            if self._host._subscribers:
+                if temp_tile_id >= 0:
+                    self._host._publish(
+                        GameEvent.Types.TILE_PLACED, self.player_index, temp_tile_id
+                    )
+                self._host._publish_turn_passed(self.player_index)
+            if self._host.recorder is not None:
+                self._host.recorder.record_end_turn(self.player_index)
+
+    def is_lose(self) -> bool:
+        # the ring of the alive players answers without reading hidden_count
+        return self.state.alive_players.next_index[self.player_index] < 0
+
+    def get_hidden_tile_count(self) -> int:
+        return int(self.state.hidden_count[self.player_index])
+
+    def _place_temp_tile(self, direction: int) -> None:
+        temp_tile_id = self.state.temp_tile.item(self.player_index)
+        if temp_tile_id >= 0:
+            self.state.place(temp_tile_id, self.player_index, direction)
+            self.state.temp_tile[self.player_index] = -1
+
+
+class ArrayGameHost:
+    """
+    This class is the array-backed counterpart of game.GameHost, with the same methods
+
+    Attributes:
+        initial_tiles (int): The number of tiles each player starts with
+        np_random (np.random.Generator): The random number generator
+        state (ArrayGameState): The arrays holding the whole game state
+        table_tile_set (ArrayTableTileSet): A set of tiles on the table
+        all_players (list[ArrayPlayerTileSet]): A list of player instances
+        hidden_tile_counts (np.ndarray): The number of private tiles of each player
+        alive_players (PlayerRing): The players who have not lost yet, in seat order
+        recorder (GameRecorder): The recorder of the games, None if they are not recorded
+    """
+
+    def __init__(
+        self,
+        numPlayer: int,
+        initial_tiles: int,
+        max_tile_number: int,
+        np_random: np.random.Generator = None,
+    ) -> None:
+        assert initial_tiles and initial_tiles > 0, "Invalid initial_tiles"
+        self.initial_tiles = initial_tiles
+        self.np_random = np_random if np_random else np.random.default_rng()
+        self.state = ArrayGameState(numPlayer, max_tile_number)
+        self.table_tile_set = ArrayTableTileSet(self.state, self.np_random)
+        self.all_players = [
+            ArrayPlayerTileSet(self.state, player_index, self.np_random)
+            for player_index in range(0, numPlayer)
+        ]
+        self.recorder = None
+        self._subscribers = []
+        for player in self.all_players:
+            player._host = self
+
+    def init_game(self, draw_pile: tuple[int, ...] = None) -> None:
+        self.table_tile_set.init_tile_set(draw_pile)
+        for player in self.all_players:
+            player.init_tile_set()
+        # the deal follows from the draw pile and is published as a single GAME_RESET
+        recorder, self.recorder = self.recorder, None
+        subscribers, self._subscribers = self._subscribers, []
+        if recorder is not None:
+            recorder.start(self)
+        for draw_count in range(0, self.initial_tiles):
+            for player in self.all_players:
+                player.draw_tile(self.table_tile_set, direct_draw=True)
+        self.recorder = recorder
+        self._subscribers = subscribers
+        if self._subscribers:
+            self._publish(GameEvent.Types.GAME_RESET, -1)
+
+    subscribe = game.GameHost.subscribe
+    unsubscribe = game.GameHost.unsubscribe
+    _publish = game.GameHost._publish
+    _publish_guess = game.GameHost._publish_guess
+    _publish_turn_passed = game.GameHost._publish_turn_passed
+
+    @property
+    def hidden_tile_counts(self) -> np.ndarray:
+        return self.state.hidden_count
+
+    @property
+    def alive_players(self) -> PlayerRing:
+        return self.state.alive_players
+
+    def get_alive_mask(self) -> np.ndarray:
+        return self.state.hidden_count > 0
+
+    def get_next_player_index(self, current_player: int | ArrayPlayerTileSet) -> int:
+        if isinstance(current_player, (int, np.integer)):
+            current_player_index = current_player
+        else:
+            current_player_index = current_player.player_index
+
+        return self.state.alive_players.get_next(int(current_player_index))
+
+    def get_remaining_players(self) -> list[ArrayPlayerTileSet]:
+        return [self.all_players[player_index] for player_index in self.state.alive_players]
+
+    def is_game_over(self) -> bool:
+        return len(self.state.alive_players) <= 1
+
+    def get_bitboard(self) -> Bitboard:
+        return self.state.get_bitboard()
+
+    def snapshot(self) -> "ArrayGameSnapshot":
+        return ArrayGameSnapshot(
+            self.state.copy(writeable=False), self.np_random.bit_generator.state
+        )
+
+    def restore(self, snapshot: game.GameSnapshot, restore_rng: bool = True) -> None:
+        if restore_rng:
+            self.np_random.bit_generator.state = snapshot.rng_state
+        if isinstance(snapshot, ArrayGameSnapshot):
+            self.state.copy_from(snapshot.state)
+        else:
+            self.state.set_bitboard(snapshot.bitboard)
+            draw_pile = snapshot.draw_pile
+            if draw_pile is None:
+                table_tile_ids = np.array(self.state.hand(TABLE))
+                draw_pile = table_tile_ids[self.np_random.permutation(len(table_tile_ids))]
+            self.state.set_draw_pile(draw_pile)
+        if self._subscribers:
+            self._publish(GameEvent.Types.GAME_RESET, -1)
+
+    def fork(self, np_random: np.random.Generator = None) -> "ArrayGameHost":
+        """
+        Get an independent game host starting from the current game state. Unless np_random is
+        given, the fork continues with a copy of the random number generator of this game
+        """
+        game_host = type(self)(
+            self.state.num_players,
+            self.initial_tiles,
+            self.state.max_tile_number,
+            np_random if np_random else game.copy_generator(self.np_random),
+        )
+        game_host.state.copy_from(self.state)
+        return game_host
+
+
+class ArrayGameSnapshot(game.GameSnapshot):
+    """
+    This class is the snapshot of an ArrayGameHost, holding a read-only copy of its state arrays that
+    is shared by every restore, while the bitboard is only computed when asked for
+
+    Attributes:
+        state (ArrayGameState): The read-only copy of the game state
+        rng_state (dict): The state of the bit generator of np_random
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, state: ArrayGameState, rng_state: dict) -> None:
+        super().__init__(None, rng_state)
+        self.state = state
+
+    @property
+    def bitboard(self) -> Bitboard:
+        if self._bitboard is None:
+            self._bitboard = self.state.get_bitboard()
+        return self._bitboard
+
+    @property
+    def draw_pile(self) -> tuple[int, ...]:
+        if self._draw_pile is None:
+            self._draw_pile = self.state.get_draw_pile()
+        return self._draw_pile
+
+
+ENGINES = {
+    "object": game.GameHost,
+    "array": ArrayGameHost,
+}  # Game host classes selectable through the envs' engine argument
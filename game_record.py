@@ -0,0 +1,296 @@
+import struct
+from array import array
+import numpy as np
+
+import game
+
+MAGIC = b"DVCR"
+VERSION = 2  # version 1 records only had 2-byte moves, which read the same
+_HEADER = struct.Struct("<4sBBBBBQ")  # magic, version, flags, players, initial tiles, max, seed
+_SEED_FLAG = 1
+
+# The kinds of move, in the low 2 bits of every move
+DRAW = 0
+GUESS = 1
+END_TURN = 2
+DIRECT_DRAW = 3
+
+# The largest games that can be recorded
+MAX_PLAYERS = 16
+MAX_TILE_NUMBER = 128  # the draw pile is stored as one byte per tile id
+
+# The layouts of the moves: the array typecode, and the bit offsets of the target, the tile index,
+# the tile number - 1 and the result of guesses, the player always starting at bit 2. Games of up
+# to 4 players and 16 numbers have 2-byte moves, larger games 4-byte moves
+_NARROW_MOVES = ("H", 4, 6, 11, 15)
+_WIDE_MOVES = ("I", 6, 10, 18, 25)
+
+
+def _move_layout(num_players: int, max_tile_number: int) -> tuple[str, int, int, int, int]:
+    if num_players > MAX_PLAYERS or max_tile_number > MAX_TILE_NUMBER:
+        raise ValueError(
+            f"Only games of up to {MAX_PLAYERS} players and {MAX_TILE_NUMBER} numbers can be "
+            f"recorded, not {num_players} players and {max_tile_number} numbers"
+        )
+    if num_players <= 4 and max_tile_number <= 16:
+        return _NARROW_MOVES
+    return _WIDE_MOVES
+
+
+class GameRecord:
+    """
+    This class is an immutable, compact binary record of one game
+
+    The bytes are a 17-byte header (magic, version, flags, number of players, initial tiles,
+    max_tile_number and seed), the draw pile of the deal as one byte per tile id, and then every
+    move as a little-endian uint16: bits 0-1 the kind, bits 2-3 the player and, for guesses, bits
+    4-5 the target, bits 6-10 the tile index, bits 11-14 the tile number - 1 and bit 15 whether the
+    guess was right. Games of more than 4 players or 16 numbers, up to MAX_PLAYERS and
+    MAX_TILE_NUMBER, have uint32 moves instead: bits 0-1 the kind, bits 2-5 the player, bits 6-9
+    the target, bits 10-17 the tile index, bits 18-24 the tile number - 1 and bit 25 the result.
+    Records with the same bytes are equal, so they can be deduplicated with a set.
+
+    Attributes:
+        num_players (int): The number of players
+        initial_tiles (int): The number of tiles each player starts with
+        max_tile_number (int): The maximum number a tile can have
+        seed (int): The seed of the game, None if it is unknown
+        draw_pile (tuple[int]): The tile ids of the table in drawing order before the deal
+        moves (np.ndarray): The encoded moves, uint16 or uint32 depending on the size of the game
+
+    Methods:
+        to_bytes: Get the binary record
+        from_bytes: Read a binary record
+        decode_moves: Get the moves as tuples
+    """
+
+    def __init__(
+        self,
+        num_players: int,
+        initial_tiles: int,
+        max_tile_number: int,
+        seed: int | None,
+        draw_pile: tuple[int, ...],
+        moves: np.ndarray,
+    ) -> None:
+        self.num_players = num_players
+        self.initial_tiles = initial_tiles
+        self.max_tile_number = max_tile_number
+        self.seed = seed
+        self.draw_pile = tuple(draw_pile)
+        self._layout = _move_layout(num_players, max_tile_number)
+        self.moves = np.asarray(moves, dtype=self._layout[0])
+        self.moves.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            0 if self.seed is None else _SEED_FLAG,
+            self.num_players,
+            self.initial_tiles,
+            self.max_tile_number,
+            0 if self.seed is None else self.seed,
+        )
+        moves = self.moves.astype(self.moves.dtype.newbyteorder("<"))
+        return header + bytes(self.draw_pile) + moves.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameRecord":
+        magic, version, flags, num_players, initial_tiles, max_tile_number, seed = (
+            _HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ValueError("Not a game record of this version")
+        pile_end = _HEADER.size + 2 * max_tile_number
+        dtype = np.dtype(_move_layout(num_players, max_tile_number)[0]).newbyteorder("<")
+        return cls(
+            num_players,
+            initial_tiles,
+            max_tile_number,
+            seed if flags & _SEED_FLAG else None,
+            tuple(data[_HEADER.size : pile_end]),
+            np.frombuffer(data, dtype=dtype, offset=pile_end),
+        )
+
+    def decode_moves(self) -> list[tuple[int, int, int, int, int, bool]]:
+        """
+        Returns:
+            list[tuple[int, int, int, int, int, bool]]: (kind, player_index, target_index,
+                tile_index, tile_number, correct_guess) of every move, the last four being 0 or
+                False for moves that are not guesses
+        """
+        _, target_shift, tile_shift, number_shift, result_shift = self._layout
+        moves = self.moves.astype(np.int64)
+        kinds = moves & 3
+        is_guess = kinds == GUESS
+
+        def field(shift, next_shift):
+            return moves >> shift & (1 << next_shift - shift) - 1
+
+        return list(
+            zip(
+                kinds.tolist(),
+                field(2, target_shift).tolist(),
+                np.where(is_guess, field(target_shift, tile_shift), 0).tolist(),
+                np.where(is_guess, field(tile_shift, number_shift), 0).tolist(),
+                np.where(is_guess, field(number_shift, result_shift) + 1, 0).tolist(),
+                (is_guess & (moves >> result_shift & 1 == 1)).tolist(),
+            )
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GameRecord) and self.to_bytes() == other.to_bytes()
+
+    def __hash__(self) -> int:
+        return hash(self.to_bytes())
+
+
+class GameRecorder:
+    """
+    This class records the games of a game host, set as its recorder attribute
+
+    Every init_game of the game host starts a new record with the shuffled draw pile, and every
+    draw, valid guess and end of turn of its players is appended to it. Games of more than
+    MAX_PLAYERS players or MAX_TILE_NUMBER numbers cannot be recorded
+
+    Attributes:
+        seed (int): The seed written into the next records, None if it is unknown
+
+    Methods:
+        start: Start the record of a new game
+        record_draw: Append a draw
+        record_guess: Append a valid guess and its result
+        record_end_turn: Append an end of turn
+        get_record: Get the record of the current game
+    """
+
+    def __init__(self, seed: int = None) -> None:
+        self.seed = seed
+        self._header = None
+        self._layout = _NARROW_MOVES
+        self._moves = array("H")
+
+    def start(self, game_host) -> None:
+        max_tile_number = game_host.table_tile_set.max_tile_number
+        num_players = len(game_host.all_players)
+        self._layout = _move_layout(num_players, max_tile_number)
+        self._header = (
+            num_players,
+            game_host.initial_tiles,
+            max_tile_number,
+            self.seed,
+            game_host.table_tile_set.get_draw_pile(),
+        )
+        self._moves = array(self._layout[0])
+
+    def record_draw(self, player_index: int, direct_draw: bool = False) -> None:
+        self._moves.append((DIRECT_DRAW if direct_draw else DRAW) | player_index << 2)
+
+    def record_guess(
+        self,
+        source_player_index: int,
+        target_index: int,
+        tile_index: int,
+        tile_number: int,
+        correct_guess: bool,
+    ) -> None:
+        _, target_shift, tile_shift, number_shift, result_shift = self._layout
+        self._moves.append(
+            GUESS
+            | source_player_index << 2
+            | target_index << target_shift
+            | tile_index << tile_shift
+            | tile_number - 1 << number_shift
+            | correct_guess << result_shift
+        )
+
+    def record_end_turn(self, player_index: int) -> None:
+        self._moves.append(END_TURN | player_index << 2)
+
+    def get_record(self) -> GameRecord:
+        assert self._header is not None, "No game was started"
+        moves = np.array(self._moves, dtype=self._layout[0])
+        return GameRecord(*self._header, moves)
+
+
+class GameReplayer:
+    """
+    This class rebuilds the game states of a record, checking that every guess has the recorded
+    result. Snapshots taken every checkpoint_interval moves make any state quick to reach
+
+    Attributes:
+        record (GameRecord): The record being replayed
+        host_class (type): The game host class replaying the record, e.g. game.GameHost
+        checkpoint_interval (int): The number of moves between two snapshots
+
+    Methods:
+        snapshot: Get the snapshot of the game after some moves
+        game_host: Get a new game host in the state of the game after some moves
+    """
+
+    def __init__(
+        self, record: GameRecord, host_class: type = game.GameHost, checkpoint_interval: int = 32
+    ) -> None:
+        self.record = record
+        self.host_class = host_class
+        self.checkpoint_interval = checkpoint_interval
+        self._moves = record.decode_moves()
+        self._game_host = self._new_game_host()
+        self._game_host.init_game(record.draw_pile)
+        self._move_count = 0  # the number of moves played in _game_host
+        self._checkpoints = [self._game_host.snapshot()]
+
+    def _new_game_host(self):
+        record = self.record
+        return self.host_class(
+            record.num_players,
+            record.initial_tiles,
+            record.max_tile_number,
+            np.random.default_rng(record.seed),
+        )
+
+    def snapshot(self, move_count: int = None) -> game.GameSnapshot:
+        """
+        The snapshot of the game after the first move_count moves, after the last move by default
+        """
+        if move_count is None:
+            move_count = len(self._moves)
+        assert 0 <= move_count <= len(self._moves), "Invalid move_count"
+        checkpoint = min(move_count // self.checkpoint_interval, len(self._checkpoints) - 1)
+        start = checkpoint * self.checkpoint_interval
+        if not start <= self._move_count <= move_count:
+            self._game_host.restore(self._checkpoints[checkpoint])
+            self._move_count = start
+        while self._move_count < move_count:
+            self._play(self._moves[self._move_count])
+            self._move_count += 1
+            if self._move_count == len(self._checkpoints) * self.checkpoint_interval:
+                self._checkpoints.append(self._game_host.snapshot())
+        return self._game_host.snapshot()
+
+    def game_host(self, move_count: int = None):
+        """
+        A new game host of host_class in the state of the game after the first move_count moves
+        """
+        game_host = self._new_game_host()
+        game_host.restore(self.snapshot(move_count))
+        return game_host
+
+    def _play(self, move: tuple) -> None:
+        kind, player_index, target_index, tile_index, tile_number, correct_guess = move
+        game_host = self._game_host
+        player = game_host.all_players[player_index]
+        if kind == GUESS:
+            error, result = player.try_guess(
+                game_host.all_players, player_index, target_index, tile_index, tile_number
+            )
+            if error is not None or result != correct_guess:
+                raise ValueError(f"Move {self._move_count} does not match the record")
+        elif kind == END_TURN:
+            player.end_turn()
+        else:
+            player.draw_tile(game_host.table_tile_set, direct_draw=kind == DIRECT_DRAW)
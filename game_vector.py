@@ -0,0 +1,276 @@
+import numpy as np
+
+from game import PlayerTileSet
+from game_array import TABLE, TEMP, PRIVATE, PUBLIC, MAX_TILE_NUMBER
+from bitboard import Bitboard
+
+NO_ERROR = -1  # error code of a valid guess
+
+_ERRORS = PlayerTileSet.InvalidActionErrorEnum
+
+
+class VectorGameHost:
+    """
+    This class runs many independent games in lock-step, every rule of game.py being applied to all
+    the games at once as NumPy array operations over a leading game dimension
+
+    Every tile is identified by its tile id, tile_id = (number - 1) * 2 + color, as in game_array.py.
+    Each game draws from its own pre-shuffled draw pile, which gives the same uniform draws from the
+    table as PlayerTileSet.draw_tile. The games are not synchronised with each other: every game has
+    its own current player and the operations only touch the games selected by their mask. Like
+    ArrayGameState, it supports a max_tile_number of at most game_array.MAX_TILE_NUMBER.
+
+    Attributes:
+        num_games (int): The number of games
+        num_players (int): The number of players in each game
+        initial_tiles (int): The number of tiles dealt to each player
+        max_tile_number (int): The maximum number a tile can have
+        np_random (np.random.Generator): The random number generator shuffling the draw piles
+        owner (np.ndarray): (games, tiles) the player holding each tile, TABLE or TEMP
+        direction (np.ndarray): (games, tiles) the Tile.Directions value of each tile
+        history (np.ndarray): (games, tiles, players) bitmask of failed guesses, bit number set
+        temp_tile (np.ndarray): (games, players) the tile id just drawn, -1 if there is none
+        hidden_count (np.ndarray): (games, players) the number of private tiles of each player
+        current_player (np.ndarray): (games,) the index of the player taking the turn
+        draw_pile (np.ndarray): (games, tiles) the tile ids of each game in drawing order
+        draw_count (np.ndarray): (games,) the number of tiles drawn from each draw pile
+
+    Methods:
+        init_game: Shuffle the tiles and deal the initial tiles of the selected games
+        draw_tile: Let the current player draw a tile from the table
+        try_guess: Let the current player make a guess, returning the error codes
+        end_turn: Let the current player place the drawn tile privately
+        next_player: Move the turn to the next player still in the game
+        step: Play one guess of the current player, passing the turn on a wrong guess
+        hand: Get the sorted tile ids held by a player in a game
+        get_alive_mask: Get which players have not lost yet
+        is_game_over: Test if the winner appears in each game
+        get_bitboard: Get the bitboard encoding of one game
+    """
+
+    def __init__(
+        self,
+        num_games: int,
+        num_players: int,
+        initial_tiles: int,
+        max_tile_number: int,
+        np_random: np.random.Generator = None,
+    ) -> None:
+        if not (max_tile_number and 0 < max_tile_number <= MAX_TILE_NUMBER):
+            raise ValueError(f"max_tile_number must be between 1 and {MAX_TILE_NUMBER}")
+        assert num_players * initial_tiles <= 2 * max_tile_number, "Not enough tiles to deal"
+        self.num_games = num_games
+        self.num_players = num_players
+        self.initial_tiles = initial_tiles
+        self.max_tile_number = max_tile_number
+        self.np_random = np_random if np_random else np.random.default_rng()
+
+        num_tiles = 2 * max_tile_number
+        self._games = np.arange(num_games)
+        self._tile_ids = np.arange(num_tiles, dtype=np.int16)
+        self._tile_numbers = self._tile_ids // 2 + 1
+        self.owner = np.full((num_games, num_tiles), TABLE, dtype=np.int8)
+        self.direction = np.zeros((num_games, num_tiles), dtype=np.int8)
+        self.history = np.zeros((num_games, num_tiles, num_players), dtype=np.uint32)
+        self.temp_tile = np.full((num_games, num_players), -1, dtype=np.int16)
+        self.hidden_count = np.zeros((num_games, num_players), dtype=np.int16)
+        self.current_player = np.zeros(num_games, dtype=np.int8)
+        self.draw_pile = np.tile(self._tile_ids, (num_games, 1))
+        self.draw_count = np.zeros(num_games, dtype=np.int16)
+
+    def _select(self, mask: np.ndarray | None) -> np.ndarray:
+        if mask is None:
+            return self._games
+        return np.flatnonzero(mask)
+
+    def init_game(self, mask: np.ndarray = None, draw_piles: np.ndarray = None) -> None:
+        """
+        Start the selected games (all by default) over: shuffle the tiles and deal initial_tiles
+        private tiles to every player, one player after another as GameHost.init_game does. If
+        draw_piles is given, (selected games, tiles) the tile ids in drawing order, the games are
+        dealt from it instead of shuffled
+        """
+        games = self._select(mask)
+        self.owner[games] = TABLE
+        self.direction[games] = PRIVATE
+        self.history[games] = 0
+        self.temp_tile[games] = -1
+        self.hidden_count[games] = self.initial_tiles
+        self.current_player[games] = 0
+        if draw_piles is None:
+            self.draw_pile[games] = self.np_random.permuted(self.draw_pile[games], axis=1)
+        else:
+            self.draw_pile[games] = draw_piles
+
+        num_dealt = self.num_players * self.initial_tiles
+        dealt_tiles = self.draw_pile[games, :num_dealt]
+        dealt_players = np.arange(num_dealt, dtype=np.int8) % self.num_players
+        self.owner[games[:, None], dealt_tiles] = dealt_players
+        self.draw_count[games] = num_dealt
+
+    def draw_tile(self, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Let the current player of the selected games draw the next tile of the draw pile
+
+        Returns:
+            np.ndarray: (games,) whether a tile was drawn, False where the table is empty
+        """
+        drawn = self.draw_count < self.owner.shape[1]
+        if mask is not None:
+            drawn &= mask
+        games = np.flatnonzero(drawn)
+        tile_ids = self.draw_pile[games, self.draw_count[games]]
+        self.owner[games, tile_ids] = TEMP
+        self.temp_tile[games, self.current_player[games]] = tile_ids
+        self.draw_count[games] += 1
+        return drawn
+
+    def try_guess(
+        self,
+        target_index: np.ndarray,
+        tile_index: np.ndarray,
+        tile_number: np.ndarray,
+        mask: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Let the current player of the selected games guess tile_number on the tile at tile_index in
+        the hand of target_index, with the checks and effects of PlayerTileSet.try_guess
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (games,) the InvalidActionErrorEnum value of each guess or
+                NO_ERROR, and (games,) whether the guess is right; unselected games get NO_ERROR
+                and False
+        """
+        target_index = np.broadcast_to(target_index, self.num_games)
+        tile_index = np.broadcast_to(tile_index, self.num_games)
+        tile_number = np.broadcast_to(tile_number, self.num_games)
+        games = self._games
+        current_player = self.current_player
+        safe_target = np.clip(target_index, 0, self.num_players - 1)
+        safe_number = np.clip(tile_number, 1, self.max_tile_number)
+
+        # the tile at tile_index is the (tile_index + 1)-th smallest tile id held by the target
+        in_hand = self.owner == safe_target[:, None]
+        hand_position = np.cumsum(in_hand, axis=1, dtype=np.int16)
+        hand_size = hand_position[:, -1]
+        tile_id = np.argmax(in_hand & (hand_position == tile_index[:, None] + 1), axis=1)
+        guess_bit = np.left_shift(np.uint32(1), safe_number.astype(np.uint32))
+        history = self.history[games, tile_id, current_player]
+
+        error = np.select(
+            [
+                (target_index < 0) | (target_index >= self.num_players),
+                (safe_target == current_player) | (self.hidden_count[games, safe_target] == 0),
+                (tile_number < 1) | (tile_number > self.max_tile_number),
+                (tile_index < 0) | (tile_index >= hand_size),
+                self.direction[games, tile_id] == PUBLIC,
+                (history & guess_bit) != 0,
+            ],
+            [
+                _ERRORS.TARGET_INDEX_OUT_OF_RANGE.value,
+                _ERRORS.TARGET_ALREADY_LOST.value,
+                _ERRORS.TILE_NUMBER_OUT_OF_RANGE.value,
+                _ERRORS.TILE_INDEX_OUT_OF_RANGE.value,
+                _ERRORS.TILE_ALREADY_PUBLIC.value,
+                _ERRORS.GUESS_ALREADY_MADE.value,
+            ],
+            NO_ERROR,
+        )
+        if mask is not None:
+            error[~mask] = NO_ERROR
+            valid = (error == NO_ERROR) & mask
+        else:
+            valid = error == NO_ERROR
+        correct = valid & (self._tile_numbers[tile_id] == tile_number)
+
+        right = np.flatnonzero(correct)
+        self.direction[right, tile_id[right]] = PUBLIC
+        self.hidden_count[right, safe_target[right]] -= 1
+
+        wrong = np.flatnonzero(valid & ~correct)
+        self.history[wrong, tile_id[wrong], current_player[wrong]] |= guess_bit[wrong]
+        self._place_temp_tile(wrong, PUBLIC)
+        return error, correct
+
+    def _place_temp_tile(self, games: np.ndarray, direction: int) -> None:
+        players = self.current_player[games]
+        temp_tiles = self.temp_tile[games, players]
+        has_temp = temp_tiles >= 0
+        games, players, temp_tiles = games[has_temp], players[has_temp], temp_tiles[has_temp]
+        self.owner[games, temp_tiles] = players
+        self.direction[games, temp_tiles] = direction
+        self.temp_tile[games, players] = -1
+        if direction == PRIVATE:
+            self.hidden_count[games, players] += 1
+
+    def end_turn(self, mask: np.ndarray = None) -> None:
+        """
+        Let the current player of the selected games place the drawn tile privately
+        """
+        self._place_temp_tile(self._select(mask), PRIVATE)
+
+    def next_player(self, mask: np.ndarray = None) -> None:
+        """
+        Move the turn of the selected games to the next player in seat order who has not lost yet
+        """
+        games = self._select(mask)
+        seats = (
+            self.current_player[games, None] + np.arange(1, self.num_players + 1)
+        ) % self.num_players
+        alive = self.hidden_count[games[:, None], seats] > 0
+        self.current_player[games] = seats[np.arange(len(games)), np.argmax(alive, axis=1)]
+
+    def step(
+        self,
+        target_index: np.ndarray,
+        tile_index: np.ndarray,
+        tile_number: np.ndarray,
+        mask: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Play one guess in every selected game that is not over, the way the environments do: after
+        a valid wrong guess the turn passes to the next player, who draws a tile if the table is not
+        empty. After a right guess the player keeps the turn, and an invalid guess changes nothing
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The error codes and the results of try_guess
+        """
+        playing = ~self.is_game_over()
+        if mask is not None:
+            playing &= mask
+        error, correct = self.try_guess(target_index, tile_index, tile_number, playing)
+        passed = playing & (error == NO_ERROR) & ~correct
+        self.next_player(passed)
+        self.draw_tile(passed)
+        return error, correct
+
+    def hand(self, game_index: int, player_index: int) -> np.ndarray:
+        return (self.owner[game_index] == player_index).nonzero()[0]
+
+    def get_alive_mask(self) -> np.ndarray:
+        return self.hidden_count > 0
+
+    def is_game_over(self) -> np.ndarray:
+        return np.count_nonzero(self.hidden_count > 0, axis=1) <= 1
+
+    def get_bitboard(self, game_index: int) -> Bitboard:
+        owner = self.owner[game_index]
+        tile_bits = np.left_shift(1, self._tile_ids, dtype=np.int64)
+        history = []
+        for source_player_index in range(self.num_players):
+            history_mask = 0
+            guess_masks = self.history[game_index, :, source_player_index]
+            for tile_id in guess_masks.nonzero()[0]:
+                guess_mask = int(guess_masks[tile_id]) >> 1
+                history_mask |= guess_mask << int(tile_id) * self.max_tile_number
+            history.append(history_mask)
+        return Bitboard(
+            self.max_tile_number,
+            tuple(
+                int(tile_bits[owner == player_index].sum())
+                for player_index in range(self.num_players)
+            ),
+            int(tile_bits[(owner >= 0) & (self.direction[game_index] == PUBLIC)].sum()),
+            tuple(self.temp_tile[game_index].tolist()),
+            tuple(history),
+        )
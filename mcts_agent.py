@@ -0,0 +1,271 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+import game
+from bitboard import Bitboard, iter_bits
+from sampler import DeterminizationSampler
+
+
+def candidate_guesses(game_host: game.GameHost, player_index: int) -> list[tuple[int, int, int]]:
+    """
+    The guesses (target_index, tile_index, tile_number) a player can make that are not ruled out by
+    what the player sees directly: the colour of the tile, the public tiles around it in the hand of
+    the target, the tiles the player holds and the player's own failed guesses
+    """
+    all_players = game_host.all_players
+    player = all_players[player_index]
+    public = 0
+    for other_player in all_players:
+        public |= other_player.hand_mask & ~other_player.hidden_mask
+    known = public | player.hand_mask
+    if player.temp_tile is not None:
+        known |= 1 << player.temp_tile.tile_id
+    targets = [
+        (target_index, all_players[target_index].hand_mask)
+        for target_index in game_host.alive_players
+        if target_index != player_index
+    ]
+    history_mask = 0
+    for target_index, _ in targets:
+        history_mask |= all_players[target_index].history_masks.get(player_index, 0)
+    return _candidate_guesses(
+        game_host.table_tile_set.max_tile_number, targets, public, known, history_mask
+    )
+
+
+def board_candidate_guesses(board: Bitboard, player_index: int) -> list[tuple[int, int, int]]:
+    """
+    Same as candidate_guesses, for a bitboard
+    """
+    known = board.public | board.hands[player_index]
+    if board.temp_tiles[player_index] >= 0:
+        known |= 1 << board.temp_tiles[player_index]
+    targets = [
+        (target_index, hand)
+        for target_index, hand in enumerate(board.hands)
+        if target_index != player_index and hand & ~board.public
+    ]
+    return _candidate_guesses(
+        board.max_tile_number, targets, board.public, known, board.history[player_index]
+    )
+
+
+def _candidate_guesses(
+    max_tile_number: int, targets: list, public: int, known: int, history_mask: int
+) -> list[tuple[int, int, int]]:
+    guesses = []
+    for target_index, hand_mask in targets:
+        hand = list(iter_bits(hand_mask))
+        upper_bounds = []  # the next public tile id after every position
+        upper = 2 * max_tile_number
+        for tile_id in reversed(hand):
+            upper_bounds.append(upper)
+            if public >> tile_id & 1:
+                upper = tile_id
+        upper_bounds.reverse()
+        lower = -1
+        for tile_index, tile_id in enumerate(hand):
+            if public >> tile_id & 1:
+                lower = tile_id
+                continue
+            first_id = lower + 1 if (lower + 1) % 2 == tile_id % 2 else lower + 2
+            for candidate_id in range(first_id, upper_bounds[tile_index], 2):
+                number = candidate_id // 2 + 1
+                if not known >> candidate_id & 1 and not (
+                    history_mask >> tile_id * max_tile_number + number - 1 & 1
+                ):
+                    guesses.append((target_index, tile_index, number))
+    return guesses
+
+
+class _Node:
+    """
+    A node of the search tree, for the information set reached by the public moves and results so
+    far, with the statistics of every move of the player taking the turn
+    """
+
+    __slots__ = ("visits", "available", "value_sums", "children")
+
+    def __init__(self) -> None:
+        self.visits = {}  # move -> number of times it was chosen
+        self.available = {}  # move -> number of visits where it could be chosen
+        self.value_sums = {}  # move -> sum of the rewards of the player taking the turn
+        self.children = {}  # (move, correct_guess) -> _Node
+
+    def select(self, moves: list, exploration: float, np_random: np.random.Generator):
+        for move in moves:
+            self.available[move] = self.available.get(move, 0) + 1
+        unvisited = [move for move in moves if move not in self.visits]
+        if unvisited:
+            return unvisited[np_random.integers(len(unvisited))]
+        return max(
+            moves,
+            key=lambda move: self.value_sums[move] / self.visits[move]
+            + exploration * math.sqrt(math.log(self.available[move]) / self.visits[move]),
+        )
+
+
+def _search(
+    board: Bitboard,
+    observer: int,
+    iterations: int,
+    deadline: float | None,
+    exploration: float,
+    seed,
+) -> dict:
+    """
+    Run one information-set Monte Carlo tree search, returning the visits and the value sums of the
+    moves of the observer at the root
+    """
+    np_random = np.random.default_rng(seed)
+    determinization_sampler = DeterminizationSampler(board, observer)
+    game_host = game.GameHost(board.num_players, 1, board.max_tile_number, np_random)
+    root = _Node()
+    worlds = []
+    iteration = 0
+    while iteration < iterations and (deadline is None or time.monotonic() < deadline):
+        iteration += 1
+        if not worlds:
+            worlds = determinization_sampler.sample_snapshots(64, np_random)
+        game_host.restore(worlds.pop(), restore_rng=False)
+
+        # selection and expansion, one new node per iteration
+        path = []
+        node = root
+        current_player_index = observer
+        expanded = False
+        while not game_host.is_game_over() and not expanded:
+            moves = candidate_guesses(game_host, current_player_index)
+            move = node.select(moves, exploration, np_random)
+            path.append((node, move, current_player_index))
+            current_player_index, correct_guess = _play(game_host, current_player_index, move)
+            key = (move, correct_guess)
+            if key not in node.children:
+                node.children[key] = _Node()
+                expanded = True
+            node = node.children[key]
+
+        # random playout
+        while not game_host.is_game_over():
+            moves = candidate_guesses(game_host, current_player_index)
+            move = moves[np_random.integers(len(moves))]
+            current_player_index, _ = _play(game_host, current_player_index, move)
+
+        winner_index = next(iter(game_host.alive_players))
+        for node, move, player_index in path:
+            node.visits[move] = node.visits.get(move, 0) + 1
+            node.value_sums[move] = node.value_sums.get(move, 0.0) + (player_index == winner_index)
+    return {move: (root.visits[move], root.value_sums[move]) for move in root.visits}
+
+
+def _play(game_host: game.GameHost, player_index: int, move: tuple) -> tuple[int, bool]:
+    """
+    Play a guess the way the environments do, returning the next player and whether it was right
+    """
+    player = game_host.all_players[player_index]
+    error, correct_guess = player.try_guess(game_host.all_players, player_index, *move)
+    assert error is None, error
+    if correct_guess:
+        return player_index, True
+    player_index = game_host.get_next_player_index(player_index)
+    if len(game_host.table_tile_set.tile_set) > 0:
+        game_host.all_players[player_index].draw_tile(game_host.table_tile_set)
+    return player_index, False
+
+
+class MCTSAgent:
+    """
+    This class chooses guesses with information-set Monte Carlo tree search over determinized worlds
+
+    Every iteration draws a world consistent with what the player has seen with
+    DeterminizationSampler, walks the tree of public moves and results with UCB on the moves that
+    are possible in that world, and finishes the game with random guesses. With several workers,
+    every worker of a process pool searches its own tree and the statistics of the root moves are
+    summed before choosing the most visited one. Once an endgame solver considers the game small
+    enough, it chooses the guesses instead.
+
+    Attributes:
+        iterations (int): The number of iterations of each worker
+        time_limit (float): The time budget of a search in seconds, None for no limit
+        num_workers (int): The number of processes searching in parallel, 1 to search in-process
+        exploration (float): The exploration constant of UCB
+        np_random (np.random.Generator): The random number generator seeding the searches
+        endgame_solver (EndgameSolver): The solver taking over in the endgame, None to always search
+
+    Methods:
+        search: Get the visits and the value sums of the root moves of a player
+        select_action: Get the guess (target_index, tile_index, tile_number) of a player
+        close: Shut the process pool down
+    """
+
+    def __init__(
+        self,
+        iterations: int = 1000,
+        time_limit: float = None,
+        num_workers: int = 1,
+        exploration: float = 0.7,
+        np_random: np.random.Generator = None,
+        endgame_solver=None,
+    ) -> None:
+        assert iterations > 0 and num_workers > 0, "Invalid search budget"
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.num_workers = num_workers
+        self.exploration = exploration
+        self.np_random = np_random if np_random else np.random.default_rng()
+        self.endgame_solver = endgame_solver
+        self._executor = None
+        if num_workers > 1:  # started up front so that the first search stays within time_limit
+            self._executor = ProcessPoolExecutor(num_workers)
+
+    def search(self, board: Bitboard, player_index: int) -> dict:
+        """
+        Search the moves of player_index, who has to guess next in the game state board, which must
+        not be over
+
+        Returns:
+            dict: (target_index, tile_index, tile_number) -> (visits, value sum) of every move tried
+        """
+        if board.is_game_over():
+            raise ValueError("The game is over, there is no guess to search")
+        deadline = None
+        if self.time_limit is not None:
+            deadline = time.monotonic() + self.time_limit
+        seeds = self.np_random.integers(2**63, size=self.num_workers).tolist()
+        args = (board, player_index, self.iterations, deadline, self.exploration)
+        if self.num_workers == 1:
+            results = [_search(*args, seeds[0])]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.num_workers)
+            futures = [self._executor.submit(_search, *args, seed) for seed in seeds]
+            results = [future.result() for future in futures]
+
+        statistics = {}
+        for result in results:
+            for move, (visits, value_sum) in result.items():
+                total_visits, total_value_sum = statistics.get(move, (0, 0.0))
+                statistics[move] = (total_visits + visits, total_value_sum + value_sum)
+        return statistics
+
+    def select_action(self, game_host, player_index: int) -> tuple[int, int, int]:
+        board = game_host.get_bitboard()
+        if board.is_game_over():
+            raise ValueError("The game is over, there is no guess to select")
+        if self.endgame_solver is not None and self.endgame_solver.is_endgame(board):
+            return self.endgame_solver.solve(board, player_index).best_guess
+        statistics = self.search(board, player_index)
+        return max(statistics, key=lambda move: statistics[move])
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "MCTSAgent":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
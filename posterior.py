@@ -0,0 +1,260 @@
+from collections import OrderedDict, defaultdict
+import numpy as np
+
+from bitboard import Bitboard, iter_bits
+from constraint_solver import CandidateSolver
+
+
+class Posterior:
+    """
+    This class holds the exact probabilities of the numbers of the tiles, as seen by one observer
+
+    Every assignment of the unseen tiles to the hidden tiles that is consistent with what the
+    observer has seen is taken as equally likely, failed guesses being constraints on the tiles
+
+    Attributes:
+        observer (int): The index of the player whose information is used
+        world_count (int): The number of consistent assignments of the hidden tiles
+        hand_probabilities (tuple[np.ndarray]): For each player, (tiles, max_tile_number) the
+            probability of every number of every tile, in the order of get_tile_list
+        temp_probabilities (tuple[np.ndarray | None]): For each player, (max_tile_number,) the
+            probability of every number of the tile just drawn, None if there is none
+
+    Methods:
+        guess_probability: Get the probability that a guess is right
+    """
+
+    def __init__(
+        self,
+        observer: int,
+        world_count: int,
+        hand_probabilities: tuple[np.ndarray, ...],
+        temp_probabilities: tuple[np.ndarray | None, ...],
+    ) -> None:
+        self.observer = observer
+        self.world_count = world_count
+        self.hand_probabilities = hand_probabilities
+        self.temp_probabilities = temp_probabilities
+
+    def guess_probability(self, target_index: int, tile_index: int, tile_number: int) -> float:
+        return float(self.hand_probabilities[target_index][tile_index, tile_number - 1])
+
+
+class AssignmentCounter:
+    """
+    This class counts the assignments of the unseen tile ids to the hidden tiles of one observer
+    that are consistent with what the observer has seen, with dynamic programming
+
+    The candidate tile ids are visited in ascending order and every one either goes to the next
+    hidden tile of a hand, to a drawn tile or stays on the table. Since the hands are sorted, the
+    state of the count is only how far each hand has been filled and which drawn tiles are taken:
+    a tuple with the position in every hand and a bitmask of the drawn tiles taken. The candidates
+    of CandidateSolver bound which tile ids each hidden tile can take.
+
+    Attributes:
+        board (Bitboard): The game state
+        observer (int): The index of the player whose information is used
+        slots (list[tuple[int, int | None]]): The hidden tiles as (player_index, tile_index), the
+            tiles of the hands in order and then the drawn tiles, whose tile_index is None
+        slot_tile_ids (list[int]): The tile id each hidden tile has in board
+        tile_ids (list[int]): The candidate tile ids, in the order they are visited
+        forward (list[dict]): For every layer, the number of ways to reach each state
+        backward (list[dict]): For every layer, the number of ways to finish from each state, only
+            for the states that can be reached
+        world_count (int): The number of consistent assignments
+
+    Methods:
+        transitions: Get the hidden tile taking a tile id and the next state, for every choice
+        slot_counts: Get the number of assignments giving each tile id to each hidden tile
+        assignments: Get every consistent assignment
+    """
+
+    def __init__(self, board: Bitboard, observer: int, solver: CandidateSolver = None) -> None:
+        if solver is None:
+            solver = CandidateSolver(observer, board)
+        self.board = board
+        self.observer = observer
+        self.slots = []
+        self.slot_tile_ids = []
+        slot_candidates = []
+        self._chain_offsets = []  # The slot of the first hidden tile of each hand
+        self._chain_lengths = []
+        for player_index, hand in enumerate(board.hands):
+            if player_index == observer:
+                continue
+            candidate_ids = solver.candidate_ids(player_index)
+            offset = len(self.slots)
+            for tile_index, tile_id in enumerate(iter_bits(hand)):
+                if not board.public >> tile_id & 1:
+                    self.slots.append((player_index, tile_index))
+                    self.slot_tile_ids.append(tile_id)
+                    slot_candidates.append(candidate_ids[tile_index])
+            if len(self.slots) > offset:
+                self._chain_offsets.append(offset)
+                self._chain_lengths.append(len(self.slots) - offset)
+        self._temp_offset = len(self.slots)
+        for player_index, temp_tile_id in enumerate(board.temp_tiles):
+            if player_index != observer and temp_tile_id >= 0:
+                self.slots.append((player_index, None))
+                self.slot_tile_ids.append(temp_tile_id)
+                slot_candidates.append(solver.temp_candidate_ids(player_index))
+        self._slot_candidates = slot_candidates
+
+        candidates = 0
+        for id_mask in slot_candidates:
+            candidates |= id_mask
+        self.tile_ids = list(iter_bits(candidates))  # the other unseen tiles stay on the table
+        num_temps = len(self.slots) - self._temp_offset
+        self.start_state = (0,) * len(self._chain_lengths) + (0,)
+        self.final_state = (*self._chain_lengths, (1 << num_temps) - 1)
+
+        self.forward = [{self.start_state: 1}]
+        for tile_id in self.tile_ids:
+            counts = defaultdict(int)
+            for state, count in self.forward[-1].items():
+                for _, next_state in self.transitions(state, tile_id):
+                    counts[next_state] += count
+            self.forward.append(counts)
+        self.world_count = self.forward[-1].get(self.final_state, 0)
+
+        self.backward = [None] * len(self.tile_ids) + [{self.final_state: 1}]
+        for layer in reversed(range(len(self.tile_ids))):
+            tile_id = self.tile_ids[layer]
+            next_counts = self.backward[layer + 1]
+            counts = {}
+            for state in self.forward[layer]:
+                count = 0
+                for _, next_state in self.transitions(state, tile_id):
+                    count += next_counts.get(next_state, 0)
+                if count:
+                    counts[state] = count
+            self.backward[layer] = counts
+
+    def transitions(self, state: tuple, tile_id: int):
+        """
+        Yield the slot of the hidden tile taking tile_id, -1 for the table, and the next state
+        """
+        yield -1, state
+        for chain, offset in enumerate(self._chain_offsets):
+            position = state[chain]
+            if (
+                position < self._chain_lengths[chain]
+                and self._slot_candidates[offset + position] >> tile_id & 1
+            ):
+                yield offset + position, state[:chain] + (position + 1,) + state[chain + 1 :]
+        taken = state[-1]
+        for temp in range(len(self.slots) - self._temp_offset):
+            slot = self._temp_offset + temp
+            if not taken >> temp & 1 and self._slot_candidates[slot] >> tile_id & 1:
+                yield slot, state[:-1] + (taken | 1 << temp,)
+
+    def assignments(self):
+        """
+        Yield every consistent assignment as a tuple of the tile id of each hidden tile, in the
+        order of slots
+        """
+        assignment = [0] * len(self.slots)
+
+        def visit(layer: int, state: tuple):
+            if layer == len(self.tile_ids):
+                yield tuple(assignment)
+                return
+            tile_id = self.tile_ids[layer]
+            next_counts = self.backward[layer + 1]
+            for slot, next_state in self.transitions(state, tile_id):
+                if next_state in next_counts:
+                    if slot >= 0:
+                        assignment[slot] = tile_id
+                    yield from visit(layer + 1, next_state)
+
+        if self.world_count:
+            yield from visit(0, self.start_state)
+
+    def slot_counts(self) -> np.ndarray:
+        """
+        (slots, tile ids) the number of consistent assignments giving each tile id to each hidden
+        tile, as Python ints
+        """
+        counts = np.zeros((len(self.slots), 2 * self.board.max_tile_number), dtype=object)
+        for layer, tile_id in enumerate(self.tile_ids):
+            next_counts = self.backward[layer + 1]
+            for state, forward_count in self.forward[layer].items():
+                for slot, next_state in self.transitions(state, tile_id):
+                    if slot >= 0 and next_state in next_counts:
+                        counts[slot, tile_id] += forward_count * next_counts[next_state]
+        return counts
+
+
+class PosteriorEngine:
+    """
+    This class computes Posterior objects by counting the consistent assignments of the hidden tiles
+    with AssignmentCounter, caching the results by the information state of the observer
+
+    Attributes:
+        cache_size (int): The number of posteriors kept in the cache
+
+    Methods:
+        posterior: Get the posterior of an observer for a bitboard
+        clear_cache: Forget every cached posterior
+    """
+
+    def __init__(self, cache_size: int = 4096) -> None:
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def posterior(
+        self, board: Bitboard, observer: int, solver: CandidateSolver = None
+    ) -> Posterior:
+        """
+        Get the posterior of observer for a bitboard, e.g. game_host.get_bitboard(). A solver
+        already up to date with the bitboard for the same observer can be given to skip solving the
+        candidates again
+        """
+        key = (board.public_hash(observer), observer)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        posterior = self._count(AssignmentCounter(board, observer, solver))
+        self._cache[key] = posterior
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return posterior
+
+    @staticmethod
+    def _count(counter: AssignmentCounter) -> Posterior:
+        board, observer = counter.board, counter.observer
+        max_tile_number = board.max_tile_number
+        hand_probabilities = []
+        for player_index, hand in enumerate(board.hands):
+            probabilities = np.zeros((hand.bit_count(), max_tile_number))
+            for tile_index, tile_id in enumerate(iter_bits(hand)):
+                if player_index == observer or board.public >> tile_id & 1:
+                    probabilities[tile_index, tile_id >> 1] = 1.0
+            hand_probabilities.append(probabilities)
+        temp_probabilities = [None] * board.num_players
+        temp_tile_id = board.temp_tiles[observer]
+        if temp_tile_id >= 0:
+            temp_probabilities[observer] = np.zeros(max_tile_number)
+            temp_probabilities[observer][temp_tile_id >> 1] = 1.0
+        for player_index, temp_tile_id in enumerate(board.temp_tiles):
+            if player_index != observer and temp_tile_id >= 0:
+                temp_probabilities[player_index] = np.zeros(max_tile_number)
+        if counter.world_count == 0:
+            return Posterior(observer, 0, tuple(hand_probabilities), tuple(temp_probabilities))
+
+        # every tile has one colour, so the tile ids of a tile map to distinct numbers
+        id_counts = counter.slot_counts()
+        probabilities = ((id_counts[:, 0::2] + id_counts[:, 1::2]) / counter.world_count).astype(
+            np.float64
+        )
+        for slot, (player_index, tile_index) in enumerate(counter.slots):
+            if tile_index is None:
+                temp_probabilities[player_index] = probabilities[slot]
+            else:
+                hand_probabilities[player_index][tile_index] = probabilities[slot]
+        return Posterior(
+            observer, counter.world_count, tuple(hand_probabilities), tuple(temp_probabilities)
+        )
@@ -0,0 +1,175 @@
+import numpy as np
+
+import game
+from bitboard import Bitboard
+from constraint_solver import CandidateSolver
+from posterior import AssignmentCounter
+
+
+class DeterminizationSampler:
+    """
+    This class draws complete assignments of the hidden tiles of one observer, uniformly among the
+    assignments consistent with what the observer has seen, many at a time and without rejection
+
+    A sample walks the layers of AssignmentCounter from the first candidate tile id to the last,
+    choosing where each tile id goes with a probability proportional to the number of ways to
+    finish from the next state, which makes every consistent assignment equally likely. The choices
+    of all the samples of a layer are made at once with NumPy.
+
+    Attributes:
+        board (Bitboard): The game state the samples are drawn for
+        observer (int): The index of the player whose information is used
+        counter (AssignmentCounter): The counts of the consistent assignments
+        slots (list[tuple[int, int | None]]): The hidden tiles as (player_index, tile_index), see
+            AssignmentCounter.slots
+
+    Methods:
+        sample: Draw the tile ids of the hidden tiles
+        sample_bitboards: Draw complete game states
+        sample_snapshots: Draw complete game states as snapshots to restore into a game host
+        sample_game_hosts: Draw complete game states as new game hosts
+    """
+
+    def __init__(self, board: Bitboard, observer: int, solver: CandidateSolver = None) -> None:
+        self.board = board
+        self.observer = observer
+        self.counter = AssignmentCounter(board, observer, solver)
+        if self.counter.world_count == 0:
+            raise ValueError("No assignment of the hidden tiles is consistent with the observation")
+        self.slots = self.counter.slots
+
+        # for every layer and every state, the cumulative probability, slot and next state of
+        # every choice, padded so the extra choices are never taken
+        self._cumulative = []
+        self._choice_slots = []
+        self._next_states = []
+        next_indices = {self.counter.final_state: 0}
+        for layer in reversed(range(len(self.counter.tile_ids))):
+            tile_id = self.counter.tile_ids[layer]
+            next_counts = self.counter.backward[layer + 1]
+            states = self.counter.backward[layer]
+            indices = {state: index for index, state in enumerate(states)}
+            choices = [
+                [
+                    (slot, next_state)
+                    for slot, next_state in self.counter.transitions(state, tile_id)
+                    if next_state in next_counts
+                ]
+                for state in states
+            ]
+            width = max(len(state_choices) for state_choices in choices)
+            cumulative = np.full((len(states), width), np.inf)
+            choice_slots = np.full((len(states), width), -1, dtype=np.int16)
+            next_states = np.zeros((len(states), width), dtype=np.int32)
+            for index, (state, state_choices) in enumerate(zip(states, choices)):
+                count = 0
+                for choice, (slot, next_state) in enumerate(state_choices):
+                    count += next_counts[next_state]
+                    cumulative[index, choice] = count / states[state]
+                    choice_slots[index, choice] = slot
+                    next_states[index, choice] = next_indices[next_state]
+                cumulative[index, len(state_choices) - 1] = np.inf  # absorb rounding errors
+            self._cumulative.append(cumulative)
+            self._choice_slots.append(choice_slots)
+            self._next_states.append(next_states)
+            next_indices = indices
+        self._cumulative.reverse()
+        self._choice_slots.reverse()
+        self._next_states.reverse()
+        self._start_index = next_indices[self.counter.start_state]
+
+    def sample(self, num_samples: int, np_random: np.random.Generator) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: (num_samples, slots) the tile id drawn for every hidden tile
+        """
+        tile_ids = np.empty((num_samples, len(self.slots)), dtype=np.int16)
+        samples = np.arange(num_samples)
+        states = np.full(num_samples, self._start_index, dtype=np.int32)
+        uniforms = np_random.random((len(self.counter.tile_ids), num_samples, 1))
+        for layer, tile_id in enumerate(self.counter.tile_ids):
+            choices = np.count_nonzero(uniforms[layer] >= self._cumulative[layer][states], axis=1)
+            slots = self._choice_slots[layer][states, choices]
+            taken = slots >= 0
+            tile_ids[samples[taken], slots[taken]] = tile_id
+            states = self._next_states[layer][states, choices]
+        return tile_ids
+
+    def sample_bitboards(self, num_samples: int, np_random: np.random.Generator) -> list[Bitboard]:
+        """
+        Draw complete game states, the hidden tiles being replaced by the drawn tile ids together
+        with their failed guesses, and the other unseen tiles going to the table
+        """
+        return assignment_bitboards(self.counter, self.sample(num_samples, np_random).tolist())
+
+    def sample_snapshots(
+        self, num_samples: int, np_random: np.random.Generator
+    ) -> list[game.GameSnapshot]:
+        """
+        Draw complete game states as snapshots without a draw pile, so restoring one shuffles the
+        table with the random number generator of the game host
+        """
+        return [
+            game.GameSnapshot(bitboard, None)
+            for bitboard in self.sample_bitboards(num_samples, np_random)
+        ]
+
+    def sample_game_hosts(
+        self, game_host: game.GameHost, num_samples: int, np_random: np.random.Generator
+    ) -> list[game.GameHost]:
+        """
+        Draw complete game states as new game hosts of the same class and settings as game_host,
+        each with its own random number generator spawned from np_random
+        """
+        game_hosts = []
+        for snapshot, host_random in zip(
+            self.sample_snapshots(num_samples, np_random), np_random.spawn(num_samples)
+        ):
+            sampled_host = type(game_host)(
+                len(game_host.all_players),
+                game_host.initial_tiles,
+                game_host.table_tile_set.max_tile_number,
+                host_random,
+            )
+            sampled_host.restore(snapshot, restore_rng=False)
+            game_hosts.append(sampled_host)
+        return game_hosts
+
+
+def assignment_bitboards(counter: AssignmentCounter, assignments) -> list[Bitboard]:
+    """
+    The complete game states of assignments of the hidden tiles of counter, e.g. the samples of
+    DeterminizationSampler or AssignmentCounter.assignments: the hidden tiles are replaced by the
+    assigned tile ids together with their failed guesses, and the other unseen tiles go to the table
+    """
+    board = counter.board
+    max_tile_number = board.max_tile_number
+    number_mask = (1 << max_tile_number) - 1
+    hidden_bits = 0
+    for tile_id in counter.slot_tile_ids:
+        hidden_bits |= 1 << tile_id
+    guesses = [
+        [history >> tile_id * max_tile_number & number_mask for history in board.history]
+        for tile_id in counter.slot_tile_ids
+    ]
+    history_mask = 0
+    for tile_id in counter.slot_tile_ids:
+        history_mask |= number_mask << tile_id * max_tile_number
+    kept_hands = [hand & ~hidden_bits for hand in board.hands]
+    kept_history = [history & ~history_mask for history in board.history]
+
+    bitboards = []
+    for assignment in assignments:
+        hands = kept_hands.copy()
+        temp_tiles = list(board.temp_tiles)
+        history = kept_history.copy()
+        for slot, tile_id in enumerate(assignment):
+            player_index, tile_index = counter.slots[slot]
+            if tile_index is None:
+                temp_tiles[player_index] = tile_id
+            else:
+                hands[player_index] |= 1 << tile_id
+            for source_player_index, guess_mask in enumerate(guesses[slot]):
+                history[source_player_index] |= guess_mask << tile_id * max_tile_number
+        bitboards.append(Bitboard(max_tile_number, hands, board.public, temp_tiles, history))
+    return bitboards
@@ -0,0 +1,69 @@
+import json
+import copy
+import benchmark_envs
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the environment benchmarks
+    """
+
+    def test_benchmarks(self, tmp_path):
+        report = benchmark_envs.run_benchmarks(
+            env_ids=["DavinciCode-v0", "DavinciCode-v2"],
+            num_players_list=[2],
+            max_tile_nums=[4],
+            initial_tiles_list=[2, 4],
+            num_steps=30,
+            num_resets=3,
+        )
+        results = {benchmark_envs.result_key(result): result for result in report["results"]}
+        assert len(results) == 2 * 2 * 2
+        assert results["DavinciCode-v0", "object", 2, 4, 2, "masked"]["skipped"] == "no action mask"
+        assert "skipped" in results["DavinciCode-v2", "object", 2, 4, 4, "random"]
+        result = results["DavinciCode-v2", "object", 2, 4, 2, "masked"]
+        assert result["steps_per_s"] > 0 and result["resets_per_s"] > 0
+        latency = result["latency_us"]
+        assert 0 < latency["p50"] <= latency["p90"] <= latency["p99"]
+        assert result["memory_per_env"] > result["observation_bytes"] > 0
+        engine_results = report["engine_results"]
+        assert [result.get("skipped") for result in engine_results] == [
+            None,
+            "not enough tiles to deal",
+        ]
+
+        # a report is compared with a stored baseline
+        assert benchmark_envs.compare_results(report, report) == []
+        slower = copy.deepcopy(report)
+        for slower_result in slower["results"]:
+            if "skipped" not in slower_result:
+                slower_result["steps_per_s"] /= 2
+        regressions = benchmark_envs.compare_results(slower, report)
+        assert len(regressions) == 3 and all("steps_per_s" in line for line in regressions)
+
+        baseline_path = tmp_path / "baseline.json"
+        output_path = tmp_path / "results.json"
+        baseline = copy.deepcopy(report)
+        for baseline_result in baseline["results"]:
+            if "skipped" not in baseline_result:
+                baseline_result["steps_per_s"] *= 100
+        baseline_path.write_text(json.dumps(baseline))
+        argv = ["--envs", "DavinciCode-v2", "--players", "2", "--max-tile-nums", "4"]
+        argv += ["--initial-tiles", "2", "--steps", "30", "--resets", "3"]
+        argv += ["--output", str(output_path)]
+        assert benchmark_envs.main(argv) == 0
+        assert len(json.loads(output_path.read_text())["results"]) == 2
+        assert benchmark_envs.main(argv + ["--baseline", str(baseline_path)]) == 1
+
+    def test_engine_benchmarks(self):
+        results = {
+            engine: benchmark_envs.benchmark_engine(
+                engine, 3, 12, 4, num_games=20, num_snapshots=200
+            )
+            for engine in ["object", "array"]
+        }
+        # only the results are checked, the speeds are compared with a baseline by the command line
+        for engine, result in results.items():
+            assert benchmark_envs.engine_result_key(result) == (engine, 3, 12, 4)
+            assert result["num_moves"] > 0
+            assert all(result[metric] > 0 for metric in benchmark_envs.ENGINE_METRICS)
@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import game
+import constraint_solver
+from bitboard import Bitboard
+from testing_helpers import play_random_game
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the candidate solver
+    """
+
+    INITIAL_TILES = 4
+    MAX_TILE_NUMBER = 11
+
+    @pytest.fixture(params=[2, 3, 4])
+    def setup_init(self, request):
+        game_host = game.GameHost(
+            request.param,
+            self.INITIAL_TILES,
+            self.MAX_TILE_NUMBER,
+            np.random.default_rng(request.param),
+        )
+        game_host.init_game()
+        return game_host
+
+    def test_candidates(self, setup_init):
+        game_host = setup_init
+        number_players = len(game_host.all_players)
+        solvers = [
+            constraint_solver.CandidateSolver(observer) for observer in range(number_players)
+        ]
+        for board in play_random_game(game_host, np.random.default_rng(0)):
+            for solver in solvers:
+                solver.update(board)
+                from_scratch = constraint_solver.CandidateSolver(solver.observer, board)
+                for player_index, player in enumerate(game_host.all_players):
+                    candidate_ids = solver.candidate_ids(player_index)
+                    assert candidate_ids == from_scratch.candidate_ids(player_index)
+                    assert solver.temp_candidate_ids(player_index) == (
+                        from_scratch.temp_candidate_ids(player_index)
+                    )
+                    for tile_index, tile in enumerate(player.get_tile_list()):
+                        assert candidate_ids[tile_index] >> tile.tile_id & 1  # never ruled out
+                        assert solver.is_possible(player_index, tile_index, tile.number)
+                        if player_index == solver.observer or tile.direction_value == game.PUBLIC:
+                            assert candidate_ids[tile_index] == 1 << tile.tile_id
+
+    def test_propagation(self):
+        # player 1 holds four black tiles, the last one public with number 4, so the hidden ones
+        # are black 1, 2 and 3 in this order
+        max_tile_number = 6
+        hands = (1 << 1 | 1 << 3 | 1 << 5, 1 << 0 | 1 << 2 | 1 << 4 | 1 << 6)
+        board = Bitboard(max_tile_number, hands, 1 << 6, (-1, -1), (0, 0))
+        solver = constraint_solver.CandidateSolver(0, board)
+        assert solver.candidate_numbers(1) == (0b1, 0b10, 0b100, 0b1000)
+
+        # five of the six black tiles leave two numbers for the first and the last of them
+        hands = (1 << 1 | 1 << 3, 1 << 0 | 1 << 2 | 1 << 4 | 1 << 6 | 1 << 8)
+        board = Bitboard(max_tile_number, hands, 0, (-1, -1), (0, 0))
+        solver = constraint_solver.CandidateSolver(0, board)
+        assert solver.candidate_numbers(1)[0] == 0b11
+        assert solver.candidate_numbers(1)[4] == 0b110000
+
+        # a failed guess of 1 on the first tile leaves 2, which is ruled out of the second tile
+        history = (1 << 0 * max_tile_number + 0, 0)
+        solver.update(Bitboard(max_tile_number, hands, 0, (-1, -1), history))
+        assert solver.candidate_numbers(1)[:2] == (0b10, 0b100)
+        assert not solver.is_possible(1, 1, 2)
@@ -0,0 +1,32 @@
+import pytest
+import numpy as np
+import game
+import davinci_code_env_v1
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the DavinciCode-v1 environment
+    """
+
+    @pytest.mark.filterwarnings("error::RuntimeWarning")
+    @pytest.mark.parametrize("dtype", [np.uint8, np.int64])
+    def test_distance_reward(self, dtype):
+        rewards = {}
+        for offset in [0, 1, -1, 3]:
+            env = davinci_code_env_v1.DavinciCodeEnv()
+            env.reset(seed=0)
+            # the first private tile of the next player, at relative target index 0
+            target = env.game_host.all_players[1]
+            tile_index, tile = next(
+                (tile_index, tile)
+                for tile_index, tile in enumerate(target.get_tile_list())
+                if tile.direction_value == game.PRIVATE
+                and 1 <= tile.number + offset <= env._max_tile_num
+            )
+            action = np.array([0, tile_index, tile.number + offset - 1], dtype=dtype)
+            _, reward, terminated, _, info = env.step(action)
+            assert not terminated and info["correct_guess"] == (offset == 0)
+            rewards[offset] = float(reward)
+        # the reward falls with the distance between the guess and the number on the tile
+        assert rewards == {0: 5.0, 1: 4.0, -1: 4.0, 3: 2.0}
@@ -0,0 +1,295 @@
+import pytest
+import numpy as np
+import gymnasium as gym
+import game
+import davinci_code_env_v2
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the DavinciCode-v2 environment
+    """
+
+    MAX_TILE_NUMBER = 12
+
+    @pytest.fixture(params=[(2, "object"), (3, "array"), (4, "object")])
+    def setup_init(self, request):
+        num_players, engine = request.param
+        return davinci_code_env_v2.DavinciCodeEnv(
+            num_players=num_players, max_tile_num=self.MAX_TILE_NUMBER, engine=engine
+        )
+
+    @staticmethod
+    def build_obs(env):
+        """
+        Build the observation from scratch, from the tiles of the game host
+        """
+        max_tile_number = env._max_tile_num
+        current_player_index = env._current_player_index
+
+        def get_tile_obs(tile, force_visible):
+            tile_obs = np.zeros(max_tile_number + 4)
+            if tile is not None:
+                tile_obs[0] = 1
+                tile_obs[1 + tile.color_value] = 1
+                if tile.direction_value == game.PUBLIC or force_visible:
+                    tile_obs[tile.number + 3] = 1
+                else:
+                    tile_obs[3] = 1
+            return tile_obs
+
+        main_obs = np.zeros((env._num_players, 2 * max_tile_number, max_tile_number + 4))
+        for player_index, player in enumerate(env.game_host.all_players):
+            for tile_index, tile in enumerate(player.get_tile_list()):
+                main_obs[player_index, tile_index] = get_tile_obs(
+                    tile, player_index == current_player_index
+                )
+        main_obs = np.roll(main_obs, -current_player_index, axis=0)
+        temp_tile = env.game_host.all_players[current_player_index].temp_tile
+
+        action_mask = np.zeros((env._num_players, 2 * max_tile_number, max_tile_number))
+        for player_index, player in enumerate(env.game_host.all_players):
+            for tile_index, tile in enumerate(player.get_tile_list()):
+                for number in range(1, max_tile_number + 1):
+                    action_mask[player_index, tile_index, number - 1] = (
+                        tile.direction_value == game.PRIVATE
+                        and not tile.is_guessed(current_player_index, number)
+                    )
+        action_mask = np.roll(action_mask, -current_player_index, axis=0)[1:]
+        return np.concatenate(
+            [main_obs.flatten(), get_tile_obs(temp_tile, True), action_mask.flatten()]
+        )
+
+    def test_incremental_obs(self, setup_init):
+        env = setup_init
+        action_rng = np.random.default_rng(0)
+        for episode in range(5):
+            observation, info = env.reset(seed=episode)
+            observations = [observation]
+            terminated = truncated = False
+            while not (terminated or truncated):
+                assert observation.dtype == np.float64
+                assert (observation == self.build_obs(env)).all()
+                # the action mask of info is the one of the observation
+                assert np.shares_memory(info["action_mask"], observation)
+                assert (observation[-len(info["action_mask"]) :] == info["action_mask"]).all()
+                if len(observations) == 10:  # rebuild the caches from a snapshot
+                    env.game_host.restore(env.game_host.snapshot())
+                valid_actions = np.flatnonzero(info["action_mask"])
+                action = int(action_rng.choice(valid_actions))
+                observation, reward, terminated, truncated, info = env.step(action)
+                observations.append(observation)
+            # the observations returned earlier are not overwritten by later steps
+            assert not all((observations[0] == later).all() for later in observations[1:])
+
+    @pytest.mark.parametrize("num_players", [2, 3, 4])
+    def test_vector_env(self, num_players):
+        num_envs = 4
+        vector_env = gym.make_vec(
+            "DavinciCode-v2",
+            num_envs=num_envs,
+            vectorization_mode="vector_entry_point",
+            num_players=num_players,
+            max_episode_steps=60,
+        )
+        assert isinstance(vector_env, davinci_code_env_v2.DavinciCodeVectorEnv)
+        envs = [
+            gym.make("DavinciCode-v2", num_players=num_players, max_episode_steps=60)
+            for _ in range(num_envs)
+        ]
+        # sub-environment i seeded with seed + i plays the game of a single environment
+        observations, infos = vector_env.reset(seed=7)
+        for env_index, env in enumerate(envs):
+            observation, _ = env.reset(seed=7 + env_index)
+            assert (observations[env_index] == observation).all()
+
+        action_rng = np.random.default_rng(0)
+        autoreset = [False] * num_envs
+        num_episodes = 0
+        for _ in range(150):
+            actions = [
+                action_rng.choice(np.flatnonzero(action_mask)) if action_mask.any() else 0
+                for action_mask in infos["action_mask"]
+            ]
+            observations, rewards, terminations, truncations, infos = vector_env.step(actions)
+            assert np.shares_memory(infos["action_mask"], observations)
+            for env_index, env in enumerate(envs):
+                if autoreset[env_index]:  # the finished games are reset on the next step
+                    observation, info = env.reset()
+                    reward, terminated, truncated = 0, False, False
+                else:
+                    observation, reward, terminated, truncated, info = env.step(actions[env_index])
+                autoreset[env_index] = terminated or truncated
+                num_episodes += autoreset[env_index]
+                assert (observations[env_index] == observation).all()
+                for key in ["current_player_index", "correct_guess", "invalid_action"]:
+                    assert infos[key][env_index] == info[key]
+                assert rewards[env_index] == pytest.approx(reward)
+                assert (terminations[env_index], truncations[env_index]) == (terminated, truncated)
+        assert num_episodes > num_envs
+
+        # the engine of the single environments is accepted, while the games are always played
+        # on the VectorGameHost
+        vector_env = davinci_code_env_v2.DavinciCodeVectorEnv(num_envs, engine="array")
+        assert isinstance(vector_env.game_host, davinci_code_env_v2.game_vector.VectorGameHost)
+        with pytest.raises(AssertionError, match="Invalid engine"):
+            davinci_code_env_v2.DavinciCodeVectorEnv(num_envs, engine="bitboard")
+
+    def test_vector_env_invalid_actions(self):
+        vector_envs = [davinci_code_env_v2.DavinciCodeVectorEnv(8) for _ in range(2)]
+        results = []
+        for vector_env in vector_envs:
+            observations, infos = vector_env.reset(seed=0)
+            # guess a number already excluded on every game
+            actions = np.argmin(infos["action_mask"], axis=1)
+            observations, rewards, terminations, truncations, infos = vector_env.step(actions)
+            assert infos["invalid_action"].all()
+            assert (rewards == -0.1).all()
+            # a random valid guess was played instead: it was right or the turn passed
+            assert (infos["correct_guess"] | (infos["current_player_index"] == 1)).all()
+            results.append(observations)
+        # the replacements are sampled from the seeded streams of the sub-environments
+        assert (results[0] == results[1]).all()
+
+        # which are the streams of the single environments reset with the same seeds
+        for env_index in range(8):
+            env = davinci_code_env_v2.DavinciCodeEnv()
+            _, info = env.reset(seed=env_index)
+            action = np.argmin(info["action_mask"])
+            observation, reward, _, _, info = env.step(action)
+            assert info["invalid_action"] and reward == -0.1
+            assert (observation == results[0][env_index]).all()
+
+    @pytest.mark.parametrize("observation_mode", ["uint8", "packed"])
+    def test_observation_modes(self, observation_mode):
+        envs = [
+            davinci_code_env_v2.DavinciCodeEnv(observation_mode=mode)
+            for mode in ["float64", observation_mode]
+        ]
+        vector_env = davinci_code_env_v2.DavinciCodeVectorEnv(
+            2, max_episode_steps=300, observation_mode=observation_mode
+        )
+        observation_len = envs[0].observation_space.n
+
+        def decode(observations):
+            if observation_mode == "packed":
+                assert observations.shape[-1] == (observation_len + 7) // 8
+                return davinci_code_env_v2.unpack_observations(observations, observation_len)
+            return observations
+
+        action_rng = np.random.default_rng(0)
+        (observation, info), (compact_observation, compact_info) = [
+            env.reset(seed=1) for env in envs
+        ]
+        vector_observations, vector_infos = vector_env.reset(seed=[1, 1])
+        for _ in range(30):
+            assert compact_observation.dtype == np.uint8
+            assert envs[1].observation_space.contains(compact_observation)
+            assert (decode(compact_observation) == observation).all()
+            assert (decode(vector_observations) == observation).all()
+            assert (compact_info["action_mask"] == info["action_mask"]).all()
+            assert (vector_infos["action_mask"] == info["action_mask"]).all()
+            action = int(action_rng.choice(np.flatnonzero(info["action_mask"])))
+            observation, _, terminated, _, info = envs[0].step(action)
+            compact_observation, _, _, _, compact_info = envs[1].step(action)
+            vector_observations, _, _, _, vector_infos = vector_env.step([action, action])
+            if terminated:
+                break
+
+    @staticmethod
+    def base_array(array):
+        while array.base is not None:
+            array = array.base
+        return array
+
+    @pytest.mark.parametrize("observation_mode", ["float64", "uint8"])
+    def test_dict_observation(self, observation_mode):
+        envs = [
+            davinci_code_env_v2.DavinciCodeEnv(
+                observation_mode=observation_mode, observation_layout=layout
+            )
+            for layout in ["flat", "dict"]
+        ]
+        vector_env = davinci_code_env_v2.DavinciCodeVectorEnv(
+            2,
+            autoreset_mode=gym.vector.AutoresetMode.SAME_STEP,
+            observation_mode=observation_mode,
+            observation_layout="dict",
+        )
+        main_obs_len = envs[0]._main_obs.size
+        action_rng = np.random.default_rng(0)
+        (observation, info), (fields, fields_info) = [env.reset(seed=2) for env in envs]
+        vector_fields, vector_infos = vector_env.reset(seed=[2, 2])
+        for _ in range(300):
+            assert envs[1].observation_space.contains(fields)
+            assert set(fields) == {"tiles", "drawn_tile", "action_mask"}
+            # every field is a view into one buffer, the action mask of info being the same view
+            assert len({id(self.base_array(field)) for field in fields.values()}) == 1
+            assert fields_info["action_mask"] is fields["action_mask"]
+            assert (fields["tiles"].flatten() == observation[:main_obs_len]).all()
+            assert (
+                np.concatenate([field.reshape(-1) for field in fields.values()]) == observation
+            ).all()
+            for key, field in fields.items():
+                assert (vector_fields[key] == field).all()
+            action = int(action_rng.choice(np.flatnonzero(info["action_mask"])))
+            observation, _, terminated, _, info = envs[0].step(action)
+            fields, _, _, _, fields_info = envs[1].step(action)
+            vector_fields, _, _, _, vector_infos = vector_env.step([action, action])
+            if terminated:
+                break
+        assert terminated
+        # the vector environment reset on the same step and kept the final observations
+        assert vector_infos["_final_obs"].all()
+        for key, field in fields.items():
+            assert (vector_infos["final_obs"][0][key] == field).all()
+        assert not (vector_fields["tiles"][0] == fields["tiles"]).all()
+
+    @pytest.mark.parametrize("observation_layout", ["flat", "dict"])
+    def test_factored_actions(self, observation_layout):
+        flat_env = davinci_code_env_v2.DavinciCodeEnv()
+        env = davinci_code_env_v2.DavinciCodeEnv(
+            action_mode="factored", observation_layout=observation_layout
+        )
+        vector_env = davinci_code_env_v2.DavinciCodeVectorEnv(
+            2, observation_layout=observation_layout, action_mode="factored"
+        )
+        num_targets, num_tiles, num_numbers = env.action_space.nvec
+        # the masks of the observation grow with the targets plus the tiles
+        main_obs_len = flat_env._action_mask_start
+        assert env._obs_len == main_obs_len + num_targets * (1 + num_tiles)
+
+        action_rng = np.random.default_rng(0)
+        flat_observation, flat_info = flat_env.reset(seed=3)
+        observation, info = env.reset(seed=3)
+        vector_observations, vector_infos = vector_env.reset(seed=[3, 3])
+        terminated = False
+        while not terminated:
+            assert env.observation_space.contains(observation)
+            action_mask = flat_info["action_mask"].reshape(num_targets, num_tiles, num_numbers)
+            assert (info["action_mask"]["number"] == action_mask).all()
+            assert (info["action_mask"]["tile"] == action_mask.any(axis=2)).all()
+            assert (info["action_mask"]["target"] == action_mask.any(axis=(1, 2))).all()
+            if observation_layout == "dict":
+                assert info["action_mask"]["tile"] is observation["tile_mask"]
+                tiles = observation["tiles"].flatten()
+                assert (tiles == flat_observation[: flat_env._main_obs.size]).all()
+            else:
+                assert np.shares_memory(info["action_mask"]["tile"], observation)
+                assert (observation[:main_obs_len] == flat_observation[:main_obs_len]).all()
+            for key, mask in info["action_mask"].items():
+                assert (vector_infos["action_mask"][key][0] == mask).all()
+
+            flat_action = int(action_rng.choice(np.flatnonzero(action_mask)))
+            action = np.array(np.unravel_index(flat_action, action_mask.shape))
+            flat_observation, flat_reward, terminated, _, flat_info = flat_env.step(flat_action)
+            observation, reward, _, _, info = env.step(action)
+            vector_observations, rewards, _, _, vector_infos = vector_env.step([action, action])
+            assert reward == flat_reward and (rewards == reward).all()
+
+        # a component out of range is invalid like a number already excluded
+        observation, info = env.reset(seed=0)
+        excluded = np.argwhere(info["action_mask"]["number"] == 0)[0]
+        for action in [excluded, [0, 0, num_numbers], [num_targets, 0, 0]]:
+            _, reward, _, _, info = env.step(np.array(action))
+            assert info["invalid_action"] and reward == -0.1
@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+import game
+import endgame_solver
+import mcts_agent
+from bitboard import Bitboard
+from sampler import DeterminizationSampler
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the endgame solver
+    """
+
+    NUM_GAMES = 600
+
+    @staticmethod
+    def play(game_host, player_index, solver):
+        """
+        Play a game to the end with the guesses of the solver, returning the winner
+        """
+        while not game_host.is_game_over():
+            guess = solver.select_action(game_host, player_index)
+            player = game_host.all_players[player_index]
+            error, correct_guess = player.try_guess(game_host.all_players, player_index, *guess)
+            assert error is None
+            if not correct_guess:
+                player_index = game_host.get_next_player_index(player_index)
+                if len(game_host.table_tile_set.tile_set) > 0:
+                    game_host.all_players[player_index].draw_tile(game_host.table_tile_set)
+        return next(iter(game_host.alive_players))
+
+    def test_winning_guess(self):
+        # player 1 only hides black 3, since black 4 is public and player 0 holds the other tiles
+        board = Bitboard(4, (0b1111, 1 << 4 | 1 << 6), 1 << 6, (5, -1), (0, 0))
+        solver = endgame_solver.EndgameSolver(hidden_tile_threshold=7)
+        assert solver.is_endgame(board)
+        result = solver.solve(board, 0)
+        assert result.best_guess == (1, 0, 3)
+        assert result.value == 1.0
+        assert set(result.guess_values) == set(mcts_agent.board_candidate_guesses(board, 0))
+
+        game_host = game.GameHost(2, 2, 4, np.random.default_rng(0))
+        game_host.restore(game.GameSnapshot(board, None), restore_rng=False)
+        agent = mcts_agent.MCTSAgent(iterations=1, endgame_solver=solver)
+        assert agent.select_action(game_host, 0) == (1, 0, 3)
+
+    def test_turn(self):
+        # nobody holds a drawn tile, so only the player given to solve tells whose turn it is
+        board = Bitboard(3, (1 << 0 | 1 << 3, 1 << 2 | 1 << 5), 0, (-1, -1), (0, 0))
+        solver = endgame_solver.EndgameSolver(hidden_tile_threshold=8)
+        for player_index in [0, 1]:
+            result = solver.solve(board, player_index)
+            expected = endgame_solver.EndgameSolver(hidden_tile_threshold=8).solve(
+                board, player_index
+            )
+            assert result.player_index == player_index
+            assert result.guess_values == expected.guess_values
+
+    @pytest.mark.parametrize(
+        "board",
+        [
+            Bitboard(3, (1 << 0 | 1 << 3, 1 << 2 | 1 << 5), 0, (1, -1), (0, 0)),
+            Bitboard(4, (1 << 0 | 1 << 3 | 1 << 6, 1 << 2 | 1 << 5 | 1 << 7), 0, (1, -1), (0, 0)),
+        ],
+    )
+    def test_solve(self, board):
+        solver = endgame_solver.EndgameSolver(hidden_tile_threshold=8)
+        result = solver.solve(board, 0)
+        assert 0.0 < result.value < 1.0
+        assert result.value == max(result.guess_values.values())
+        assert result.guess_values[result.best_guess] == result.value
+
+        # the winning frequency of the solution played from the worlds the player cannot tell apart
+        # matches its value
+        game_host = game.GameHost(2, 2, board.max_tile_number, np.random.default_rng(0))
+        game_host.restore(game.GameSnapshot(board, None), restore_rng=False)
+        determinization_sampler = DeterminizationSampler(board, 0)
+        wins = 0
+        for sampled_host in determinization_sampler.sample_game_hosts(
+            game_host, self.NUM_GAMES, np.random.default_rng(1)
+        ):
+            wins += self.play(sampled_host, 0, solver) == 0
+        assert abs(wins / self.NUM_GAMES - result.value) < 0.06
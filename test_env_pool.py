@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import gymnasium as gym
+import davinci_code_env_v1
+import davinci_code_env_v2
+from env_pool import EnvPool
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the shared-memory environment pool
+    """
+
+    NUM_ENVS = 5
+
+    @staticmethod
+    def sample_actions(action_masks, action_rng):
+        """
+        Sample one valid flat action index from each action mask, 0 where there is none
+        """
+        action_masks = action_masks.reshape(len(action_masks), -1)
+        return np.array(
+            [
+                action_rng.choice(np.flatnonzero(action_mask)) if action_mask.any() else 0
+                for action_mask in action_masks
+            ]
+        )
+
+    @pytest.mark.parametrize("use_vector_entry_point", [True, False])
+    def test_v2(self, use_vector_entry_point):
+        pool = EnvPool(
+            "DavinciCode-v2",
+            self.NUM_ENVS,
+            num_workers=2,
+            use_vector_entry_point=use_vector_entry_point,
+            max_episode_steps=40,
+        )
+        vector_env = davinci_code_env_v2.DavinciCodeVectorEnv(self.NUM_ENVS, max_episode_steps=40)
+        try:
+            observations, infos = pool.reset(seed=3)
+            expected_observations, expected_infos = vector_env.reset(seed=3)
+            assert observations.dtype == expected_observations.dtype
+            assert (observations == expected_observations).all()
+            action_rng = np.random.default_rng(0)
+            for _ in range(100):
+                actions = self.sample_actions(infos["action_mask"], action_rng)
+                results = pool.step(actions)
+                expected_results = vector_env.step(actions)
+                for result, expected_result in zip(results[:4], expected_results[:4]):
+                    assert (result == expected_result).all()
+                infos = results[4]
+                for key in ["current_player_index", "correct_guess", "action_mask"]:
+                    assert (infos[key] == expected_results[4][key]).all()
+                    assert infos[f"_{key}"].all()
+        finally:
+            pool.close()
+
+    def test_v1(self):
+        pool = EnvPool("DavinciCode-v1", self.NUM_ENVS, num_workers=2)
+        envs = [gym.make("DavinciCode-v1") for _ in range(self.NUM_ENVS)]
+        try:
+            observations, infos = pool.reset(seed=0)
+            assert set(observations) == {"observation", "action_mask"}
+            action_rng = np.random.default_rng(0)
+            for env_index, env in enumerate(envs):
+                env.reset(seed=env_index)
+            for _ in range(20):
+                action_masks = observations["action_mask"]
+                flat_actions = self.sample_actions(action_masks, action_rng)
+                actions = np.stack(
+                    np.unravel_index(flat_actions, action_masks.shape[1:]), axis=1
+                ).astype(pool.single_action_space.dtype)
+                observations, rewards, terminations, truncations, infos = pool.step(actions)
+                for env_index, env in enumerate(envs):
+                    observation, reward, terminated, truncated, info = env.step(actions[env_index])
+                    for key in observation:
+                        assert (observations[key][env_index] == observation[key]).all()
+                    assert rewards[env_index] == reward
+                    assert infos["current_player_index"][env_index] == info["current_player_index"]
+                    if terminated or truncated:
+                        return
+        finally:
+            pool.close()
+
+    def test_worker_error(self):
+        pool = EnvPool("DavinciCode-v1", 2, num_workers=1)
+        try:
+            pool.reset(seed=0)
+            with pytest.raises(RuntimeError):
+                pool.step(np.full((2, 3), 200))  # the target player does not exist
+        finally:
+            pool.close()
+
+        # the single environment renders, but the vector environments fail to build in the workers
+        with pytest.raises(RuntimeError, match="does not render"):
+            EnvPool("DavinciCode-v2", 4, num_workers=2, render_mode="human")
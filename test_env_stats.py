@@ -0,0 +1,106 @@
+import pytest
+import numpy as np
+import gymnasium as gym
+import davinci_code_env
+import davinci_code_env_v1
+import davinci_code_env_v2
+from env_pool import EnvPool
+from env_stats import PHASES, StepStats
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the step statistics of the environments
+    """
+
+    NUM_STEPS = 200
+
+    @pytest.fixture(
+        params=[
+            davinci_code_env.DavinciCodeEnv,
+            davinci_code_env_v1.DavinciCodeEnv,
+            davinci_code_env_v2.DavinciCodeEnv,
+        ]
+    )
+    def setup_init(self, request):
+        return request.param
+
+    @staticmethod
+    def record_laps(stats):
+        """
+        Make the statistics record the phase of every lap in the returned list
+        """
+        phases = []
+        lap = stats.lap
+
+        def record_lap(phase, *args):
+            phases.append(phase)
+            lap(phase, *args)
+
+        stats.lap = record_lap
+        return phases
+
+    def test_step_stats(self, setup_init):
+        env_class = setup_init
+        env = env_class(collect_stats=True)
+        env.action_space.seed(0)
+        _, info = env.reset(seed=0)
+        assert set(info["step_stats"]) == set(PHASES)
+        phases = self.record_laps(env.step_stats)
+        num_resets, num_invalid_actions = 1, 0
+        for _ in range(self.NUM_STEPS):
+            phases.clear()
+            _, _, terminated, truncated, info = env.step(env.action_space.sample())
+            # every phase is charged in a single lap
+            assert len(phases) == len(set(phases))
+            num_invalid_actions += info["invalid_action"]
+            assert info["step_stats"]["guess"] > 0 and info["step_stats"]["reset"] == 0
+            if terminated or truncated:
+                env.reset()
+                num_resets += 1
+        stats = env.step_stats
+        assert stats.counts["guess"] == stats.counts["turn"] == self.NUM_STEPS
+        assert stats.counts["reset"] == num_resets
+        assert stats.counts["observation"] == self.NUM_STEPS + num_resets
+        assert stats.counts["invalid_action"] == num_invalid_actions > 0
+        summary = stats.summary()
+        assert all(summary[phase]["total_s"] > 0 for phase in ["guess", "turn", "observation"])
+
+        merged = StepStats.merge(stats, stats)
+        assert merged.counts["guess"] == 2 * self.NUM_STEPS
+        assert merged.times["guess"] == 2 * stats.times["guess"]
+        stats.clear()
+        assert sum(stats.times.values()) == 0
+
+    def test_vector_step_stats(self):
+        num_envs = 4
+        vector_env = davinci_code_env_v2.DavinciCodeVectorEnv(num_envs, collect_stats=True)
+        env = davinci_code_env_v2.DavinciCodeVectorEnv(num_envs)
+        observations, infos = vector_env.reset(seed=0)
+        env.reset(seed=0)
+        actions = np.zeros(num_envs, dtype=np.int64)  # mostly invalid
+        phases = self.record_laps(vector_env.step_stats)
+        num_invalid_actions = 0
+        for _ in range(20):
+            phases.clear()
+            observations, _, _, _, infos = vector_env.step(actions)
+            assert len(phases) == len(set(phases))
+            # collecting the statistics does not change the games
+            assert (env.step(actions)[0] == observations).all()
+            num_invalid_actions += infos["invalid_action"].sum()
+        stats = vector_env.step_stats
+        assert stats.counts["guess"] == 20 * num_envs
+        assert stats.counts["invalid_action"] == num_invalid_actions
+        assert stats.counts["observation"] == stats.counts["action_mask"] == 21 * num_envs
+        assert (infos["step_stats"]["guess"] > 0).all()
+
+        # the statistics of the workers of a pool add up in the infos
+        pool = EnvPool("DavinciCode-v2", num_envs, num_workers=2, collect_stats=True)
+        try:
+            pool.reset(seed=0)
+            _, _, _, _, infos = pool.step(actions)
+            assert infos["_step_stats"].all()
+            assert set(infos["step_stats"]) == set(PHASES)
+            assert sum(infos["step_stats"]["guess"]) > 0
+        finally:
+            pool.close()
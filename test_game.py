@@ -1,7 +1,9 @@
 import pytest
 import itertools
 import random as rd
+import numpy as np
 import game
+import bitboard
 
 
 class TestClass:
@@ -127,3 +129,178 @@ class TestClass:
                 tile.direction = game.Tile.Directions.PUBLIC
 
         assert game_host.is_game_over() == True
+
+    def test_bitboard(self, setup_init, request):
+        game_host = setup_init
+        number_players = request.node.callspec.params["setup_init"]
+        game_host.all_players[0].draw_tile(game_host.table_tile_set)
+        target_tile = game_host.all_players[1].get_tile_list()[0]
+        wrong_number = target_tile.number % self.MAX_TILE_NUMBER + 1
+        assert (
+            game_host.all_players[0].make_guess(game_host.all_players, 0, 1, 0, wrong_number)
+            == False
+        )
+
+        board = game_host.get_bitboard()
+        assert board.guesses(0, target_tile.tile_id) == 1 << wrong_number - 1
+        assert board.temp_tiles == (-1,) * number_players
+        assert bin(board.table).count("1") == len(game_host.table_tile_set.tile_set)
+        for player_index, player in enumerate(game_host.all_players):
+            assert board.hands[player_index] == sum(1 << tile.tile_id for tile in player.tile_set)
+            assert board.hidden_count(player_index) == player.get_hidden_tile_count()
+            assert board.hidden_count(player_index) == sum(
+                tile.direction == game.Tile.Directions.PRIVATE for tile in player.tile_set
+            )
+            assert board.is_lose(player_index) == player.is_lose()
+        assert board.is_game_over() == game_host.is_game_over()
+        assert board == game_host.get_bitboard()
+        assert board.public_hash() == game_host.get_bitboard().public_hash()
+
+        target_tile.direction = game.Tile.Directions.PUBLIC
+        assert game_host.get_bitboard().public_hash() != board.public_hash()
+
+    def test_public_hash(self):
+        # the second hand swaps the private black 1 for a private black 2
+        board = bitboard.Bitboard(3, (0b000001, 0b110000), 0b100000, (-1, -1), (0, 0))
+        swapped_board = bitboard.Bitboard(3, (0b000100, 0b110000), 0b100000, (-1, -1), (0, 0))
+        assert board.public_hash() == swapped_board.public_hash()
+        assert board.public_hash(observer=1) == swapped_board.public_hash(observer=1)
+        assert board.public_hash(observer=0) != swapped_board.public_hash(observer=0)
+        assert board.state_hash() != swapped_board.state_hash()
+        assert board.hidden_count(1) == 1 and board.is_lose(1) == False
+
+    def test_sorted_tile_list(self, setup_init, request):
+        game_host = setup_init
+        number_players = request.node.callspec.params["setup_init"]
+        for draw in range(0, 2 * self.MAX_TILE_NUMBER - number_players * self.INITIAL_TILES):
+            player = game_host.all_players[draw % number_players]
+            player.draw_tile(game_host.table_tile_set)
+            player.end_turn()
+
+        for tile_set in [game_host.table_tile_set] + game_host.all_players:
+            tile_list = tile_set.get_tile_list()
+            assert tile_list == tuple(sorted(tile_set.tile_set, key=game.tile_sort_key))
+            assert tile_set.get_tile_list() is tile_list  # cached until the tile_set changes
+
+    def test_next_player_skips_losers(self, setup_init, request):
+        game_host = setup_init
+        number_players = request.node.callspec.params["setup_init"]
+        assert game_host.hidden_tile_counts == [self.INITIAL_TILES] * number_players
+        assert game_host.get_next_player_index(number_players - 1) == 0
+
+        for tile in game_host.all_players[1].tile_set:
+            tile.direction = game.Tile.Directions.PUBLIC
+        assert game_host.hidden_tile_counts[1] == 0
+        assert game_host.get_next_player_index(0) == 2 % number_players
+        assert game_host.all_players[1] not in game_host.get_remaining_players()
+        with pytest.raises(ValueError):  # test the exception with a player who already lost
+            game_host.get_next_player_index(1)
+        assert game_host.is_game_over() == (number_players == 2)
+
+    def test_try_guess(self, setup_init, request):
+        game_host = setup_init
+        number_players = request.node.callspec.params["setup_init"]
+        errors = game.PlayerTileSet.InvalidActionErrorEnum
+        player = game_host.all_players[0]
+        assert player.try_guess(game_host.all_players, 0, 0, 0, 1) == (
+            errors.TARGET_ALREADY_LOST,
+            False,
+        )
+        assert player.try_guess(game_host.all_players, 0, number_players, 0, 1) == (
+            errors.TARGET_INDEX_OUT_OF_RANGE,
+            False,
+        )
+        assert player.try_guess(game_host.all_players, 0, 1, self.INITIAL_TILES, 1) == (
+            errors.TILE_INDEX_OUT_OF_RANGE,
+            False,
+        )
+        assert player.try_guess(game_host.all_players, 0, 1, 0, 0) == (
+            errors.TILE_NUMBER_OUT_OF_RANGE,
+            False,
+        )
+
+        player.draw_tile(game_host.table_tile_set)
+        temp_tile = player.temp_tile
+        target_tile = game_host.all_players[1].get_tile_list()[0]
+        wrong_number = target_tile.number % self.MAX_TILE_NUMBER + 1
+        assert player.try_guess(game_host.all_players, 0, 1, 0, wrong_number) == (None, False)
+        assert temp_tile in player.tile_set and temp_tile.direction == game.Tile.Directions.PUBLIC
+        assert player.try_guess(game_host.all_players, 0, 1, 0, wrong_number) == (
+            errors.GUESS_ALREADY_MADE,
+            False,
+        )
+        assert player.try_guess(game_host.all_players, 0, 1, 0, target_tile.number) == (None, True)
+        assert player.try_guess(game_host.all_players, 0, 1, 0, target_tile.number) == (
+            errors.TILE_ALREADY_PUBLIC,
+            False,
+        )
+        with pytest.raises(ValueError):  # make_guess still raises the same errors
+            player.make_guess(game_host.all_players, 0, 1, 0, target_tile.number)
+
+    def test_snapshot_restore(self, setup_init, request):
+        game_host = setup_init
+        number_players = request.node.callspec.params["setup_init"]
+
+        def play(game_host):
+            for player_index, player in enumerate(game_host.all_players):
+                player.draw_tile(game_host.table_tile_set)
+                player.try_guess(game_host.all_players, player_index, (player_index + 1) % 2, 0, 1)
+                player.end_turn()
+            return game_host.get_bitboard()
+
+        snapshot = game_host.snapshot()
+        first_result = play(game_host)
+        assert first_result != snapshot.bitboard
+
+        game_host.restore(snapshot)
+        assert game_host.get_bitboard() == snapshot.bitboard
+        assert play(game_host) == first_result  # the random number generator is restored too
+
+        game_host.restore(snapshot)
+        fork = game_host.fork()
+        assert play(fork) == first_result
+        assert game_host.get_bitboard() == snapshot.bitboard  # the fork is independent
+        assert fork.get_bitboard() != game_host.get_bitboard()
+
+    def test_draw_pile(self, setup_init, request):
+        game_host = setup_init
+        number_players = request.node.callspec.params["setup_init"]
+        table_tile_set = game_host.table_tile_set
+        draw_pile = table_tile_set.get_draw_pile()
+        assert sorted(draw_pile) == [tile.tile_id for tile in table_tile_set.get_tile_list()]
+
+        player = game_host.all_players[0]
+        player.draw_tile(table_tile_set)
+        assert player.temp_tile.tile_id == draw_pile[0]
+        assert table_tile_set.get_draw_pile() == draw_pile[1:]
+        assert player.temp_tile not in table_tile_set.tile_set
+
+        # the same seed deals and draws the same tiles
+        boards = []
+        for _ in range(2):
+            seeded_host = game.GameHost(
+                number_players, self.INITIAL_TILES, self.MAX_TILE_NUMBER, np.random.default_rng(0)
+            )
+            seeded_host.init_game()
+            seeded_host.all_players[0].draw_tile(seeded_host.table_tile_set)
+            boards.append(seeded_host.get_bitboard())
+        assert boards[0] == boards[1]
+
+        # without a draw pile in the snapshot the table is shuffled again
+        snapshot = game.GameSnapshot(game_host.get_bitboard(), None)
+        game_host.restore(snapshot, restore_rng=False)
+        assert game_host.get_bitboard() == snapshot.bitboard
+        assert sorted(table_tile_set.get_draw_pile()) == sorted(draw_pile[1:])
+
+    def test_tile_history(self):
+        tile = game.Tile(game.Tile.Colors.WHITE, 5)
+        assert not hasattr(tile, "__dict__")
+        assert tile.tile_id == 9 and tile.color == game.Tile.Colors.WHITE
+        assert tile.history_guesses == {} and not tile.is_guessed(2, 3)
+        tile.add_history_guess(2, 3)
+        tile.add_history_guess(2, 7)
+        tile.add_history_guess(0, np.uint8(12))
+        assert tile.history_guesses == {0: {12}, 2: {3, 7}}
+        assert tile.is_guessed(2, 3) and tile.is_guessed(0, np.uint8(12))
+        assert not tile.is_guessed(1, 3) and not tile.is_guessed(2, 4)
+        assert tile.get_guess_mask(2) == 1 << 3 | 1 << 7 and tile.get_guess_mask(5) == 0
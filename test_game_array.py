@@ -0,0 +1,247 @@
+import pytest
+import numpy as np
+import gymnasium as gym
+import game
+import game_array
+import davinci_code_env
+import davinci_code_env_v1
+from bitboard import Bitboard
+from testing_helpers import play_random_game
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the array-backed engine against the object engine
+    """
+
+    INITIAL_TILES = 4
+    MAX_TILE_NUMBER = 11
+
+    @pytest.fixture(params=[2, 3, 4])
+    def setup_init(self, request):
+        game_hosts = []
+        for host_class in (game.GameHost, game_array.ArrayGameHost):
+            game_host = host_class(
+                request.param,
+                self.INITIAL_TILES,
+                self.MAX_TILE_NUMBER,
+                np.random.default_rng(request.param),
+            )
+            game_host.init_game()
+            game_hosts.append(game_host)
+        return game_hosts
+
+    @staticmethod
+    def describe(game_host):
+        players = []
+        for player in game_host.all_players:
+            tiles = [
+                (tile.color, tile.number, tile.direction, tile.history_guesses)
+                for tile in player.get_tile_list()
+            ]
+            temp_tile = player.temp_tile
+            temp = None if temp_tile is None else (temp_tile.color, temp_tile.number)
+            players.append((tiles, temp, player.is_lose(), player.get_hidden_tile_count()))
+        table = [(tile.color, tile.number) for tile in game_host.table_tile_set.get_tile_list()]
+        draw_pile = game_host.table_tile_set.get_draw_pile()
+        return players, table, draw_pile, game_host.is_game_over(), game_host.get_bitboard()
+
+    @staticmethod
+    def check_hands(array_host):
+        """
+        Check the cached hands of every owner against the owner array
+        """
+        state = array_host.state
+        for owner in range(game_array.TEMP, state.num_players):
+            assert state.hand(owner) == tuple(np.flatnonzero(state.owner == owner).tolist())
+            assert [tile.tile_id for tile in state.hand_tiles(owner)] == list(state.hand(owner))
+        for player in array_host.all_players:
+            assert player.get_tile_list() is player.get_tile_list()
+        players = list(reversed(range(state.num_players)))
+        tile_ids, owners, tile_indices = state.hand_arrays(players, players[0])
+        hands = [list(state.hand(player_index)) for player_index in players]
+        if state.temp_tile[players[0]] >= 0:
+            hands[0] = sorted(hands[0] + [state.temp_tile[players[0]]])
+        assert list(zip(tile_ids, owners, tile_indices)) == [
+            (tile_id, owner, tile_index)
+            for owner, hand in enumerate(hands)
+            for tile_index, tile_id in enumerate(hand)
+        ]
+
+    def test_init(self, setup_init):
+        object_host, array_host = setup_init
+        assert self.describe(object_host) == self.describe(array_host)
+        for player in array_host.all_players:
+            assert len(player.tile_set) == self.INITIAL_TILES
+        self.check_hands(array_host)
+
+        # the tile ids and the guessed numbers are kept in the bits of fixed-size integers
+        game_array.ArrayGameHost(2, 1, game_array.MAX_TILE_NUMBER)
+        with pytest.raises(ValueError, match="max_tile_number"):
+            game_array.ArrayGameHost(2, 1, game_array.MAX_TILE_NUMBER + 1)
+
+    @pytest.mark.parametrize("env_id", ["DavinciCode-v0", "DavinciCode-v1"])
+    @pytest.mark.parametrize("num_players", [2, 3, 4])
+    def test_envs(self, env_id, num_players):
+        # the environments build the observations and action masks of the array engine with
+        # array operations, which give the same results
+        envs = [
+            gym.make(
+                env_id,
+                num_players=num_players,
+                max_tile_num=self.MAX_TILE_NUMBER,
+                initial_tiles=3,
+                engine=engine,
+            )
+            for engine in ["object", "array"]
+        ]
+        action_rng = np.random.default_rng(num_players)
+        observations = [env.reset(seed=0)[0] for env in envs]
+        for step_index in range(200):
+            if isinstance(observations[0], dict):
+                for key in observations[0]:
+                    assert (observations[0][key] == observations[1][key]).all()
+                valid_actions = np.argwhere(observations[0]["action_mask"])
+                action = valid_actions[action_rng.integers(len(valid_actions))]
+            else:
+                assert (observations[0] == observations[1]).all()
+                action = action_rng.integers(envs[0].action_space.nvec)
+            results = [env.step(action.astype(np.uint8)) for env in envs]
+            assert results[0][1:4] == results[1][1:4]
+            observations = [observation for observation, *_ in results]
+            if results[0][2] or results[0][3]:
+                observations = [env.reset(seed=step_index)[0] for env in envs]
+
+    def test_random_game(self, setup_init):
+        object_host, array_host = setup_init
+        number_players = len(object_host.all_players)
+        action_rng = np.random.default_rng(0)
+        current_player_index = 0
+        for game_host in setup_init:
+            game_host.all_players[current_player_index].draw_tile(game_host.table_tile_set)
+
+        while not object_host.is_game_over():
+            action = (
+                int(action_rng.integers(number_players)),
+                int(action_rng.integers(2 * self.MAX_TILE_NUMBER)),
+                int(action_rng.integers(1, self.MAX_TILE_NUMBER + 1)),
+            )
+            results = []
+            for game_host in setup_init:
+                try:
+                    results.append(
+                        game_host.all_players[current_player_index].make_guess(
+                            game_host.all_players, current_player_index, *action
+                        )
+                    )
+                except ValueError as e:
+                    results.append(e.args[0])
+            assert results[0] == results[1]
+            if results[0] is False:
+                next_player_index = object_host.get_next_player_index(current_player_index)
+                assert next_player_index == array_host.get_next_player_index(current_player_index)
+                current_player_index = next_player_index
+                for game_host in setup_init:
+                    if len(game_host.table_tile_set.tile_set) > 0:
+                        game_host.all_players[current_player_index].draw_tile(
+                            game_host.table_tile_set
+                        )
+            assert self.describe(object_host) == self.describe(array_host)
+            self.check_hands(array_host)
+
+        assert array_host.is_game_over()
+        assert len(array_host.get_remaining_players()) == 1
+
+    def test_snapshot_across_engines(self, setup_init):
+        object_host, array_host = setup_init
+        for game_host in setup_init:
+            game_host.all_players[0].draw_tile(game_host.table_tile_set)
+            game_host.all_players[0].try_guess(game_host.all_players, 0, 1, 0, 1)
+
+        array_snapshot = array_host.snapshot()
+        object_fork = object_host.fork()
+        object_fork.restore(array_snapshot)
+        assert self.describe(object_fork) == self.describe(array_host)
+
+        array_fork = array_host.fork()
+        array_fork.restore(object_host.snapshot())
+        assert self.describe(array_fork) == self.describe(object_host)
+
+        array_fork.all_players[1].draw_tile(array_fork.table_tile_set)
+        array_fork.all_players[1].end_turn()
+        assert self.describe(array_fork) != self.describe(array_host)
+        array_fork.restore(array_snapshot)
+        assert self.describe(array_fork) == self.describe(array_host)
+        self.check_hands(array_fork)
+        self.check_hands(array_host)
+        assert array_snapshot.state.owner.flags.writeable == False
+
+    class BoardFollower:
+        """
+        A subscriber keeping the bitboard, the remaining players and the player taking the turn up
+        to date from the events of a game host alone
+        """
+
+        def __init__(self, game_host):
+            self.game_host = game_host
+            self.events = []
+            self.current_player_index = None
+
+        def __call__(self, event):
+            self.events.append(repr(event))
+            bit = 1 << event.tile_id if event.tile_id >= 0 else 0
+            if event.event_type == game.GameEvent.Types.GAME_RESET:
+                board = self.game_host.get_bitboard()
+                self.max_tile_number = board.max_tile_number
+                self.hands, self.public = list(board.hands), board.public
+                self.temp_tiles, self.history = list(board.temp_tiles), list(board.history)
+                self.alive_players = set(self.game_host.alive_players)
+            elif event.event_type == game.GameEvent.Types.TILE_DRAWN:
+                self.temp_tiles[event.player_index] = event.tile_id
+            elif event.event_type == game.GameEvent.Types.TILE_PLACED:
+                self.temp_tiles[event.player_index] = -1
+                self.hands[event.player_index] |= bit
+                if event.public:
+                    self.public |= bit
+            elif event.event_type == game.GameEvent.Types.GUESS_FAILED:
+                guess_bit = event.tile_id * self.max_tile_number + event.number - 1
+                self.history[event.source_player_index] |= 1 << guess_bit
+            elif event.event_type == game.GameEvent.Types.TILE_REVEALED:
+                self.public |= bit
+            elif event.event_type == game.GameEvent.Types.PLAYER_ELIMINATED:
+                self.alive_players.remove(event.player_index)
+            elif event.event_type == game.GameEvent.Types.TURN_PASSED:
+                self.current_player_index = event.player_index
+
+        def get_bitboard(self):
+            return Bitboard(
+                self.max_tile_number, self.hands, self.public, self.temp_tiles, self.history
+            )
+
+    def test_events(self, setup_init):
+        followers = []
+        for game_host in setup_init:
+            follower = self.BoardFollower(game_host)
+            game_host.subscribe(follower)
+            game_host.init_game()
+            followers.append(follower)
+            for board in play_random_game(game_host, np.random.default_rng(0)):
+                assert follower.get_bitboard() == board
+                assert follower.alive_players == set(game_host.alive_players)
+                temp_players = [
+                    index for index, tile_id in enumerate(board.temp_tiles) if tile_id >= 0
+                ]
+                if temp_players and follower.current_player_index is not None:
+                    assert temp_players == [follower.current_player_index]
+            assert len(follower.alive_players) == 1
+
+            game_host.restore(game_host.fork().snapshot())
+            assert follower.events[-1].startswith("GameEvent(GAME_RESET")
+            game_host.unsubscribe(follower)
+            game_host.init_game()
+            assert follower.get_bitboard() != game_host.get_bitboard()
+
+        # both engines publish the same events
+        assert followers[0].events == followers[1].events
+        assert followers[0].events[0].startswith("GameEvent(GAME_RESET")
+        assert sum(event.startswith("GameEvent(GAME_RESET") for event in followers[0].events) == 2
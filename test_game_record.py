@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import game
+import game_array
+import game_record
+from testing_helpers import play_random_game
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the game records
+    """
+
+    INITIAL_TILES = 3
+    MAX_TILE_NUMBER = 12
+
+    @pytest.fixture(params=[2, 3, 4])
+    def setup_init(self, request):
+        return request.param
+
+    @staticmethod
+    def record_game(host_class, num_players, seed, max_tile_number=MAX_TILE_NUMBER):
+        """
+        Record a random game, returning the record and the bitboard after every move
+        """
+        game_host = host_class(
+            num_players,
+            TestClass.INITIAL_TILES,
+            max_tile_number,
+            np.random.default_rng(seed),
+        )
+        game_host.recorder = game_record.GameRecorder(seed)
+        game_host.init_game()
+        boards = {0: game_host.get_bitboard()}
+        for board in play_random_game(game_host, np.random.default_rng(seed)):
+            boards[len(game_host.recorder.get_record())] = board
+        return game_host.recorder.get_record(), boards
+
+    def test_record(self, setup_init):
+        num_players = setup_init
+        record, boards = self.record_game(game.GameHost, num_players, 0)
+        data = record.to_bytes()
+        assert len(data) == 17 + 2 * self.MAX_TILE_NUMBER + 2 * len(record)
+        # records of version 1, which only had 2-byte moves, are still read
+        assert game_record.GameRecord.from_bytes(data[:4] + b"\x01" + data[5:]) == record
+        assert game_record.GameRecord.from_bytes(data) == record
+        assert game_record.GameRecord.from_bytes(data).seed == 0
+        # both engines record the same game for the same seed
+        array_record, _ = self.record_game(game_array.ArrayGameHost, num_players, 0)
+        assert array_record.to_bytes() == data
+        assert len({record, array_record, self.record_game(game.GameHost, num_players, 1)[0]}) == 2
+
+        kinds = [move[0] for move in record.decode_moves()]
+        assert game_record.GUESS in kinds and game_record.DRAW in kinds
+        assert game_record.DIRECT_DRAW not in kinds  # the deal follows from the draw pile
+
+    @pytest.mark.parametrize("host_class", [game.GameHost, game_array.ArrayGameHost])
+    def test_replay(self, setup_init, host_class):
+        num_players = setup_init
+        record, boards = self.record_game(game.GameHost, num_players, 2)
+        replayer = game_record.GameReplayer(record, host_class, checkpoint_interval=8)
+        assert replayer.snapshot().bitboard == boards[len(record)]
+        for move_count in np.random.default_rng(0).permutation(list(boards)).tolist():
+            assert replayer.snapshot(move_count).bitboard == boards[move_count]
+        game_host = replayer.game_host(len(record))
+        assert type(game_host) is host_class
+        assert game_host.is_game_over()
+
+        # a record that does not match its game is rejected
+        moves = record.moves.copy()
+        guess = next(
+            index
+            for index, move in enumerate(record.decode_moves())
+            if move[0] == game_record.GUESS
+        )
+        moves[guess] ^= 1 << 15
+        tampered = game_record.GameRecord(
+            num_players,
+            self.INITIAL_TILES,
+            self.MAX_TILE_NUMBER,
+            None,
+            record.draw_pile,
+            moves,
+        )
+        with pytest.raises(ValueError):
+            game_record.GameReplayer(tampered, host_class).snapshot()
+
+    @pytest.mark.parametrize("num_players, max_tile_number", [(6, 12), (3, 20), (5, 17)])
+    def test_large_game(self, num_players, max_tile_number):
+        record, boards = self.record_game(game.GameHost, num_players, 3, max_tile_number)
+        assert record.moves.dtype.itemsize == 4
+        data = record.to_bytes()
+        assert len(data) == 17 + 2 * max_tile_number + 4 * len(record)
+        assert game_record.GameRecord.from_bytes(data) == record
+        moves = record.decode_moves()
+        assert max(move[1] for move in moves) == num_players - 1
+        replayer = game_record.GameReplayer(record, game_array.ArrayGameHost)
+        for move_count in boards:
+            assert replayer.snapshot(move_count).bitboard == boards[move_count]
+
+        with pytest.raises(ValueError, match="can be recorded"):
+            self.record_game(game.GameHost, game_record.MAX_PLAYERS + 1, 0, 24)
+        with pytest.raises(ValueError, match="can be recorded"):
+            self.record_game(game.GameHost, 2, 0, game_record.MAX_TILE_NUMBER + 1)
@@ -0,0 +1,141 @@
+import pytest
+import numpy as np
+import game
+import game_array
+import game_vector
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the batched engine against the object engine
+    """
+
+    NUM_GAMES = 16
+    INITIAL_TILES = 4
+    MAX_TILE_NUMBER = 11
+
+    @pytest.fixture(params=[2, 3, 4])
+    def setup_init(self, request):
+        vector_host = game_vector.VectorGameHost(
+            self.NUM_GAMES,
+            request.param,
+            self.INITIAL_TILES,
+            self.MAX_TILE_NUMBER,
+            np.random.default_rng(request.param),
+        )
+        vector_host.init_game()
+        return vector_host
+
+    def make_game_host(self, vector_host, game_index):
+        game_host = game.GameHost(vector_host.num_players, self.INITIAL_TILES, self.MAX_TILE_NUMBER)
+        game_host.restore(
+            game.GameSnapshot(vector_host.get_bitboard(game_index), None), restore_rng=False
+        )
+        return game_host
+
+    def test_init(self, setup_init):
+        vector_host = setup_init
+        for game_index in range(self.NUM_GAMES):
+            board = vector_host.get_bitboard(game_index)
+            assert [hand.bit_count() for hand in board.hands] == [
+                self.INITIAL_TILES
+            ] * vector_host.num_players
+            assert board.public == 0
+        assert not vector_host.is_game_over().any()
+
+        drawn = vector_host.draw_tile()
+        assert drawn.all()
+        assert (vector_host.temp_tile[:, 0] >= 0).all()
+        num_dealt = vector_host.num_players * self.INITIAL_TILES
+        assert (vector_host.draw_count == num_dealt + 1).all()
+
+        vector_host.init_game(np.arange(self.NUM_GAMES) < 2)
+        assert (vector_host.temp_tile[:2] == -1).all()
+        assert (vector_host.temp_tile[2:, 0] >= 0).all()
+
+        with pytest.raises(ValueError, match="max_tile_number"):
+            game_vector.VectorGameHost(2, 2, 1, game_array.MAX_TILE_NUMBER + 1)
+
+    def test_random_game(self, setup_init):
+        vector_host = setup_init
+        number_players = vector_host.num_players
+        action_rng = np.random.default_rng(0)
+        vector_host.draw_tile()
+
+        for _ in range(1000):
+            playing = ~vector_host.is_game_over()
+            if not playing.any():
+                break
+            game_hosts = [
+                self.make_game_host(vector_host, game_index) for game_index in range(self.NUM_GAMES)
+            ]
+            target_index = action_rng.integers(-1, number_players + 1, self.NUM_GAMES)
+            tile_index = action_rng.integers(-1, 2 * self.INITIAL_TILES, self.NUM_GAMES)
+            tile_number = action_rng.integers(0, self.MAX_TILE_NUMBER + 2, self.NUM_GAMES)
+            for game_index in np.flatnonzero(playing & (action_rng.random(self.NUM_GAMES) < 0.8)):
+                # mostly guess a hidden tile of an opponent, right half of the time
+                current_player_index = vector_host.current_player[game_index]
+                opponents = [
+                    player_index
+                    for player_index in np.flatnonzero(vector_host.get_alive_mask()[game_index])
+                    if player_index != current_player_index
+                ]
+                target_index[game_index] = action_rng.choice(opponents)
+                hand = vector_host.hand(game_index, target_index[game_index])
+                tile_index[game_index] = action_rng.integers(len(hand))
+                if action_rng.random() < 0.5:
+                    tile_number[game_index] = hand[tile_index[game_index]] // 2 + 1
+            error, correct = vector_host.try_guess(target_index, tile_index, tile_number, playing)
+
+            for game_index in np.flatnonzero(playing):
+                game_host = game_hosts[game_index]
+                current_player_index = int(vector_host.current_player[game_index])
+                expected_error, expected_correct = game_host.all_players[
+                    current_player_index
+                ].try_guess(
+                    game_host.all_players,
+                    current_player_index,
+                    int(target_index[game_index]),
+                    int(tile_index[game_index]),
+                    int(tile_number[game_index]),
+                )
+                assert error[game_index] == (
+                    game_vector.NO_ERROR if expected_error is None else expected_error.value
+                )
+                assert correct[game_index] == expected_correct
+                assert vector_host.get_bitboard(game_index) == game_host.get_bitboard()
+
+            passed = playing & (error == game_vector.NO_ERROR) & ~correct
+            expected_next = {
+                game_index: game_hosts[game_index].get_next_player_index(
+                    int(vector_host.current_player[game_index])
+                )
+                for game_index in np.flatnonzero(passed)
+            }
+            vector_host.next_player(passed)
+            for game_index, next_player_index in expected_next.items():
+                assert vector_host.current_player[game_index] == next_player_index
+            vector_host.draw_tile(passed)
+
+        assert vector_host.is_game_over().all()
+        assert (np.count_nonzero(vector_host.get_alive_mask(), axis=1) == 1).all()
+
+    def test_step(self, setup_init):
+        vector_host = setup_init
+        vector_host.draw_tile()
+        # guess the right number of the first tile of the next player
+        target_index = (vector_host.current_player + 1) % vector_host.num_players
+        tile_ids = np.array(
+            [
+                vector_host.hand(game_index, target_index[game_index])[0]
+                for game_index in range(self.NUM_GAMES)
+            ]
+        )
+        error, correct = vector_host.step(target_index, 0, tile_ids // 2 + 1)
+        assert (error == game_vector.NO_ERROR).all() and correct.all()
+        assert (vector_host.current_player == 0).all()
+
+        # the same guess again is invalid and changes nothing
+        error, correct = vector_host.step(target_index, 0, tile_ids // 2 + 1)
+        assert (error == game.PlayerTileSet.InvalidActionErrorEnum.TILE_ALREADY_PUBLIC.value).all()
+        assert (vector_host.current_player == 0).all()
@@ -0,0 +1,88 @@
+import pytest
+import time
+import numpy as np
+import game
+import mcts_agent
+from bitboard import Bitboard
+from testing_helpers import play_random_game
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the information-set MCTS agent
+    """
+
+    INITIAL_TILES = 4
+    MAX_TILE_NUMBER = 11
+
+    @pytest.fixture(params=[2, 3, 4])
+    def setup_init(self, request):
+        game_host = game.GameHost(
+            request.param,
+            self.INITIAL_TILES,
+            self.MAX_TILE_NUMBER,
+            np.random.default_rng(request.param),
+        )
+        game_host.init_game()
+        return game_host
+
+    def test_candidate_guesses(self, setup_init):
+        game_host = setup_init
+        for board in play_random_game(game_host, np.random.default_rng(0)):
+            if game_host.is_game_over():
+                break
+            for player_index in game_host.alive_players:
+                guesses = set(mcts_agent.candidate_guesses(game_host, player_index))
+                for target_index in game_host.alive_players:
+                    if target_index == player_index:
+                        continue
+                    tile_list = game_host.all_players[target_index].get_tile_list()
+                    for tile_index, tile in enumerate(tile_list):
+                        right_guess = (target_index, tile_index, tile.number)
+                        assert (right_guess in guesses) == (tile.direction_value == game.PRIVATE)
+                for target_index, tile_index, tile_number in guesses:
+                    error, _ = game_host.all_players[player_index].try_guess(
+                        game_host.all_players.copy(), player_index, target_index, tile_index, 0
+                    )
+                    assert (
+                        error == game.PlayerTileSet.InvalidActionErrorEnum.TILE_NUMBER_OUT_OF_RANGE
+                    )
+
+    def test_winning_guess(self):
+        # player 1 only hides black 3, since black 4 is public and player 0 holds the other tiles
+        max_tile_number = 4
+        hands = (0b1111, 1 << 4 | 1 << 6)
+        board = Bitboard(max_tile_number, hands, 1 << 6, (5, -1), (0, 0))
+        game_host = game.GameHost(2, 2, max_tile_number, np.random.default_rng(0))
+        game_host.restore(game.GameSnapshot(board, None), restore_rng=False)
+        with mcts_agent.MCTSAgent(
+            iterations=50, num_workers=2, np_random=np.random.default_rng(0)
+        ) as agent:
+            assert agent.select_action(game_host, 0) == (1, 0, 3)
+            statistics = agent.search(board, 0)
+            assert sum(visits for visits, _ in statistics.values()) == 100
+
+    def test_game_over(self, setup_init):
+        game_host = setup_init
+        for _ in play_random_game(game_host, np.random.default_rng(0)):
+            pass
+        assert game_host.is_game_over()
+        agent = mcts_agent.MCTSAgent(iterations=10, np_random=np.random.default_rng(0))
+        with pytest.raises(ValueError, match="The game is over"):
+            agent.select_action(game_host, next(iter(game_host.alive_players)))
+        with pytest.raises(ValueError, match="The game is over"):
+            agent.search(game_host.get_bitboard(), 0)
+
+    def test_time_limit(self, setup_init):
+        game_host = setup_init
+        game_host.all_players[0].draw_tile(game_host.table_tile_set)
+        agent = mcts_agent.MCTSAgent(
+            iterations=10**9, time_limit=0.2, np_random=np.random.default_rng(0)
+        )
+        start = time.monotonic()
+        target_index, tile_index, tile_number = agent.select_action(game_host, 0)
+        assert time.monotonic() - start < 1.0
+        error, _ = game_host.all_players[0].try_guess(
+            game_host.all_players, 0, target_index, tile_index, tile_number
+        )
+        assert error is None
@@ -0,0 +1,72 @@
+import pytest
+import itertools
+import numpy as np
+import game
+import posterior
+from bitboard import iter_bits
+from testing_helpers import brute_force, play_random_game
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the posterior engine against brute-force enumeration
+    """
+
+    INITIAL_TILES = 2
+    MAX_TILE_NUMBER = 5
+
+    @pytest.fixture(params=[2, 3])
+    def setup_init(self, request):
+        game_host = game.GameHost(
+            request.param,
+            self.INITIAL_TILES,
+            self.MAX_TILE_NUMBER,
+            np.random.default_rng(request.param),
+        )
+        game_host.init_game()
+        return game_host
+
+    def test_posterior(self, setup_init):
+        game_host = setup_init
+        engine = posterior.PosteriorEngine()
+        max_tile_number = self.MAX_TILE_NUMBER
+        boards = play_random_game(game_host, np.random.default_rng(1))
+        for board in itertools.islice(boards, 8):
+            for observer in range(board.num_players):
+                result = engine.posterior(board, observer)
+                world_count, counts = brute_force(board, observer)
+                assert result.world_count == world_count
+                counter = posterior.AssignmentCounter(board, observer)
+                assert len(set(counter.assignments())) == world_count
+                for player_index, hand in enumerate(board.hands):
+                    probabilities = result.hand_probabilities[player_index]
+                    assert probabilities.shape == (hand.bit_count(), max_tile_number)
+                    assert np.allclose(probabilities.sum(axis=1), 1.0)
+                    for tile_index, tile_id in enumerate(iter_bits(hand)):
+                        if player_index == observer or board.public >> tile_id & 1:
+                            assert probabilities[tile_index, tile_id >> 1] == 1.0
+                            continue
+                        for number in range(max_tile_number):
+                            expected = counts.get(((player_index, tile_id), number), 0)
+                            assert probabilities[tile_index, number] == pytest.approx(
+                                expected / world_count
+                            )
+                for player_index, tile_id in enumerate(board.temp_tiles):
+                    if tile_id < 0:
+                        assert result.temp_probabilities[player_index] is None
+                    elif player_index != observer:
+                        for number in range(max_tile_number):
+                            expected = counts.get(((player_index, tile_id), number), 0)
+                            assert result.temp_probabilities[player_index][number] == pytest.approx(
+                                expected / world_count
+                            )
+
+    def test_cache(self, setup_init):
+        game_host = setup_init
+        engine = posterior.PosteriorEngine(cache_size=2)
+        board = game_host.get_bitboard()
+        first = engine.posterior(board, 0)
+        assert engine.posterior(game_host.get_bitboard(), 0) is first
+        assert engine.posterior(board, 1) is not first
+        tile_list = game_host.all_players[1].get_tile_list()
+        assert first.guess_probability(1, 0, tile_list[0].number) > 0
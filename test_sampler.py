@@ -0,0 +1,96 @@
+import pytest
+import itertools
+from collections import Counter
+import numpy as np
+import game
+import game_array
+import posterior
+import sampler
+from bitboard import iter_bits
+from testing_helpers import brute_force, play_random_game
+
+
+class TestClass:
+    """
+    This class is used for pytest testing of the determinization sampler
+    """
+
+    INITIAL_TILES = 2
+    MAX_TILE_NUMBER = 5
+    NUM_SAMPLES = 4000
+
+    @pytest.fixture(params=[2, 3])
+    def setup_init(self, request):
+        game_host = game.GameHost(
+            request.param,
+            self.INITIAL_TILES,
+            self.MAX_TILE_NUMBER,
+            np.random.default_rng(request.param),
+        )
+        game_host.init_game()
+        return game_host
+
+    @staticmethod
+    def assert_consistent(sampled, board, observer):
+        """
+        Test that a sampled bitboard only differs from board where the observer cannot see
+        """
+        max_tile_number = board.max_tile_number
+        assert sampled.public == board.public
+        assert sampled.hands[observer] == board.hands[observer]
+        assert sampled.temp_tiles[observer] == board.temp_tiles[observer]
+        assert sampled.public_hash(observer) == board.public_hash(observer)
+        tiles = [tile_id for hand in sampled.hands for tile_id in iter_bits(hand)]
+        tiles += [tile_id for tile_id in sampled.temp_tiles if tile_id >= 0]
+        assert len(tiles) == len(set(tiles))
+        for source_player_index in range(board.num_players):
+            for tile_id in range(2 * max_tile_number):  # no failed guess is right
+                assert not sampled.guesses(source_player_index, tile_id) >> (tile_id >> 1) & 1
+
+    def test_sample(self, setup_init):
+        game_host = setup_init
+        np_random = np.random.default_rng(0)
+        engine = posterior.PosteriorEngine()
+        boards = play_random_game(game_host, np.random.default_rng(1))
+        for board in itertools.islice(boards, 6):
+            for observer in range(board.num_players):
+                determinization_sampler = sampler.DeterminizationSampler(board, observer)
+                bitboards = determinization_sampler.sample_bitboards(self.NUM_SAMPLES, np_random)
+                for sampled in bitboards[:50]:
+                    self.assert_consistent(sampled, board, observer)
+
+                # every consistent world is drawn about as often
+                world_count, _ = brute_force(board, observer)
+                frequencies = np.array(list(Counter(bitboards).values())) / self.NUM_SAMPLES
+                assert len(frequencies) == world_count
+                assert np.abs(frequencies - 1 / world_count).max() < 0.03
+
+                # and the frequencies of the numbers match the posterior
+                result = engine.posterior(board, observer)
+                tile_ids = determinization_sampler.sample(self.NUM_SAMPLES, np_random)
+                for slot, (player_index, tile_index) in enumerate(determinization_sampler.slots):
+                    numbers = np.bincount(tile_ids[:, slot] >> 1, minlength=self.MAX_TILE_NUMBER)
+                    if tile_index is None:
+                        expected = result.temp_probabilities[player_index]
+                    else:
+                        expected = result.hand_probabilities[player_index][tile_index]
+                    assert np.abs(numbers / self.NUM_SAMPLES - expected).max() < 0.03
+
+    @pytest.mark.parametrize("host_class", [game.GameHost, game_array.ArrayGameHost])
+    def test_sample_game_hosts(self, host_class):
+        game_host = host_class(3, 4, 12, np.random.default_rng(0))
+        game_host.init_game()
+        game_host.all_players[0].draw_tile(game_host.table_tile_set)
+        board = game_host.get_bitboard()
+        determinization_sampler = sampler.DeterminizationSampler(board, 1)
+        sampled_hosts = determinization_sampler.sample_game_hosts(
+            game_host, 20, np.random.default_rng(1)
+        )
+        assert len(set(sampled_host.get_bitboard() for sampled_host in sampled_hosts)) > 1
+        for sampled_host in sampled_hosts:
+            assert type(sampled_host) is host_class
+            self.assert_consistent(sampled_host.get_bitboard(), board, 1)
+            # a sampled world plays on like a real game
+            sampled_host.all_players[0].end_turn()
+            sampled_host.all_players[1].draw_tile(sampled_host.table_tile_set)
+            assert sampled_host.all_players[1].temp_tile is not None
@@ -0,0 +1,81 @@
+import itertools
+
+from bitboard import iter_bits
+
+
+def play_random_game(game_host, action_rng):
+    """
+    Yield the bitboard after every guess of a random game, guessing right half of the time
+    """
+    number_players = len(game_host.all_players)
+    current_player_index = 0
+    game_host.all_players[0].draw_tile(game_host.table_tile_set)
+    yield game_host.get_bitboard()
+    while not game_host.is_game_over():
+        target_index = int(action_rng.integers(number_players))
+        target_tile_list = game_host.all_players[target_index].get_tile_list()
+        tile_index = int(action_rng.integers(len(target_tile_list)))
+        tile_number = int(action_rng.integers(1, game_host.table_tile_set.max_tile_number + 1))
+        if action_rng.random() < 0.5:
+            tile_number = target_tile_list[tile_index].number
+        player = game_host.all_players[current_player_index]
+        error, correct_guess = player.try_guess(
+            game_host.all_players, current_player_index, target_index, tile_index, tile_number
+        )
+        if error is not None:
+            continue
+        if not correct_guess:
+            current_player_index = game_host.get_next_player_index(current_player_index)
+            if len(game_host.table_tile_set.tile_set) > 0:
+                game_host.all_players[current_player_index].draw_tile(game_host.table_tile_set)
+        elif action_rng.random() < 0.3:
+            player.end_turn()
+            current_player_index = game_host.get_next_player_index(current_player_index)
+            if len(game_host.table_tile_set.tile_set) > 0:
+                game_host.all_players[current_player_index].draw_tile(game_host.table_tile_set)
+        yield game_host.get_bitboard()
+
+
+def brute_force(board, observer):
+    """
+    Count every assignment of the unseen tile ids to the hidden tiles directly
+    """
+    max_tile_number = board.max_tile_number
+    known = board.public | board.hands[observer]
+    if board.temp_tiles[observer] >= 0:
+        known |= 1 << board.temp_tiles[observer]
+    unseen = [tile_id for tile_id in range(2 * max_tile_number) if not known >> tile_id & 1]
+    slots = [
+        (player_index, tile_id)
+        for player_index, hand in enumerate(board.hands)
+        if player_index != observer
+        for tile_id in iter_bits(hand & ~board.public)
+    ]
+    slots += [
+        (player_index, tile_id)
+        for player_index, tile_id in enumerate(board.temp_tiles)
+        if player_index != observer and tile_id >= 0
+    ]
+    counts = {}
+    world_count = 0
+    for assignment in itertools.permutations(unseen, len(slots)):
+        if any(
+            new_id % 2 != tile_id % 2
+            or any(
+                board.history[source] >> tile_id * max_tile_number + (new_id >> 1) & 1
+                for source in range(board.num_players)
+            )
+            for (_, tile_id), new_id in zip(slots, assignment)
+        ):
+            continue
+        relabel = dict((tile_id, new_id) for (_, tile_id), new_id in zip(slots, assignment))
+        if any(
+            list(relabel.get(tile_id, tile_id) for tile_id in iter_bits(hand))
+            != sorted(relabel.get(tile_id, tile_id) for tile_id in iter_bits(hand))
+            for hand in board.hands
+        ):
+            continue
+        world_count += 1
+        for slot, new_id in zip(slots, assignment):
+            counts[slot, new_id >> 1] = counts.get((slot, new_id >> 1), 0) + 1
+    return world_count, counts